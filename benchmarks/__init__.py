@@ -0,0 +1,13 @@
+# -*- encoding: utf-8 -*-
+
+"""
+Benchmarks for the plugin, running outside of MO2 using an in-memory stand-in for
+mobase (see fake_mobase) and synthetic BAIN archives (see archive).
+
+Run from the root of the repository:
+
+    python -m benchmarks --scale medium --repeat 5
+
+Results are stored in the .benchmarks folder and compared with the previous results
+for the same scale.
+"""
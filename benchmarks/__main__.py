@@ -0,0 +1,105 @@
+# -*- encoding: utf-8 -*-
+
+import argparse
+import json
+import platform
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from .archive import SCALES
+from .suite import make_benchmarks, measure
+
+# Folder containing the stored results:
+RESULTS_FOLDER = Path(".benchmarks")
+
+
+def find_previous(scale: str) -> Optional[Path]:
+    """
+    Find the most recent stored results for the given scale.
+
+    Args:
+        scale: The scale of the benchmarks.
+
+    Returns:
+        The path to the results, or None if there are no stored results.
+    """
+    results = sorted(RESULTS_FOLDER.glob(f"*-{scale}.json"))
+    return results[-1] if results else None
+
+
+def print_results(
+    results: Dict[str, Dict[str, float]], previous: Optional[Dict[str, Any]]
+):
+    previous_results: Dict[str, Dict[str, float]] = {}
+    if previous:
+        previous_results = previous["results"]
+        print(f"Comparing with results from {previous['timestamp']}.")
+
+    print(f"{'Benchmark':<14} {'Median (ms)':>12} {'Min (ms)':>10} {'Change':>10}")
+    for name, result in results.items():
+        change = ""
+        if name in previous_results and previous_results[name]["median"]:
+            ratio = result["median"] / previous_results[name]["median"]
+            change = f"{(ratio - 1) * 100:+.1f}%"
+        print(
+            f"{name:<14} {result['median'] * 1000:>12.3f} "
+            f"{result['min'] * 1000:>10.3f} {change:>10}"
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    parser.add_argument("--scale", choices=list(SCALES), default="medium")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--only", nargs="+", metavar="NAME", help="only run the given benchmarks"
+    )
+    parser.add_argument(
+        "--compare", type=Path, help="results to compare with (default: previous)"
+    )
+    parser.add_argument(
+        "--no-save", action="store_true", help="do not store the results"
+    )
+    args = parser.parse_args(argv)
+
+    params = SCALES[args.scale]
+
+    results: Dict[str, Dict[str, float]] = {}
+    for benchmark in make_benchmarks(params):
+        if args.only and benchmark.name not in args.only:
+            continue
+        results[benchmark.name] = measure(benchmark, args.repeat)
+
+    previous_path = args.compare or find_previous(args.scale)
+    previous = None
+    if previous_path and previous_path.exists():
+        with open(previous_path, "r") as fp:
+            previous = json.load(fp)
+
+    print_results(results, previous)
+
+    if not args.no_save:
+        timestamp = time.strftime("%Y%m%d-%H%M%S")
+        RESULTS_FOLDER.mkdir(exist_ok=True)
+        path = RESULTS_FOLDER / f"{timestamp}-{args.scale}.json"
+        with open(path, "w") as fp:
+            json.dump(
+                {
+                    "timestamp": timestamp,
+                    "scale": args.scale,
+                    "parameters": params._asdict(),
+                    "repeat": args.repeat,
+                    "python": sys.version,
+                    "platform": platform.platform(),
+                    "results": results,
+                },
+                fp,
+                indent=2,
+            )
+        print(f"Results stored in {path}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+# -*- encoding: utf-8 -*-
+
+"""
+Generator of synthetic BAIN archives with wizard scripts.
+"""
+
+import random
+from typing import Dict, List, NamedTuple
+
+from .fake_mobase import IFileTree, PluginState, tree_from_files
+
+# Name of the folder containing the wizard in generated archives:
+ARCHIVE_BASE = "Synthetic Mod"
+
+# Name of the INI file shipped in the core sub-package of generated archives:
+ARCHIVE_INI = "Synthetic.ini"
+
+
+class ArchiveParameters(NamedTuple):
+
+    # Number of sub-packages, and number of files and plugins per sub-package:
+    subpackages: int = 10
+    files: int = 50
+    plugins: int = 2
+
+    # Number of images and size of each image (in bytes):
+    images: int = 10
+    image_size: int = 64 * 1024
+
+    # Number of select pages and number of options per page:
+    pages: int = 5
+    options: int = 6
+
+    # Number of iterations of the loop checking data files:
+    loop: int = 100
+
+    # Number of INI settings edited by the script, and number of lines of the
+    # (script-style) INI file shipped in the archive:
+    tweaks: int = 20
+    ini_lines: int = 200
+
+    # Seed for the random generator:
+    seed: int = 0
+
+
+# Predefined parameters:
+SCALES: Dict[str, ArchiveParameters] = {
+    "small": ArchiveParameters(
+        subpackages=5, files=20, images=5, image_size=16 * 1024, pages=3, loop=20
+    ),
+    "medium": ArchiveParameters(),
+    "large": ArchiveParameters(
+        subpackages=60,
+        files=400,
+        plugins=5,
+        images=80,
+        image_size=256 * 1024,
+        pages=40,
+        options=12,
+        loop=2000,
+        tweaks=500,
+        ini_lines=5000,
+    ),
+}
+
+
+class SyntheticArchive(NamedTuple):
+
+    # The tree of the archive, the wizard is in the ARCHIVE_BASE folder:
+    tree: IFileTree
+
+    # The content of the wizard script:
+    script: str
+
+    # The files in the (virtual) data folder and the plugins in the load order:
+    data_files: List[str]
+    plugins: Dict[str, PluginState]
+
+
+def _random_bytes(rnd: random.Random, size: int) -> bytes:
+    return rnd.getrandbits(8 * size).to_bytes(size, "little") if size else b""
+
+
+def _subpackage_name(index: int) -> str:
+    if index == 0:
+        return "00 Core"
+    return f"{index:02} Option {index}"
+
+
+def _make_script(params: ArchiveParameters) -> str:
+
+    lines = [
+        "; Synthetic wizard script.",
+        'RequireVersions "1.2.416", "0.0.20", "", ""',
+        f'SelectSubPackage "{_subpackage_name(0)}"',
+        "",
+        "; Check data files, as done by patch-hub wizards:",
+        "i = 0",
+        "count = 0",
+        f"While i < {params.loop}",
+        '    If DataFileExists("Plugin" + str(i % 50) + ".esp")',
+        "        count += 1",
+        '    Elif GetPluginStatus("Master" + str(i % 10) + ".esm") == 2',
+        "        count += 2",
+        "    EndIf",
+        "    i += 1",
+        "EndWhile",
+        "",
+    ]
+
+    # Sub-packages selected by the options (excluding the core one):
+    optional = [_subpackage_name(i) for i in range(1, params.subpackages)] or [
+        _subpackage_name(0)
+    ]
+
+    image = 0
+    for page in range(params.pages):
+        keyword = "SelectOne" if page % 2 == 0 else "SelectMany"
+        options: List[str] = []
+        for option in range(params.options):
+            default = (
+                "|"
+                if option == 0 or (keyword == "SelectMany" and option % 3 == 0)
+                else ""
+            )
+            path = ""
+            if params.images:
+                path = f"Images/image{image % params.images}.png"
+                image += 1
+            options.append(
+                f'"{default}Page {page} Option {option}", '
+                f'"Description of option {option} of page {page}.", "{path}"'
+            )
+
+        lines.append(f'{keyword} "Page {page}: select options.", {", ".join(options)}')
+        for option in range(params.options):
+            subpackage = optional[(page * params.options + option) % len(optional)]
+            lines.extend(
+                [
+                    f'    Case "Page {page} Option {option}"',
+                    f'        SelectSubPackage "{subpackage}"',
+                    f'        Note "Page {page} Option {option} selected."',
+                    "        Break",
+                ]
+            )
+        lines.append("EndSelect")
+        lines.append("")
+
+    # INI Tweaks:
+    for tweak in range(params.tweaks):
+        if tweak % 2 == 0:
+            lines.append(f'EditINI("{ARCHIVE_INI}", "set", "fSetting{tweak}", 1)')
+        else:
+            lines.append(f'EditINI("Oblivion.ini", "General", "uSetting{tweak}", 1)')
+
+    lines.append('RenamePlugin "Core0.esp", "Core0 - Renamed.esp"')
+    lines.append("")
+
+    return "\n".join(lines)
+
+
+def _make_ini(params: ArchiveParameters) -> bytes:
+    # Script-style INI file (OBSE), since only these can be merged:
+    lines = [
+        f"set fSetting{line} to {line}.0 ; comment {line}"
+        for line in range(params.ini_lines)
+    ]
+    return "\n".join(lines).encode("utf-8")
+
+
+def make_archive(params: ArchiveParameters = ArchiveParameters()) -> SyntheticArchive:
+    """
+    Generate a synthetic archive.
+
+    Args:
+        params: The parameters of the archive.
+
+    Returns:
+        The generated archive.
+    """
+    rnd = random.Random(params.seed)
+
+    script = _make_script(params)
+
+    files: Dict[str, bytes] = {
+        f"{ARCHIVE_BASE}/wizard.txt": script.encode("utf-8"),
+        f"{ARCHIVE_BASE}/{_subpackage_name(0)}/{ARCHIVE_INI}": _make_ini(params),
+        f"{ARCHIVE_BASE}/Docs/Readme.txt": b"Synthetic archive.",
+    }
+
+    for image in range(params.images):
+        files[f"{ARCHIVE_BASE}/Images/image{image}.png"] = _random_bytes(
+            rnd, params.image_size
+        )
+
+    for index in range(params.subpackages):
+        subpackage = f"{ARCHIVE_BASE}/{_subpackage_name(index)}"
+        prefix = "Core" if index == 0 else f"Option{index}_"
+        for plugin in range(params.plugins):
+            files[f"{subpackage}/{prefix}{plugin}.esp"] = _random_bytes(rnd, 256)
+        for file in range(params.files):
+            files[f"{subpackage}/textures/synthetic/{index}/texture{file}.dds"] = (
+                _random_bytes(rnd, 64)
+            )
+
+    # Data folder with half of the checked plugins, and a few active masters:
+    plugins = {f"Master{i}.esm": PluginState.ACTIVE for i in range(0, 10, 2)}
+    plugins.update({f"Plugin{i}.esp": PluginState.ACTIVE for i in range(0, 50, 2)})
+    data_files = list(plugins) + [
+        f"textures/data/texture{i}.dds" for i in range(params.files)
+    ]
+
+    return SyntheticArchive(tree_from_files(files), script, data_files, plugins)
@@ -0,0 +1,694 @@
+# -*- encoding: utf-8 -*-
+
+"""
+In-memory stand-in for the parts of the mobase module used by the plugin.
+
+This module is only meant to run the plugin code outside of MO2 (e.g., for
+benchmarks), see install(). It implements the behavior of file trees, of the
+organizer and of the installation manager closely enough for the plugin to work,
+but does not try to mimic every detail of MO2. In particular, paths use the
+separator of the platform by default (MO2 always uses backslashes), so that they
+can be handled by pathlib on any platform.
+"""
+
+import enum
+import fnmatch
+import hashlib
+import os
+import sys
+import tempfile
+from pathlib import Path
+from typing import (
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+# Extensions of files considered as plugins:
+PLUGIN_EXTENSIONS = (".esp", ".esm", ".esl")
+
+# Folders that can be found in a data folder:
+DATA_FOLDERS = (
+    "bookart",
+    "distantlod",
+    "fonts",
+    "ini",
+    "menus",
+    "meshes",
+    "music",
+    "obse",
+    "shaders",
+    "sound",
+    "textures",
+    "trees",
+    "video",
+)
+
+
+class VersionInfo:
+
+    _parts: Tuple[int, ...]
+
+    def __init__(self, version: Union[str, int] = 0, *parts: int):
+        if isinstance(version, str):
+            self._parts = tuple(
+                int(part) if part.isdigit() else 0 for part in version.split(".")
+            )
+        else:
+            self._parts = (version,) + parts
+
+        # Trailing zeros are not significant:
+        while len(self._parts) > 1 and self._parts[-1] == 0:
+            self._parts = self._parts[:-1]
+
+    def canonicalString(self) -> str:
+        return ".".join(str(part) for part in self._parts)
+
+    def __lt__(self, other: "VersionInfo") -> bool:
+        return self._parts < other._parts
+
+    def __gt__(self, other: "VersionInfo") -> bool:
+        return self._parts > other._parts
+
+    def __le__(self, other: "VersionInfo") -> bool:
+        return self._parts <= other._parts
+
+    def __ge__(self, other: "VersionInfo") -> bool:
+        return self._parts >= other._parts
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, VersionInfo) and self._parts == other._parts
+
+    def __str__(self) -> str:
+        return self.canonicalString()
+
+
+class GuessQuality(enum.IntEnum):
+    INVALID = 0
+    FALLBACK = 1
+    GOOD = 2
+    META = 3
+    PRESET = 4
+    USER = 5
+
+
+class GuessedString:
+
+    _variants: Dict[str, GuessQuality]
+
+    def __init__(self, value: str = "", quality: GuessQuality = GuessQuality.USER):
+        self._variants = {}
+        if value:
+            self._variants[value] = quality
+
+    def update(self, value: str, quality: GuessQuality = GuessQuality.USER):
+        self._variants[value] = quality
+
+    def variants(self) -> List[str]:
+        return list(self._variants)
+
+    def __str__(self) -> str:
+        if not self._variants:
+            return ""
+        return max(self._variants, key=lambda value: self._variants[value])
+
+
+class InstallResult(enum.Enum):
+    SUCCESS = 0
+    FAILED = 1
+    CANCELED = 2
+    MANUAL_REQUESTED = 3
+    NOT_ATTEMPTED = 4
+
+
+class PluginState(enum.Enum):
+    MISSING = 0
+    INACTIVE = 1
+    ACTIVE = 2
+
+
+class PluginSetting:
+    def __init__(self, key: str, description: str, default_value: object):
+        self.key = key
+        self.description = description
+        self.default_value = default_value
+
+
+class FileTreeEntry:
+
+    FILE = 1
+    DIRECTORY = 2
+    FILE_OR_DIRECTORY = 3
+
+    _parent: Optional["IFileTree"]
+    _name: str
+
+    # Content of the file, or path of the file on the disk (only for files):
+    _data: Union[bytes, Path]
+
+    def __init__(
+        self, parent: Optional["IFileTree"], name: str, data: Union[bytes, Path] = b""
+    ):
+        self._parent = parent
+        self._name = name
+        self._data = data
+
+    def name(self) -> str:
+        return self._name
+
+    def parent(self) -> Optional["IFileTree"]:
+        return self._parent
+
+    def isFile(self) -> bool:
+        return True
+
+    def isDir(self) -> bool:
+        return False
+
+    def suffix(self) -> str:
+        _, ext = os.path.splitext(self._name)
+        return ext[1:]
+
+    def hasSuffix(self, suffixes: Union[str, Iterable[str]]) -> bool:
+        if isinstance(suffixes, str):
+            suffixes = [suffixes]
+        suffix = self.suffix().lower()
+        return any(suffix == value.lower() for value in suffixes)
+
+    def path(self, sep: str = os.sep) -> str:
+        parts: List[str] = []
+        entry: Optional[FileTreeEntry] = self
+        while entry is not None and entry._parent is not None:
+            parts.append(entry._name)
+            entry = entry._parent
+        return sep.join(reversed(parts))
+
+    def detach(self) -> bool:
+        if self._parent is None:
+            return False
+        self._parent._remove(self)
+        self._parent = None
+        return True
+
+    def data(self) -> bytes:
+        """
+        Returns:
+            The content of the file (not part of mobase).
+        """
+        if isinstance(self._data, Path):
+            return self._data.read_bytes()
+        return self._data
+
+
+class IFileTree(FileTreeEntry):
+
+    CONTINUE = 0
+    SKIP = 1
+    STOP = 2
+
+    WalkReturn = int
+
+    # Children, in insertion order, indexed by case-folded name:
+    _children: Dict[str, FileTreeEntry]
+
+    def __init__(self, parent: Optional["IFileTree"] = None, name: str = ""):
+        super().__init__(parent, name)
+        self._children = {}
+
+    def isFile(self) -> bool:
+        return False
+
+    def isDir(self) -> bool:
+        return True
+
+    def __iter__(self) -> Iterator[FileTreeEntry]:
+        return iter(list(self._children.values()))
+
+    def __len__(self) -> int:
+        return len(self._children)
+
+    def __getitem__(self, index: int) -> FileTreeEntry:
+        return list(self._children.values())[index]
+
+    def _split(self, path: str) -> List[str]:
+        return [part for part in path.replace("\\", "/").split("/") if part]
+
+    def _remove(self, entry: FileTreeEntry):
+        self._children.pop(entry.name().casefold(), None)
+
+    def _attach(self, entry: FileTreeEntry, name: Optional[str] = None):
+        entry.detach()
+        if name is not None:
+            entry._name = name
+        entry._parent = self
+        self._children[entry.name().casefold()] = entry
+
+    def find(
+        self, path: str, type: int = FileTreeEntry.FILE_OR_DIRECTORY
+    ) -> Optional[FileTreeEntry]:
+        entry: Optional[FileTreeEntry] = self
+        for part in self._split(path):
+            if not isinstance(entry, IFileTree):
+                return None
+            entry = entry._children.get(part.casefold())
+            if entry is None:
+                return None
+
+        if entry is self:
+            return None
+        if type == FileTreeEntry.FILE and not entry.isFile():  # type: ignore
+            return None
+        if type == FileTreeEntry.DIRECTORY and not entry.isDir():  # type: ignore
+            return None
+        return entry
+
+    def exists(self, path: str, type: int = FileTreeEntry.FILE_OR_DIRECTORY) -> bool:
+        return self.find(path, type) is not None
+
+    def _makeDirectories(self, parts: Sequence[str]) -> "IFileTree":
+        tree = self
+        for part in parts:
+            entry = tree._children.get(part.casefold())
+            if not isinstance(entry, IFileTree):
+                if entry is not None:
+                    entry.detach()
+                entry = IFileTree(tree, part)
+                tree._children[part.casefold()] = entry
+            tree = entry
+        return tree
+
+    def addDirectory(self, path: str) -> "IFileTree":
+        return self._makeDirectories(self._split(path))
+
+    def addFile(
+        self, path: str, replace_if_exists: bool = False, data: Union[bytes, Path] = b""
+    ) -> Optional[FileTreeEntry]:
+        parts = self._split(path)
+        tree = self._makeDirectories(parts[:-1])
+        existing = tree._children.get(parts[-1].casefold())
+        if existing is not None:
+            if not replace_if_exists:
+                return None
+            existing.detach()
+        entry = FileTreeEntry(tree, parts[-1], data)
+        tree._children[parts[-1].casefold()] = entry
+        return entry
+
+    def insert(self, entry: FileTreeEntry) -> bool:
+        self._attach(entry)
+        return True
+
+    def move(self, entry: FileTreeEntry, path: str) -> bool:
+        parts = self._split(path)
+        if path.endswith(("/", "\\")):
+            self._makeDirectories(parts)._attach(entry)
+        else:
+            tree = self._makeDirectories(parts[:-1])
+            existing = tree._children.get(parts[-1].casefold())
+            if existing is not None and existing is not entry:
+                existing.detach()
+            tree._attach(entry, parts[-1])
+        return True
+
+    def merge(self, other: "IFileTree") -> int:
+        """
+        Move all the entries of the given tree into this tree, recursively merging
+        folders and replacing files.
+        """
+        count = 0
+        for entry in other:
+            existing = self._children.get(entry.name().casefold())
+            if isinstance(existing, IFileTree) and isinstance(entry, IFileTree):
+                count += existing.merge(entry)
+                entry.detach()
+            else:
+                if existing is not None:
+                    existing.detach()
+                    count += 1
+                self._attach(entry)
+        return count
+
+    def remove(self, path: str) -> bool:
+        entry = self.find(path)
+        return entry is not None and entry.detach()
+
+    def createOrphanTree(self, name: str = "") -> "IFileTree":
+        return IFileTree(None, name)
+
+    def walk(
+        self,
+        callback: Callable[[str, FileTreeEntry], int],
+        sep: str = os.sep,
+    ):
+        # Iterative depth-first traversal, similar to MO2:
+        stack: List[Tuple[str, IFileTree]] = [("", self)]
+        while stack:
+            path, tree = stack.pop()
+            subtrees: List[Tuple[str, IFileTree]] = []
+            for entry in tree:
+                result = callback(path, entry)
+                if result == IFileTree.STOP:
+                    return
+                if isinstance(entry, IFileTree) and result != IFileTree.SKIP:
+                    subtrees.append((path + entry.name() + sep, entry))
+            stack.extend(reversed(subtrees))
+
+
+def tree_from_files(files: Mapping[str, bytes]) -> IFileTree:
+    """
+    Create a tree from the given files (not part of mobase).
+
+    Args:
+        files: Mapping from paths to the content of the files.
+
+    Returns:
+        A tree containing the given files.
+    """
+    tree = IFileTree()
+    for path, data in files.items():
+        tree.addFile(path, replace_if_exists=True, data=data)
+    return tree
+
+
+def tree_from_folder(folder: Path) -> IFileTree:
+    """
+    Create a tree from the files in the given folder, e.g., an extracted archive (not
+    part of mobase).
+
+    The content of the files is only read when the files are extracted.
+
+    Args:
+        folder: The folder to create the tree from.
+
+    Returns:
+        A tree containing the files in the given folder.
+    """
+    tree = IFileTree()
+    for root, folders, files in os.walk(folder):
+        folders.sort()
+        for name in sorted(files):
+            path = Path(root, name)
+            tree.addFile(
+                path.relative_to(folder).as_posix(), replace_if_exists=True, data=path
+            )
+    return tree
+
+
+class ModDataChecker:
+
+    INVALID = 0
+    FIXABLE = 1
+    VALID = 2
+
+    CheckReturn = int
+
+    def dataLooksValid(self, tree: IFileTree) -> int:
+        for entry in tree:
+            name = entry.name().lower()
+            if entry.isDir() and name in DATA_FOLDERS:
+                return ModDataChecker.VALID
+            if entry.isFile() and (
+                name.endswith(PLUGIN_EXTENSIONS) or name.endswith(".bsa")
+            ):
+                return ModDataChecker.VALID
+        return ModDataChecker.INVALID
+
+
+class ScriptExtender:
+
+    _version: str
+
+    def __init__(self, version: str = "0.0.21"):
+        self._version = version
+
+    def isInstalled(self) -> bool:
+        return True
+
+    def getExtenderVersion(self) -> str:
+        return self._version
+
+
+class _Directory:
+
+    _path: Path
+
+    def __init__(self, path: Path):
+        self._path = path
+
+    def dirName(self) -> str:
+        return self._path.name
+
+    def absolutePath(self) -> str:
+        return self._path.as_posix()
+
+    def absoluteFilePath(self, path: str) -> str:
+        return (self._path / path).as_posix()
+
+
+class IPluginGame:
+
+    _name: str
+    _data: Path
+    _version: str
+    _features: Dict[type, object]
+
+    def __init__(
+        self,
+        data: Path = Path("Data"),
+        version: str = "1.2.416",
+        features: Optional[Dict[type, object]] = None,
+        name: str = "Oblivion",
+    ):
+        self._name = name
+        self._data = data
+        self._version = version
+        self._features = (
+            features
+            if features is not None
+            else {ModDataChecker: ModDataChecker(), ScriptExtender: ScriptExtender()}
+        )
+
+    def dataDirectory(self) -> _Directory:
+        return _Directory(self._data)
+
+    def gameVersion(self) -> str:
+        return self._version
+
+    def version(self) -> VersionInfo:
+        return VersionInfo(self._version)
+
+    def gameName(self) -> str:
+        return self._name
+
+    def feature(self, feature: type) -> object:
+        return self._features.get(feature)
+
+
+class IPluginList:
+
+    # Plugins, in load order, with their state, and load order of the plugins:
+    _plugins: Dict[str, PluginState]
+    _order: Dict[str, int]
+
+    def __init__(self, plugins: Mapping[str, PluginState]):
+        self._plugins = {name.casefold(): state for name, state in plugins.items()}
+        self._order = {name: index for index, name in enumerate(self._plugins)}
+
+    def state(self, name: str) -> PluginState:
+        return self._plugins.get(name.casefold(), PluginState.MISSING)
+
+    def loadOrder(self, name: str) -> int:
+        return self._order.get(name.casefold(), -1)
+
+
+class IModInterface:
+
+    _settings: Dict[str, Dict[str, object]]
+
+    def __init__(self):
+        self._settings = {}
+
+    def pluginSettings(self, plugin: str) -> Dict[str, object]:
+        return dict(self._settings.get(plugin, {}))
+
+    def setPluginSetting(self, plugin: str, key: str, value: object) -> bool:
+        self._settings.setdefault(plugin, {})[key] = value
+        return True
+
+    def clearPluginSettings(self, plugin: str) -> Dict[str, object]:
+        return self._settings.pop(plugin, {})
+
+
+class IOrganizer:
+    """
+    Organizer over a virtual data folder.
+
+    The virtual data folder is a list of paths (relative to the data folder) that
+    is indexed by folder so that findFiles() does not have to go through all the
+    files.
+    """
+
+    _game: IPluginGame
+    _plugins: IPluginList
+    _settings: Dict[str, Dict[str, object]]
+    _enabled: Dict[str, bool]
+    _dataPath: str
+
+    # Files of the virtual data folder, indexed by (case-folded) folder:
+    _files: Dict[str, List[str]]
+
+    def __init__(
+        self,
+        files: Iterable[str] = (),
+        plugins: Optional[Mapping[str, PluginState]] = None,
+        settings: Optional[Mapping[str, Mapping[str, object]]] = None,
+        enabled: Optional[Mapping[str, bool]] = None,
+        data_path: Optional[str] = None,
+        game: Optional[IPluginGame] = None,
+    ):
+        self._game = game or IPluginGame()
+        self._plugins = IPluginList(plugins or {})
+        self._settings = {
+            name: dict(values) for name, values in (settings or {}).items()
+        }
+        self._enabled = dict(enabled or {})
+        self._dataPath = data_path or tempfile.mkdtemp(prefix="mobase-data-")
+
+        self._files = {}
+        for file in files:
+            parent, _, name = file.replace("\\", "/").rpartition("/")
+            self._files.setdefault(parent.casefold(), []).append(
+                self._game.dataDirectory().absoluteFilePath(file)
+            )
+
+    def managedGame(self) -> IPluginGame:
+        return self._game
+
+    def pluginList(self) -> IPluginList:
+        return self._plugins
+
+    def findFiles(self, path: str, pattern: str) -> List[str]:
+        files = self._files.get(path.replace("\\", "/").strip("/").casefold(), [])
+        pattern = pattern.casefold()
+        return [
+            file
+            for file in files
+            if fnmatch.fnmatchcase(os.path.basename(file).casefold(), pattern)
+        ]
+
+    def pluginSetting(self, plugin: str, key: str) -> object:
+        return self._settings.get(plugin, {}).get(key)
+
+    def setPluginSetting(self, plugin: str, key: str, value: object):
+        self._settings.setdefault(plugin, {})[key] = value
+
+    def isPluginEnabled(self, plugin: str) -> bool:
+        return self._enabled.get(plugin, False)
+
+    def pluginDataPath(self) -> str:
+        return self._dataPath
+
+
+class IInstallationManager:
+    """
+    Installation manager extracting files from in-memory trees to a temporary
+    folder.
+
+    For solid archives, each call to extractFiles() reads the content of the archive
+    up to the last requested entry, like an actual decompression would.
+    """
+
+    _folder: Path
+
+    # Entries of the solid archive, in order, if any:
+    _solid: List[FileTreeEntry]
+
+    def __init__(
+        self,
+        folder: Optional[Path] = None,
+        solid: Optional[Sequence[FileTreeEntry]] = None,
+    ):
+        self._folder = folder or Path(tempfile.mkdtemp(prefix="mobase-extract-"))
+        self._solid = list(solid or [])
+
+    def _decompress(self, entries: Sequence[FileTreeEntry]):
+        requested = {id(entry) for entry in entries}
+        last = max(
+            (i for i, entry in enumerate(self._solid) if id(entry) in requested),
+            default=-1,
+        )
+        digest = hashlib.sha1()
+        for entry in self._solid[: last + 1]:
+            digest.update(entry.data())
+
+    def extractFiles(
+        self, entries: Sequence[FileTreeEntry], silent: bool = True
+    ) -> List[str]:
+        if self._solid:
+            self._decompress(entries)
+        paths: List[str] = []
+        for entry in entries:
+            path = self._folder / entry.path("/")
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(entry.data())
+            paths.append(str(path))
+        return paths
+
+    def extractFile(self, entry: FileTreeEntry, silent: bool = True) -> str:
+        return self.extractFiles([entry], silent)[0]
+
+    def createFile(self, entry: FileTreeEntry) -> str:
+        path = self._folder / "created" / entry.path("/")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.touch()
+        return str(path)
+
+
+class IPlugin:
+    def __init__(self):
+        pass
+
+
+class IPluginInstaller(IPlugin):
+
+    _installManager: Optional[IInstallationManager] = None
+
+    def setInstallationManager(self, manager: IInstallationManager):
+        self._installManager = manager
+
+    def _manager(self) -> IInstallationManager:
+        if self._installManager is None:
+            self._installManager = IInstallationManager()
+        return self._installManager
+
+    def _parentWidget(self):
+        return None
+
+
+class IPluginInstallerSimple(IPluginInstaller):
+    pass
+
+
+def install(force: bool = False):
+    """
+    Register this module as mobase, if mobase is not available (not part of mobase).
+
+    Args:
+        force: If True, replace mobase even if it is available.
+    """
+    if not force:
+        try:
+            import mobase  # noqa: F401
+
+            return
+        except ImportError:
+            pass
+
+    sys.modules["mobase"] = sys.modules[__name__]
@@ -0,0 +1,287 @@
+# -*- encoding: utf-8 -*-
+
+"""
+Benchmarks of the different steps of an installation.
+"""
+
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from wizard.contexts import WizardTerminationContext
+from wizard.runner import WizardRunnerKeywordVisitor, WizardRunnerState
+from wizard.tweaks import WizardINISetting
+
+from . import fake_mobase
+from .archive import (
+    ARCHIVE_BASE,
+    ARCHIVE_INI,
+    ArchiveParameters,
+    SyntheticArchive,
+    make_archive,
+)
+
+# The plugin modules import mobase, so the fake one must be registered first:
+fake_mobase.install()
+
+from src.assembly import (  # noqa: E402
+    assemble_tree,
+    plugins_selection,
+    subpackages_selection,
+)
+from src.runner import (  # noqa: E402
+    SubPackageClassifier,
+    find_wizard_bases,
+    make_interpreter,
+    make_plugins_index,
+    run_headless,
+)
+from src.utils import write_ini_tweaks  # noqa: E402
+
+# Name of the plugin, used for settings:
+PLUGIN_NAME = "BAIN Wizard Installer"
+
+# Default settings of the plugin:
+PLUGIN_SETTINGS: Dict[str, object] = {
+    "enabled": True,
+    "prefer_fomod": True,
+    "prefer_omod": False,
+    "priority": 120,
+    "max_steps": 0,
+    "max_time": 0,
+    "max_extract_size": 1024,
+    "max_wizard_depth": 3,
+    "profile": False,
+    "profile_script": False,
+}
+
+
+class Benchmark(NamedTuple):
+
+    # Name of the benchmark:
+    name: str
+
+    # Function called before each run (not measured), its result is given to run:
+    setup: Callable[[], Any]
+
+    # Function measured:
+    run: Callable[[Any], Any]
+
+
+def make_organizer(archive: SyntheticArchive) -> fake_mobase.IOrganizer:
+    """
+    Create an organizer for the given archive.
+
+    Args:
+        archive: The archive to create the organizer for.
+
+    Returns:
+        An organizer whose data folder contains the data files of the archive.
+    """
+    return fake_mobase.IOrganizer(
+        files=archive.data_files,
+        plugins=archive.plugins,
+        settings={PLUGIN_NAME: PLUGIN_SETTINGS},
+    )
+
+
+def make_benchmarks(params: ArchiveParameters) -> List[Benchmark]:
+    """
+    Create the benchmarks for the given archive parameters.
+
+    Args:
+        params: The parameters of the archive to use.
+
+    Returns:
+        The list of benchmarks.
+    """
+
+    archive = make_archive(params)
+    organizer = make_organizer(archive)
+    base: fake_mobase.IFileTree = archive.tree.find(ARCHIVE_BASE)  # type: ignore
+
+    benchmarks: List[Benchmark] = []
+
+    # Detection, with a new classifier for each run since sub-packages are classified
+    # once per archive:
+    checker = organizer.managedGame().feature(fake_mobase.ModDataChecker)
+    benchmarks.append(
+        Benchmark(
+            "detection",
+            lambda: SubPackageClassifier(checker),  # type: ignore
+            lambda classifier: find_wizard_bases(
+                archive.tree,  # type: ignore
+                PLUGIN_SETTINGS["max_wizard_depth"],  # type: ignore
+                classifier,
+            ),
+        )
+    )
+
+    def setup_extraction() -> Tuple[fake_mobase.IInstallationManager, List[Any]]:
+        entries: List[Any] = []
+
+        def fn(path: str, entry: fake_mobase.FileTreeEntry) -> int:
+            if entry.isFile() and entry.hasSuffix(
+                ["png", "jpg", "jpeg", "gif", "bmp", "ini"]
+            ):
+                entries.append(entry)
+            return fake_mobase.IFileTree.CONTINUE
+
+        archive.tree.walk(fn)
+        return fake_mobase.IInstallationManager(), [base.find("wizard.txt")] + entries
+
+    benchmarks.append(
+        Benchmark(
+            "extraction",
+            setup_extraction,
+            lambda args: args[0].extractFiles(args[1], silent=False),
+        )
+    )
+
+    # Extraction while the dialog is shown, from a solid archive where each call to
+    # the installation manager decompresses the archive again:
+    try:
+        from PyQt6.QtCore import QCoreApplication
+
+        from src.extraction import WizardExtractionQueue
+    except ImportError as ex:
+        print(f"Skipping extraction queue benchmark: {ex}.")
+    else:
+        application = QCoreApplication.instance() or QCoreApplication([])
+
+        def setup_queue() -> Tuple[Any, int]:
+            files: List[Any] = []
+
+            def fn(path: str, entry: fake_mobase.FileTreeEntry) -> int:
+                if entry.isFile():
+                    files.append(entry)
+                return fake_mobase.IFileTree.CONTINUE
+
+            archive.tree.walk(fn)
+            _, entries = setup_extraction()
+            manager = fake_mobase.IInstallationManager(solid=files)
+            queue = WizardExtractionQueue(
+                entries[1:],
+                lambda entries: manager.extractFiles(entries),  # type: ignore
+            )
+            return queue, len(entries) - 1
+
+        def run_queue(args: Tuple[Any, int]):
+            queue, remaining = args
+            extracted: List[int] = []
+            queue.filesExtracted.connect(lambda files: extracted.append(len(files)))
+            queue.start()
+            while sum(extracted) < remaining and not queue.failed():
+                application.processEvents()
+
+        benchmarks.append(Benchmark("extract_queue", setup_queue, run_queue))
+
+    benchmarks.append(
+        Benchmark(
+            "interpreter",
+            lambda: None,
+            lambda _: make_interpreter(base, organizer),  # type: ignore
+        )
+    )
+
+    interpreter = make_interpreter(base, organizer)  # type: ignore
+
+    benchmarks.append(
+        Benchmark(
+            "parse",
+            lambda: None,
+            lambda _: interpreter.make_top_level_context(
+                archive.script, WizardRunnerState()
+            ),
+        )
+    )
+
+    benchmarks.append(
+        Benchmark(
+            "execution",
+            lambda: interpreter.make_top_level_context(
+                archive.script, WizardRunnerState()
+            ),
+            run_headless,
+        )
+    )
+
+    # Assembly modifies the archive, so a new one is created for each run (without
+    # images since they are not used):
+    def setup_assembly() -> Tuple[Any, Any, WizardTerminationContext]:
+        archive = make_archive(params._replace(images=0))
+        base = archive.tree.find(ARCHIVE_BASE)
+        interpreter = make_interpreter(base, organizer)  # type: ignore
+        context = run_headless(
+            interpreter.make_top_level_context(archive.script, WizardRunnerState())
+        )
+        return archive.tree, base, context
+
+    def run_assembly(args: Tuple[Any, Any, WizardTerminationContext]):
+        otree, base, context = args
+        kvisitor: WizardRunnerKeywordVisitor = context.factory.kvisitor  # type: ignore
+        index = make_plugins_index(kvisitor.subpackages)
+        return assemble_tree(
+            otree,
+            base,
+            [
+                name
+                for name, selected in subpackages_selection(context.state, index)
+                if selected
+            ],
+            {plugin.name: new for plugin, new in context.state.renames.items()},
+            dict(plugins_selection(context.state, index)),
+        )
+
+    benchmarks.append(Benchmark("assembly", setup_assembly, run_assembly))
+
+    # INI Tweaks, with the original INI file from the archive:
+    state = run_headless(
+        interpreter.make_top_level_context(archive.script, WizardRunnerState())
+    ).state
+    folder = Path(tempfile.mkdtemp(prefix="benchmark-tweaks-"))
+    (folder / "INI Tweaks").mkdir()
+    original = fake_mobase.IInstallationManager(folder / "extracted").extractFiles(
+        [archive.tree.find(f"{ARCHIVE_BASE}/00 Core/{ARCHIVE_INI}")]  # type: ignore
+    )[0]
+
+    def setup_tweaks() -> List[Tuple[Path, List[WizardINISetting], Optional[Path]]]:
+        return [
+            (
+                folder / "INI Tweaks" / file,
+                state.tweaks.tweaks(file),
+                Path(original) if file.lower() == ARCHIVE_INI.lower() else None,
+            )
+            for file in state.tweaks.files()
+        ]
+
+    benchmarks.append(Benchmark("tweaks", setup_tweaks, write_ini_tweaks))
+
+    return benchmarks
+
+
+def measure(benchmark: Benchmark, repeat: int) -> Dict[str, float]:
+    """
+    Measure the given benchmark.
+
+    Args:
+        benchmark: The benchmark to measure.
+        repeat: Number of runs.
+
+    Returns:
+        The minimum, median and mean durations of the runs, in seconds.
+    """
+    durations: List[float] = []
+    for _ in range(repeat):
+        args = benchmark.setup()
+        start = time.perf_counter()
+        benchmark.run(args)
+        durations.append(time.perf_counter() - start)
+
+    return {
+        "min": min(durations),
+        "median": statistics.median(durations),
+        "mean": statistics.mean(durations),
+    }
@@ -0,0 +1,24 @@
+# -*- encoding: utf-8 -*-
+
+"""
+Command-line runner executing wizard scripts outside of MO2, using the in-memory
+stand-in for mobase from the benchmarks (see benchmarks.fake_mobase).
+
+Each archive is given as a folder containing the extracted archive. The script is
+executed without user interaction, using the recorded selections if any (otherwise
+the default options of each page), and the resulting file plan is written as JSON,
+one line per archive.
+
+Run from the root of the repository:
+
+    python -m headless path/to/extracted/archive --game game.json \
+        --selections selections.json
+
+Archives can be distributed across multiple processes using --jobs, and an
+interrupted run can be resumed using --resume, see batch.run_batch(). Instead of
+using selections, all the choices of the scripts can be explored using --explore, see
+explore.explore().
+
+See plan.make_organizer() and plan.load_selections() for the format of the game
+profile and of the selections, and plan.make_plan() for the format of the plan.
+"""
@@ -0,0 +1,122 @@
+# -*- encoding: utf-8 -*-
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Any, Dict, TextIO
+
+from .batch import BatchTask, load_completed, run_batch
+from .explore import ExplorationLimits
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m headless")
+    parser.add_argument(
+        "archives", nargs="+", type=Path, help="folders containing extracted archives"
+    )
+    parser.add_argument("--game", type=Path, help="description of the game profile")
+    parser.add_argument(
+        "--selections",
+        type=Path,
+        help="recorded selections, or folder containing one <archive>.json per archive",
+    )
+    parser.add_argument("--max-steps", type=int, default=0)
+    parser.add_argument("--max-time", type=float, default=0)
+    parser.add_argument(
+        "--output", type=Path, help="file to write the plans to (default: stdout)"
+    )
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=1,
+        help="number of processes to use (0: one per CPU, default: 1)",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="skip the archives already in the output file and append to it",
+    )
+    parser.add_argument(
+        "--summary",
+        action="store_true",
+        help="do not write the files and INI Tweaks of the plans",
+    )
+    limits = ExplorationLimits()
+    parser.add_argument(
+        "--explore",
+        action="store_true",
+        help="explore all the choices of the scripts instead of using the selections",
+    )
+    parser.add_argument(
+        "--max-pages",
+        type=int,
+        default=limits.max_pages,
+        help="maximum number of distinct pages to explore per archive (0: no limit)",
+    )
+    parser.add_argument(
+        "--max-options",
+        type=int,
+        default=limits.max_options,
+        help="maximum number of options of SelectMany pages to fully explore",
+    )
+    parser.add_argument(
+        "--explore-time",
+        type=float,
+        default=limits.max_time,
+        help="maximum exploration time per archive, in seconds (0: no limit)",
+    )
+    args = parser.parse_args(argv)
+
+    if args.resume and not args.output:
+        parser.error("--resume requires --output")
+
+    profile: Dict[str, Any] = {}
+    if args.game:
+        with open(args.game, "r", encoding="utf-8") as fp:
+            profile = json.load(fp)
+
+    completed = load_completed(args.output) if args.resume else set()
+
+    selections = str(args.selections) if args.selections else None
+    tasks = []
+    for archive in args.archives:
+        path = str(archive.resolve())
+        if path not in completed:
+            tasks.append(BatchTask(path, selections))
+
+    output: TextIO = sys.stdout
+    if args.output:
+        output = open(args.output, "a" if args.resume else "w", encoding="utf-8")
+
+    try:
+        results = run_batch(
+            tasks,
+            profile,
+            output,
+            jobs=args.jobs,
+            max_steps=args.max_steps,
+            max_time=args.max_time,
+            summary=args.summary,
+            explore=(
+                ExplorationLimits(args.max_pages, args.max_options, args.explore_time)
+                if args.explore
+                else None
+            ),
+        )
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    print(
+        ", ".join(f"{count} {result}" for result, count in sorted(results.items()))
+        or "Nothing to do.",
+        file=sys.stderr,
+    )
+
+    return 1 if results.get("error") or results.get("exception") else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
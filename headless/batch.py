@@ -0,0 +1,270 @@
+# -*- encoding: utf-8 -*-
+
+import json
+import os
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Set,
+    TextIO,
+    Tuple,
+)
+
+from .explore import ExplorationLimits, make_exploration
+from .plan import InstallTimer, load_selections, make_organizer, make_plan
+
+
+class BatchTask(NamedTuple):
+
+    # Path to the folder containing the extracted archive:
+    archive: str
+
+    # Path to the selections file or to a folder of selections files, if any:
+    selections: Optional[str]
+
+
+class _Worker(NamedTuple):
+
+    # Organizer and limits of the execution, created once per process:
+    organizer: Any
+    max_steps: int
+    max_time: float
+
+    # Limits of the exploration, if the scripts are explored instead of run:
+    explore: Optional[ExplorationLimits]
+
+
+_worker: Optional[_Worker] = None
+
+
+def init_worker(
+    profile: Mapping[str, Any],
+    max_steps: int,
+    max_time: float,
+    explore: Optional[ExplorationLimits] = None,
+):
+    """
+    Initialize the current process for run_task(), with its own organizer.
+
+    Args:
+        profile: The description of the game profile, see make_organizer().
+        max_steps: Maximum number of steps between two pages, see run_headless().
+        max_time: Maximum execution time between two pages, see run_headless().
+        explore: Limits of the exploration, to explore the scripts (see
+            make_exploration()) instead of running them with the selections.
+    """
+    global _worker
+    _worker = _Worker(make_organizer(profile), max_steps, max_time, explore)
+
+
+def find_selections(
+    selections: Optional[Path], archive: Path
+) -> Tuple[Optional[Dict[str, List[str]]], Optional[str]]:
+    """
+    Load the selections for the given archive.
+
+    Args:
+        selections: The selections file, or a folder containing one file named
+            <archive>.json per archive, if any.
+        archive: The folder containing the extracted archive.
+
+    Returns:
+        The options and the hash of the script, see load_selections(), or (None,
+        None) if there are no selections for the archive.
+    """
+    if selections is None:
+        return None, None
+    if selections.is_dir():
+        selections = selections / f"{archive.name}.json"
+        if not selections.exists():
+            return None, None
+    return load_selections(selections)
+
+
+def run_task(task: BatchTask) -> Dict[str, Any]:
+    """
+    Compute the plan of an archive in the current process, see init_worker().
+
+    Unexpected exceptions are reported in the record (with the "exception" result)
+    instead of being raised, so that a single archive does not stop a batch.
+
+    Args:
+        task: The archive to run.
+
+    Returns:
+        The record of the archive: the plan with the path of the archive, the
+        number of files and INI Tweaks, and the duration and timings of the run.
+    """
+    assert _worker is not None, "init_worker() must be called first."
+
+    archive = Path(task.archive)
+    timer = InstallTimer(True)
+    start = time.perf_counter()
+    try:
+        if _worker.explore is not None:
+            record = make_exploration(
+                archive,
+                _worker.organizer,
+                _worker.explore,
+                max_steps=_worker.max_steps,
+                max_time=_worker.max_time,
+                timer=timer,
+            )
+        else:
+            options, script_hash = find_selections(
+                Path(task.selections) if task.selections else None, archive
+            )
+            record = make_plan(
+                archive,
+                _worker.organizer,
+                options,
+                script_hash,
+                max_steps=_worker.max_steps,
+                max_time=_worker.max_time,
+                timer=timer,
+            )
+    except Exception as ex:
+        record = {
+            "archive": archive.name,
+            "result": "exception",
+            "error": f"{type(ex).__name__}: {ex}",
+        }
+
+    record["path"] = task.archive
+    if "outcomes" in record:
+        record["counts"] = {"outcomes": len(record["outcomes"])}
+    elif record["result"] == "success":
+        record["counts"] = {
+            "files": len(record["files"]),
+            "ini_tweaks": len(record["ini_tweaks"]),
+        }
+    record["duration"] = round(time.perf_counter() - start, 6)
+    record["timings"] = timer.report()
+    return record
+
+
+def load_completed(output: Path) -> Set[str]:
+    """
+    Find the archives already processed by an interrupted run.
+
+    Lines that cannot be parsed (e.g., the last line if the run was killed while
+    writing it) are removed from the file so that new records can be appended.
+
+    Args:
+        output: The file containing the records of the interrupted run.
+
+    Returns:
+        The paths of the archives that have a record in the file.
+    """
+    if not output.exists():
+        return set()
+
+    completed: Set[str] = set()
+    lines: List[str] = []
+    with open(output, "r", encoding="utf-8") as fp:
+        for line in fp:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(record, dict) and "path" in record:
+                completed.add(record["path"])
+                lines.append(line if line.endswith("\n") else line + "\n")
+
+    with open(output, "w", encoding="utf-8") as fp:
+        fp.writelines(lines)
+
+    return completed
+
+
+def summarize(record: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Remove the files and the content of the INI Tweaks, or the outcomes of an
+    exploration, from a record.
+
+    Args:
+        record: The record to summarize.
+
+    Returns:
+        The record without the files, INI Tweaks and outcomes (the counts are kept).
+    """
+    return {
+        key: value
+        for key, value in record.items()
+        if key not in ("files", "ini_tweaks", "outcomes")
+    }
+
+
+def run_batch(
+    tasks: Iterable[BatchTask],
+    profile: Mapping[str, Any],
+    output: TextIO,
+    jobs: int = 1,
+    max_steps: int = 0,
+    max_time: float = 0,
+    summary: bool = False,
+    explore: Optional[ExplorationLimits] = None,
+) -> Dict[str, int]:
+    """
+    Compute the plans of the given archives, distributing the archives across a
+    pool of processes, and write the records as JSON lines as soon as they are
+    available.
+
+    The interpreter is pure Python, so each worker process has its own interpreter
+    and mobase stand-in.
+
+    Args:
+        tasks: The archives to run.
+        profile: The description of the game profile, see make_organizer().
+        output: The file-like object to write the records to.
+        jobs: Number of processes to use, 1 to run in the current process or 0 to
+            use one process per CPU.
+        max_steps: Maximum number of steps between two pages, see run_headless().
+        max_time: Maximum execution time between two pages, see run_headless().
+        summary: If True, the files and INI Tweaks are not written, see summarize().
+        explore: Limits of the exploration, to explore the scripts instead of
+            running them with the selections, see make_exploration().
+
+    Returns:
+        The number of archives for each result.
+    """
+    results: Dict[str, int] = {}
+
+    def write(record: Dict[str, Any]):
+        results[record["result"]] = results.get(record["result"], 0) + 1
+        output.write(json.dumps(summarize(record) if summary else record) + "\n")
+        output.flush()
+
+    jobs = jobs or os.cpu_count() or 1
+    if jobs == 1:
+        init_worker(profile, max_steps, max_time, explore)
+        for task in tasks:
+            write(run_task(task))
+        return results
+
+    with ProcessPoolExecutor(
+        max_workers=jobs,
+        initializer=init_worker,
+        initargs=(profile, max_steps, max_time, explore),
+    ) as executor:
+        futures: List["Future[Dict[str, Any]]"] = [
+            executor.submit(run_task, task) for task in tasks
+        ]
+        try:
+            for future in as_completed(futures):
+                write(future.result())
+        except KeyboardInterrupt:
+            # Written records are kept, so the run can be resumed:
+            for future in futures:
+                future.cancel()
+            raise
+
+    return results
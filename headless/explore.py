@@ -0,0 +1,379 @@
+# -*- encoding: utf-8 -*-
+
+import itertools
+import json
+import time
+from pathlib import Path
+from typing import Any, Dict, Hashable, List, NamedTuple, Optional, Set, Tuple
+
+from wizard.contexts import (
+    WizardRequireVersionsContext,
+    WizardSelectContext,
+    WizardSelectManyContext,
+    WizardSelectOneContext,
+    WizardTerminationContext,
+)
+from wizard.errors import WizardError
+from wizard.manager import SelectOption
+from wizard.runner import WizardRunnerState
+from wizard.tweaks import WizardINISetting, WizardINISettingEdit
+from wizard.value import CaseFoldNamedObject, Value
+
+from benchmarks import fake_mobase
+
+# The plugin modules import mobase, so the fake one must be registered first:
+fake_mobase.install()
+
+from src.diagnostics import InstallDiagnostics  # noqa: E402
+from src.runner import WizardRunnerContext, exec_until, make_interpreter  # noqa: E402
+from src.timing import InstallTimer  # noqa: E402
+from src.utils import ini_tweaks_files, make_ini_tweaks  # noqa: E402
+
+from .plan import final_selection, load_archive, make_classifier  # noqa: E402
+
+# Attributes of the contexts that are not part of their position in the script:
+_CONTEXT_ATTRIBUTES = frozenset(("_factory", "_context", "_parent", "_state"))
+
+
+class ExplorationLimits(NamedTuple):
+
+    # Maximum number of distinct pages to expand, or 0 for no limit:
+    max_pages: int = 10000
+
+    # Maximum number of options of a SelectMany page for which all the combinations
+    # are explored, larger pages only explore a subset of the combinations:
+    max_options: int = 10
+
+    # Maximum duration of the exploration, in seconds, or 0 for no limit:
+    max_time: float = 0
+
+
+def _normalize(value: Any) -> Hashable:
+    """
+    Convert a value from the interpreter to a hashable value that compares equal
+    for equivalent values.
+    """
+    if isinstance(value, Value):
+        return (value.type.name, _normalize(value.value))
+    if isinstance(value, CaseFoldNamedObject):
+        return (type(value).__name__, value.name.casefold())
+    if isinstance(value, SelectOption):
+        return ("option", value.name)
+    if isinstance(value, WizardINISetting):
+        edit = isinstance(value, WizardINISettingEdit)
+        return (
+            value.filename.casefold(),
+            value.section,
+            value.setting,
+            _normalize(value.value) if edit else None,  # type: ignore
+            value.comment if edit else None,  # type: ignore
+        )
+    if isinstance(value, (list, tuple)):
+        return tuple(_normalize(item) for item in value)
+    if isinstance(value, dict):
+        return tuple(sorted((repr(k), _normalize(v)) for k, v in value.items()))
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    if hasattr(value, "getText"):
+        # Parse-tree nodes are compared by identity, which is what we want:
+        return value  # type: ignore
+    if not vars(value):
+        # Objects without attributes, e.g., Void:
+        return type(value).__name__
+    return (type(value).__name__, repr(value))
+
+
+def _position(context: WizardRunnerContext) -> Hashable:
+    """
+    Compute the position of a context in the script, i.e., the chain of contexts up
+    to the top-level context with their own state (e.g., index of the next child of
+    a body, current value of a loop, or selected options of a select statement).
+    """
+    key: List[Hashable] = []
+    current: Optional[Any] = context
+    while current is not None:
+        attributes = tuple(
+            sorted(
+                (name, _normalize(value))
+                for name, value in vars(current).items()
+                if name not in _CONTEXT_ATTRIBUTES
+            )
+        )
+        key.append((type(current), current.context, attributes))
+
+        # The top-level context is its own parent:
+        parent = current.parent
+        current = parent if parent is not current else None
+    return tuple(key)
+
+
+def _state_key(state: WizardRunnerState) -> Hashable:
+    """
+    Normalize a state, ignoring the parts that do not change the outcome (notes)
+    and the order of renames.
+    """
+    return (
+        tuple(
+            sorted((name, _normalize(value)) for name, value in state.variables.items())
+        ),
+        _normalize(state.subpackages),
+        _normalize(state.plugins),
+        tuple(sorted((p.name.casefold(), new) for p, new in state.renames.items())),
+        _normalize(state.tweaks.modified),
+        _normalize(state.tweaks.disabled),
+    )
+
+
+def _choices(
+    context: WizardSelectContext, max_options: int
+) -> Tuple[List[List[SelectOption]], bool]:
+    """
+    Enumerate the choices of a select page.
+
+    Args:
+        context: The select context.
+        max_options: Maximum number of options of a SelectMany page for which all
+            the combinations are enumerated.
+
+    Returns:
+        A 2-tuple containing the list of choices (one option per choice for
+        SelectOne), and a boolean indicating if the choices were truncated.
+    """
+    options = context.options
+    if isinstance(context, WizardSelectOneContext):
+        return [[option] for option in options], False
+
+    assert isinstance(context, WizardSelectManyContext)
+    if len(options) <= max_options:
+        return [
+            [option for option, selected in zip(options, mask) if selected]
+            for mask in itertools.product((False, True), repeat=len(options))
+        ], False
+
+    # Too many combinations: the defaults, nothing, everything, each option alone
+    # and the defaults with each option toggled:
+    defaults = {id(option) for option in context.defaults}
+    masks = [
+        [id(option) in defaults for option in options],
+        [False] * len(options),
+        [True] * len(options),
+    ]
+    for index in range(len(options)):
+        masks.append([i == index for i in range(len(options))])
+        masks.append([(i == index) != selected for i, selected in enumerate(masks[0])])
+
+    choices: List[List[SelectOption]] = []
+    seen = set()
+    for mask in masks:
+        if tuple(mask) not in seen:
+            seen.add(tuple(mask))
+            choices.append([o for o, selected in zip(options, mask) if selected])
+    return choices, True
+
+
+def _outcome(
+    context: WizardTerminationContext[WizardRunnerState],
+    diagnostics: Optional[InstallDiagnostics] = None,
+) -> Dict[str, Any]:
+    if context.is_cancel():
+        return {"result": "canceled", "message": context.message()}
+
+    subpackages, plugins, renames = final_selection(context)
+    tweaks = context.state.tweaks
+    return {
+        "result": "success",
+        "subpackages": subpackages,
+        "plugins": plugins,
+        "renames": renames,
+        "ini_tweaks": {
+            file: make_ini_tweaks(ftweaks)
+            for file, ftweaks in ini_tweaks_files(tweaks, diagnostics).items()
+        },
+    }
+
+
+def explore(
+    context: WizardRunnerContext,
+    limits: ExplorationLimits = ExplorationLimits(),
+    max_steps: int = 0,
+    max_time: float = 0,
+    diagnostics: Optional[InstallDiagnostics] = None,
+) -> Dict[str, Any]:
+    """
+    Explore all the choices of a script and find the distinct outcomes.
+
+    Pages reached at the same position in the script with an equivalent state (see
+    _position() and _state_key()) lead to the same outcomes, so they are only
+    expanded once, which collapses the branches that differ only by choices without
+    consequences (or whose consequences were undone).
+
+    Args:
+        context: The start context.
+        limits: The budget of the exploration.
+        max_steps: Maximum number of steps between two pages, see exec_until().
+        max_time: Maximum execution time between two pages, see exec_until().
+        diagnostics: The diagnostics to report the warnings of the rendering of INI
+            tweaks to, if any.
+
+    Returns:
+        A mapping containing the distinct outcomes (each with the selections of the
+        first path leading to it, usable as selections for make_plan()), the number
+        of expanded pages and of merged branches, and a boolean indicating if the
+        exploration was truncated.
+    """
+    targets = (WizardSelectContext, WizardRequireVersionsContext)
+    start = time.monotonic()
+
+    outcomes: Dict[str, Dict[str, Any]] = {}
+    expanded: Set[Hashable] = set()
+    merged = 0
+    truncated = False
+
+    # Contexts to explore, with the selections leading to them:
+    stack: List[Tuple[Optional[WizardRunnerContext], Dict[str, List[str]]]] = [
+        (context, {})
+    ]
+
+    while stack:
+        current, selections = stack.pop()
+
+        try:
+            current = exec_until(
+                current,  # type: ignore
+                targets,
+                exec_first=True,
+                max_steps=max_steps,
+                max_time=max_time,
+            )
+            outcome = None
+            if isinstance(current, WizardTerminationContext):
+                outcome = _outcome(current, diagnostics)
+        except WizardError as ex:
+            outcome = {
+                "result": "error",
+                "error": str(ex),
+                "line": ex.line if ex.context is not None else None,
+            }
+
+        if outcome is not None:
+            key = json.dumps(outcome, sort_keys=True)
+            if key not in outcomes:
+                outcomes[key] = dict(outcome, selections=selections)
+            continue
+
+        if isinstance(current, WizardRequireVersionsContext):
+            stack.append((current, selections))
+            continue
+
+        assert isinstance(current, WizardSelectContext)
+
+        page = (_position(current), _state_key(current.state))
+        if page in expanded:
+            merged += 1
+            continue
+
+        if (limits.max_pages and len(expanded) >= limits.max_pages) or (
+            limits.max_time and time.monotonic() - start > limits.max_time
+        ):
+            truncated = True
+            break
+        expanded.add(page)
+
+        choices, partial = _choices(current, limits.max_options)
+        truncated = truncated or partial
+        for choice in reversed(choices):
+            if isinstance(current, WizardSelectOneContext):
+                selected: WizardRunnerContext = current.select(choice[0])
+            else:
+                selected = current.select(choice)  # type: ignore
+            stack.append(
+                (
+                    selected,
+                    {
+                        **selections,
+                        current.description: [option.name for option in choice],
+                    },
+                )
+            )
+
+    return {
+        "outcomes": list(outcomes.values()),
+        "pages": len(expanded),
+        "merged": merged,
+        "truncated": truncated,
+    }
+
+
+def make_exploration(
+    folder: Path,
+    organizer: fake_mobase.IOrganizer,
+    limits: ExplorationLimits = ExplorationLimits(),
+    max_steps: int = 0,
+    max_time: float = 0,
+    timer: Optional[InstallTimer] = None,
+) -> Dict[str, Any]:
+    """
+    Explore the wizard of an extracted archive, see explore().
+
+    The result is "success" if all the outcomes are, "error" if some outcomes are
+    errors, and "unsupported" if the archive does not contain a wizard. Explored
+    scripts also have the warnings reported along all the branches (deduplicated,
+    see InstallDiagnostics.summary()).
+
+    Args:
+        folder: The folder containing the extracted archive.
+        organizer: The organizer to run the script with.
+        limits: The budget of the exploration.
+        max_steps: Maximum number of steps between two pages, see exec_until().
+        max_time: Maximum execution time between two pages, see exec_until().
+        timer: Timer to record the steps of the exploration in, if any.
+
+    Returns:
+        The exploration of the archive.
+    """
+    timer = timer or InstallTimer()
+    record: Dict[str, Any] = {"archive": folder.name}
+
+    classifier = make_classifier(organizer, timer)
+    with timer.span("tree"):
+        _, base, _ = load_archive(folder, classifier)
+
+    if base is None:
+        record["result"] = "unsupported"
+        return record
+
+    script = folder / base.find("wizard.txt").path("/")  # type: ignore
+    diagnostics = InstallDiagnostics()
+    try:
+        with timer.span("interpreter"):
+            interpreter = make_interpreter(
+                base,  # type: ignore
+                organizer,  # type: ignore
+                timer,
+                classifier=classifier,
+                diagnostics=diagnostics,
+            )
+        with timer.span("parse"):
+            start = interpreter.make_top_level_context(script, WizardRunnerState())
+    except WizardError as ex:
+        record["result"] = "error"
+        record["error"] = str(ex)
+        record["line"] = ex.line if ex.context is not None else None
+        record["warnings"] = diagnostics.summary()
+        return record
+
+    with timer.span("explore"):
+        record.update(
+            explore(
+                start,
+                limits,
+                max_steps=max_steps,
+                max_time=max_time,
+                diagnostics=diagnostics,
+            )
+        )
+
+    errors = [o for o in record["outcomes"] if o["result"] == "error"]
+    record["result"] = "error" if errors else "success"
+    record["warnings"] = diagnostics.summary()
+    return record
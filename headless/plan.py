@@ -0,0 +1,322 @@
+# -*- encoding: utf-8 -*-
+
+import json
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+from wizard.contexts import WizardTerminationContext
+from wizard.errors import WizardError
+from wizard.runner import WizardRunnerKeywordVisitor, WizardRunnerState
+
+from benchmarks import fake_mobase
+
+# The plugin modules import mobase, so the fake one must be registered first:
+fake_mobase.install()
+
+from src.assembly import (  # noqa: E402
+    add_ini_tweaks_file,
+    assemble_tree,
+    plugins_selection,
+    subpackages_selection,
+)
+from src.diagnostics import InstallDiagnostics  # noqa: E402
+from src.options import (  # noqa: E402
+    OPTIONS_SETTING,
+    OptionsIndex,
+    hash_script,
+    load_options,
+)
+from src.runner import (  # noqa: E402
+    SubPackageClassifier,
+    find_wizard_base,
+    make_interpreter,
+    make_plugins_index,
+    run_headless,
+)
+from src.timing import InstallTimer  # noqa: E402
+from src.utils import ini_tweaks_files, render_ini_tweaks  # noqa: E402
+
+# State of the plugins in the game profile:
+PLUGIN_STATES = {
+    "active": fake_mobase.PluginState.ACTIVE,
+    "inactive": fake_mobase.PluginState.INACTIVE,
+}
+
+
+def make_organizer(profile: Mapping[str, Any]) -> fake_mobase.IOrganizer:
+    """
+    Create an organizer from the description of a game profile.
+
+    The profile is a mapping with the following (optional) keys:
+
+        - game: Name of the game (default: "Oblivion").
+        - data: Name of the data folder (default: "Data").
+        - version: Version of the game.
+        - script_extender: Version of the script extender, or None if there is no
+          script extender.
+        - data_files: Paths of the files in the data folder.
+        - plugins: Mapping from plugin names to their state, "active" or "inactive",
+          in load order.
+
+    Args:
+        profile: The description of the game profile.
+
+    Returns:
+        An organizer for the given profile.
+    """
+    features: Dict[type, object] = {
+        fake_mobase.ModDataChecker: fake_mobase.ModDataChecker()
+    }
+    extender = profile.get(
+        "script_extender", fake_mobase.ScriptExtender().getExtenderVersion()
+    )
+    if extender is not None:
+        features[fake_mobase.ScriptExtender] = fake_mobase.ScriptExtender(str(extender))
+
+    game = fake_mobase.IPluginGame(
+        data=Path(profile.get("data", "Data")),
+        version=str(profile.get("version", "1.2.416")),
+        features=features,
+        name=str(profile.get("game", "Oblivion")),
+    )
+
+    return fake_mobase.IOrganizer(
+        files=[str(file) for file in profile.get("data_files", [])],
+        plugins={
+            str(name): PLUGIN_STATES[str(state).lower()]
+            for name, state in profile.get("plugins", {}).items()
+        },
+        game=game,
+    )
+
+
+def make_classifier(
+    organizer: fake_mobase.IOrganizer, timer: Optional[InstallTimer] = None
+) -> SubPackageClassifier:
+    """
+    Create a sub-package classifier for an archive, shared by the detection of the
+    wizard and the interpreter, as done by the installer.
+
+    Args:
+        organizer: The organizer to use the mod data checker of.
+        timer: Timer to count the checker calls in, if any.
+
+    Returns:
+        A new classifier.
+    """
+    checker = organizer.managedGame().feature(fake_mobase.ModDataChecker)
+    return SubPackageClassifier(checker, timer)  # type: ignore
+
+
+def load_selections(path: Path) -> Tuple[Dict[str, List[str]], Optional[str]]:
+    """
+    Load recorded selections.
+
+    The file contains either the options as saved by the installer (see
+    dump_options()), or a mapping from page descriptions to the list of selected
+    option names.
+
+    Args:
+        path: Path to the file containing the selections.
+
+    Returns:
+        A 2-tuple containing the options (mapping page descriptions to the list of
+        selected option names) and the hash of the script the options were selected
+        for (if known).
+    """
+    with open(path, "r", encoding="utf-8") as fp:
+        text = fp.read()
+
+    data = json.loads(text)
+    if isinstance(data, dict) and "version" in data:
+        options, script_hash, _ = load_options({OPTIONS_SETTING: text})
+        return options, script_hash
+
+    return {
+        str(desc): [str(option) for option in names] for desc, names in data.items()
+    }, None
+
+
+def load_archive(
+    folder: Path, classifier: Optional[SubPackageClassifier] = None
+) -> Tuple[
+    fake_mobase.IFileTree,
+    Optional[fake_mobase.IFileTree],
+    Dict[fake_mobase.FileTreeEntry, str],
+]:
+    """
+    Create the tree of an extracted archive and find its wizard.
+
+    Args:
+        folder: The folder containing the extracted archive.
+        classifier: Classifier used to rank the folders containing a wizard, if any.
+
+    Returns:
+        A 3-tuple containing the tree of the archive, the folder containing the
+        wizard (or None), and the original path of each file in the archive, since
+        entries are moved during assembly.
+    """
+    otree = fake_mobase.tree_from_folder(folder)
+    base = find_wizard_base(otree, classifier=classifier)  # type: ignore
+
+    sources: Dict[fake_mobase.FileTreeEntry, str] = {}
+
+    def fn(path: str, entry: fake_mobase.FileTreeEntry) -> int:
+        if entry.isFile():
+            sources[entry] = entry.path("/")
+        return fake_mobase.IFileTree.CONTINUE
+
+    if base is not None:
+        otree.walk(fn)
+
+    return otree, base, sources  # type: ignore
+
+
+def final_selection(
+    context: WizardTerminationContext[WizardRunnerState],
+) -> Tuple[List[str], Dict[str, bool], Dict[str, str]]:
+    """
+    Compute the selection at the end of a script, as shown by the complete page of
+    the dialog.
+
+    Args:
+        context: The termination context of the script.
+
+    Returns:
+        A 3-tuple containing the names of the selected sub-packages, a mapping from
+        plugin names to a boolean indicating if the plugin is enabled, and a mapping
+        from original plugin names to new names.
+    """
+    state = context.state
+    kvisitor: WizardRunnerKeywordVisitor = context.factory.kvisitor  # type: ignore
+    plugins_index = make_plugins_index(kvisitor.subpackages)
+
+    subpackages = [
+        name
+        for name, selected in subpackages_selection(state, plugins_index)
+        if selected
+    ]
+    plugins = dict(plugins_selection(state, plugins_index))
+    renames = {plugin.name: new for plugin, new in state.renames.items()}
+    return subpackages, plugins, renames
+
+
+def make_plan(
+    folder: Path,
+    organizer: fake_mobase.IOrganizer,
+    options: Optional[Mapping[str, List[str]]] = None,
+    script_hash: Optional[str] = None,
+    max_steps: int = 0,
+    max_time: float = 0,
+    timer: Optional[InstallTimer] = None,
+) -> Dict[str, Any]:
+    """
+    Execute the wizard of an extracted archive and compute the resulting file plan.
+
+    The plan is a mapping containing the name of the archive and the result of the
+    execution ("success", "canceled", "error" or "unsupported" if the archive does
+    not contain a wizard). Executed scripts also have the warnings reported during
+    the installation (deduplicated, see InstallDiagnostics.summary()). On success,
+    the plan also contains:
+
+        - subpackages: The names of the installed sub-packages.
+        - plugins: Mapping from plugin names to a boolean indicating if the plugin is
+          enabled (disabled plugins are installed in optional).
+        - renames: Mapping from original plugin names to new names.
+        - notes: The notes of the script.
+        - files: Mapping from the paths of the installed files to their path in the
+          archive, or None for created files.
+        - ini_tweaks: Mapping from the paths of the INI tweaks files to their content.
+
+    Args:
+        folder: The folder containing the extracted archive.
+        organizer: The organizer to run the script with.
+        options: The recorded selections, if any.
+        script_hash: The hash of the script the selections were recorded for.
+        max_steps: Maximum number of steps between two pages, see run_headless().
+        max_time: Maximum execution time between two pages, see run_headless().
+        timer: Timer to record the steps of the execution in, if any.
+
+    Returns:
+        The plan of the archive.
+    """
+    timer = timer or InstallTimer()
+    plan: Dict[str, Any] = {"archive": folder.name}
+
+    classifier = make_classifier(organizer, timer)
+    with timer.span("tree"):
+        otree, base, sources = load_archive(folder, classifier)
+
+    if base is None:
+        plan["result"] = "unsupported"
+        return plan
+
+    script = folder / base.find("wizard.txt").path("/")  # type: ignore
+    index = None
+    if options is not None:
+        index = OptionsIndex(options, fuzzy=script_hash != hash_script(script))
+
+    diagnostics = InstallDiagnostics()
+    try:
+        with timer.span("interpreter"):
+            interpreter = make_interpreter(
+                base,  # type: ignore
+                organizer,  # type: ignore
+                timer,
+                classifier=classifier,
+                diagnostics=diagnostics,
+            )
+        with timer.span("parse"):
+            start = interpreter.make_top_level_context(script, WizardRunnerState())
+        with timer.span("exec"):
+            context = run_headless(start, index, max_steps=max_steps, max_time=max_time)
+    except WizardError as ex:
+        plan["result"] = "error"
+        plan["error"] = str(ex)
+        plan["line"] = ex.line if ex.context is not None else None
+        plan["warnings"] = diagnostics.summary()
+        return plan
+
+    if context.is_cancel():
+        plan["result"] = "canceled"
+        plan["message"] = context.message()
+        plan["warnings"] = diagnostics.summary()
+        return plan
+
+    state = context.state
+    subpackages, plugins, renames = final_selection(context)
+
+    with timer.span("assembly"):
+        tree = assemble_tree(
+            otree, base, subpackages, renames, plugins, diagnostics  # type: ignore
+        )
+
+    tweaks: Dict[str, str] = {}
+    with timer.span("tweaks"):
+        for filename, ftweaks in ini_tweaks_files(state.tweaks, diagnostics).items():
+            entry, o_entry = add_ini_tweaks_file(tree, filename)
+            original = None
+            if o_entry in sources:
+                original = folder / sources[o_entry]  # type: ignore
+            tweaks[entry.path("/")] = render_ini_tweaks(ftweaks, original, diagnostics)
+
+    files: Dict[str, Optional[str]] = {}
+
+    def fn_files(path: str, entry: fake_mobase.FileTreeEntry) -> int:
+        if entry.isFile():
+            files[entry.path("/")] = sources.get(entry)
+        return fake_mobase.IFileTree.CONTINUE
+
+    tree.walk(fn_files)  # type: ignore
+
+    plan.update(
+        result="success",
+        subpackages=subpackages,
+        plugins=plugins,
+        renames=renames,
+        notes=list(state.notes),
+        files=files,
+        ini_tweaks=tweaks,
+        warnings=diagnostics.summary(),
+    )
+    return plan
@@ -7,11 +7,17 @@ or createPlugins() function.
 
 import os
 import site
+from typing import TYPE_CHECKING
 
 site.addsitedir(os.path.join(os.path.dirname(__file__), "lib"))
 
-from .installer import WizardInstaller  # noqa: E402
+if TYPE_CHECKING:
+    from .installer import WizardInstaller
 
 
-def createPlugin() -> WizardInstaller:
+def createPlugin() -> "WizardInstaller":
+    # The installer (and thus PyQt6) is only imported when the plugin is created, so
+    # that Qt-free modules (e.g., runner or utils) can be used outside MO2:
+    from .installer import WizardInstaller
+
     return WizardInstaller()
@@ -0,0 +1,340 @@
+# -*- encoding: utf-8 -*-
+
+import codecs
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Union
+
+from antlr4 import ParserRuleContext
+from wizard.antlr4.wizardParser import wizardParser
+from wizard.expr import WizardExpressionVisitor
+
+# Keywords selecting sub-packages or plugins given as their first argument:
+SUBPACKAGE_KEYWORDS = {"SelectSubPackage"}
+PLUGIN_KEYWORDS = {"SelectPlugin", "RenamePlugin"}
+
+# Functions creating INI tweaks for the file given as their first argument:
+INI_FUNCTIONS = {"EditINI", "DisableINILine"}
+
+
+class ReachableSet:
+    """
+    Set of sub-packages, plugins, INI files and images that can potentially be
+    used by a part of a script.
+    """
+
+    # Names of the sub-packages and plugins that can be selected:
+    subpackages: Set[str]
+    plugins: Set[str]
+
+    # Names of the INI files that can be tweaked:
+    ini_files: Set[str]
+
+    # Paths of the option images:
+    images: List[str]
+
+    # True if SelectAll can be executed:
+    all_subpackages: bool
+
+    # True if some sub-packages or plugins, INI files, or images cannot be determined
+    # statically (e.g., computed names or Exec):
+    dynamic: bool
+    dynamic_ini_files: bool
+    dynamic_images: bool
+
+    def __init__(self):
+        self.subpackages = set()
+        self.plugins = set()
+        self.ini_files = set()
+        self.images = []
+        self.all_subpackages = False
+        self.dynamic = False
+        self.dynamic_ini_files = False
+        self.dynamic_images = False
+
+
+def _string(ctx: wizardParser.ExprContext) -> Optional[str]:
+    """
+    Retrieve the value of a string literal.
+
+    Args:
+        ctx: The expression to retrieve the value of.
+
+    Returns:
+        The value of the string if the expression is a string literal, None otherwise.
+    """
+    if not isinstance(ctx, wizardParser.ValueContext) or not ctx.string():
+        return None
+
+    # Same as WizardExpressionVisitor.visitString():
+    txt = ctx.string().getText()[1:-1]
+    txt = WizardExpressionVisitor.BAD_ESCAPE_SEQUENCE.sub("", txt)
+    return codecs.decode(txt, "unicode_escape")  # type: ignore
+
+
+class ScriptAnalysis:
+    """
+    Static analysis of a wizard script, computing the sub-packages, plugins, INI
+    files and images that can potentially be used by the script, overall and for
+    each option of each select page.
+
+    The analysis is conservative: every branch of conditions and loops is considered
+    reachable, and cases of select statements include the following cases until a
+    Break (fall-through). The set of an option only contains what is reachable from
+    its case, not the statements following the select statement.
+
+    The installer uses the analysis to only extract the files the script can use,
+    to extract first the files reachable from the current page (see pageFiles()),
+    and to restrict the plugins listed on the Complete page (see
+    candidateSubPackages()).
+    """
+
+    # Everything used by the script:
+    script: ReachableSet
+
+    # Reachable set for each option (case) of each page, by page description:
+    pages: Dict[str, Dict[str, ReachableSet]]
+
+    def __init__(self, context: wizardParser.ParseWizardContext):
+        """
+        Args:
+            context: The parsed script, e.g., the context of the top-level context
+                returned by WizardInterpreter.make_top_level_context().
+        """
+        self.script = ReachableSet()
+        self.pages = {}
+        self._visit(context, [self.script])
+
+    def _visit(self, ctx: ParserRuleContext, targets: List[ReachableSet]):
+        """
+        Visit the given node of the parse tree.
+
+        Args:
+            ctx: The node to visit.
+            targets: The sets to add the reachable elements to.
+        """
+        if isinstance(ctx, wizardParser.SelectStmtContext):
+            self._visitSelect(ctx.selectOne() or ctx.selectMany(), targets)
+            return
+
+        if isinstance(ctx, wizardParser.KeywordStmtContext):
+            self._visitKeyword(ctx, targets)
+        elif isinstance(ctx, wizardParser.FunctionCallContext):
+            self._visitFunctionCall(ctx, targets)
+
+        for child in ctx.getChildren():
+            if isinstance(child, ParserRuleContext):
+                self._visit(child, targets)
+
+    def _visitKeyword(
+        self, ctx: wizardParser.KeywordStmtContext, targets: List[ReachableSet]
+    ):
+        keyword = ctx.Keyword().getText()
+        args = ctx.argList().expr() if ctx.argList() else []
+
+        if keyword == "SelectAll":
+            for target in targets:
+                target.all_subpackages = True
+            return
+
+        if keyword not in SUBPACKAGE_KEYWORDS and keyword not in PLUGIN_KEYWORDS:
+            return
+
+        name = _string(args[0]) if args else None
+        for target in targets:
+            if name is None:
+                target.dynamic = True
+            elif keyword in SUBPACKAGE_KEYWORDS:
+                target.subpackages.add(name)
+            else:
+                target.plugins.add(name)
+
+    def _visitFunctionCall(
+        self, ctx: wizardParser.FunctionCallContext, targets: List[ReachableSet]
+    ):
+        function = ctx.Identifier().getText()
+
+        if function == "Exec":
+            for target in targets:
+                target.dynamic = True
+                target.dynamic_ini_files = True
+                target.dynamic_images = True
+            return
+
+        if function not in INI_FUNCTIONS:
+            return
+
+        args = ctx.argList().expr() if ctx.argList() else []
+        name = _string(args[0]) if args else None
+        for target in targets:
+            if name is None:
+                target.dynamic_ini_files = True
+            else:
+                target.ini_files.add(name)
+
+    def _visitSelect(
+        self,
+        ctx: Union[wizardParser.SelectOneContext, wizardParser.SelectManyContext],
+        targets: List[ReachableSet],
+    ):
+        description = _string(ctx.expr())
+        if description is None:
+            description = ctx.expr().getText()
+
+        # Images of the options:
+        for option in ctx.optionTuple():
+            image = _string(option.expr(2))
+            for target in targets:
+                if image is None:
+                    target.dynamic_images = True
+                elif image and image not in target.images:
+                    target.images.append(image)
+
+        page = self.pages.setdefault(description, {})
+
+        # Cases without Break fall through the following ones:
+        cases = ctx.selectCaseList()
+        opened: List[ReachableSet] = []
+        for case in cases.caseStmt():
+            name = _string(case.expr())
+            if name is None:
+                name = case.expr().getText()
+            opened.append(page.setdefault(name, ReachableSet()))
+            self._visit(case.body(), targets + opened)
+            if self._breaks(case.body()):
+                opened = []
+
+        if cases.defaultStmt():
+            self._visit(cases.defaultStmt().body(), targets + opened)
+
+    def _breaks(self, body: wizardParser.BodyContext) -> bool:
+        """
+        Check if the given body always ends with a Break statement.
+
+        Args:
+            body: The body of a case.
+
+        Returns:
+            True if the body contains a Break statement outside of any nested
+            statement.
+        """
+        for stmt in body.stmt():
+            flow = stmt.controlFlowStmt()
+            if flow is not None and isinstance(flow, wizardParser.BreakContext):
+                return True
+        return False
+
+    def _matchImages(
+        self, images: Iterable[str], available: Dict[str, Path]
+    ) -> List[Path]:
+        """
+        Find the paths in the archive of the given images of the script.
+
+        Args:
+            images: The images, as written in the script.
+            available: Mapping from normalized paths (see neededImages()) to paths in
+                the archive. Matched paths are removed from the mapping.
+
+        Returns:
+            The paths of the matched images, in the order of the given images.
+        """
+        # The images of the script are relative to the folder containing the wizard,
+        # so we compare the end of the paths:
+        result: List[Path] = []
+        for image in images:
+            key = Path(image.replace("\\", "/")).as_posix().casefold()
+            for path in list(available):
+                if path == key or path.endswith("/" + key):
+                    result.append(available.pop(path))
+        return result
+
+    def _matchIni(self, ini: Path, target: ReachableSet) -> bool:
+        if target.dynamic_ini_files:
+            return True
+        name = ini.name.casefold()
+        return any(
+            Path(file.replace("\\", "/")).name.casefold() == name
+            for file in target.ini_files
+        )
+
+    def neededImages(self, images: Iterable[Path]) -> Optional[List[Path]]:
+        """
+        Order the given images by their first use in the script and remove the
+        unused ones.
+
+        Args:
+            images: The paths of the images in the archive.
+
+        Returns:
+            The images used by the script, in order of first use, or None if the
+            images cannot be determined statically.
+        """
+        if self.script.dynamic_images:
+            return None
+
+        available = {Path(image).as_posix().casefold(): image for image in images}
+        return self._matchImages(self.script.images, available)
+
+    def isIniNeeded(self, ini: Path) -> bool:
+        """
+        Check if the given INI file from the archive can be needed to create INI
+        tweaks.
+
+        Args:
+            ini: The path of the INI file in the archive.
+
+        Returns:
+            True if the script can create tweaks for an INI file with the same name.
+        """
+        return self._matchIni(ini, self.script)
+
+    def pageFiles(
+        self, description: str, selected: Sequence[str], files: Iterable[Path]
+    ) -> List[Path]:
+        """
+        Find the images and INI files that can be used after the given select page.
+
+        Args:
+            description: The description of the page.
+            selected: The names of the options currently selected on the page.
+            files: The paths of the images and INI files in the archive.
+
+        Returns:
+            The given files reachable from the options of the page, starting with the
+            ones reachable from the selected options, in order of first use (images
+            first). The list is empty if the page is unknown.
+        """
+        page = self.pages.get(description)
+        if page is None:
+            return []
+
+        chosen = set(selected)
+        options = [target for name, target in page.items() if name in chosen] + [
+            target for name, target in page.items() if name not in chosen
+        ]
+
+        images: Dict[str, Path] = {}
+        inis: List[Path] = []
+        for path in files:
+            if path.suffix.lower() == ".ini":
+                inis.append(path)
+            else:
+                images[path.as_posix().casefold()] = path
+
+        result: List[Path] = []
+        for target in options:
+            result.extend(self._matchImages(target.images, images))
+            for ini in list(inis):
+                if self._matchIni(ini, target):
+                    inis.remove(ini)
+                    result.append(ini)
+        return result
+
+    def candidateSubPackages(self) -> Optional[Set[str]]:
+        """
+        Returns:
+            The names (case-folded) of the sub-packages the script can select, or None
+            if any sub-package can be selected (SelectAll or dynamic names).
+        """
+        if self.script.all_subpackages or self.script.dynamic:
+            return None
+        return {name.casefold() for name in self.script.subpackages}
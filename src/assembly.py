@@ -0,0 +1,149 @@
+# -*- encoding: utf-8 -*-
+
+import os
+from pathlib import Path
+from typing import Iterable, List, Mapping, Optional, Set, Tuple
+
+from wizard.runner import WizardRunnerState
+from wizard.value import Plugin
+
+import mobase
+
+from .diagnostics import InstallDiagnostics, report_warning
+
+
+def subpackages_selection(
+    state: WizardRunnerState, pluginsIndex: Mapping[str, List[Plugin]]
+) -> List[Tuple[str, bool]]:
+    """
+    Compute the selection of sub-packages at the end of a script.
+
+    Args:
+        state: The final state of the script.
+        pluginsIndex: Mapping from sub-package names to the plugins they contain,
+            see make_plugins_index().
+
+    Returns:
+        The name of each sub-package of the archive, in order, with a boolean
+        indicating if it was selected by the script.
+    """
+    # The state can contain duplicates:
+    selected = {sp.name.casefold() for sp in state.subpackages}
+    return [(name, name.casefold() in selected) for name in pluginsIndex]
+
+
+def plugins_selection(
+    state: WizardRunnerState, pluginsIndex: Mapping[str, List[Plugin]]
+) -> List[Tuple[str, bool]]:
+    """
+    Compute the selection of plugins at the end of a script.
+
+    Args:
+        state: The final state of the script.
+        pluginsIndex: Mapping from sub-package names to the plugins they contain,
+            see make_plugins_index().
+
+    Returns:
+        The name of each plugin of the archive, sorted and with renamed plugins
+        switched, with a boolean indicating if it was selected by the script.
+    """
+    renames = state.renames
+    plugins: Set[Plugin] = set()
+    for sp_plugins in pluginsIndex.values():
+        for plugin in sp_plugins:
+            if plugin in renames:
+                plugin = Plugin(renames[plugin])
+            plugins.add(plugin)
+
+    active = set(state.plugins)
+    return [(plugin.name, plugin in active) for plugin in sorted(plugins)]
+
+
+def add_ini_tweaks_file(
+    tree: mobase.IFileTree, filename: str
+) -> Tuple[mobase.FileTreeEntry, Optional[mobase.FileTreeEntry]]:
+    """
+    Add the file containing the INI tweaks for the given file to the tree.
+
+    If the tree already contains the file, it is replaced, otherwise the file is
+    created in the INI Tweaks folder.
+
+    Args:
+        tree: The assembled tree.
+        filename: The file the tweaks are for, as written in the script.
+
+    Returns:
+        A 2-tuple containing the created entry and the original entry of the file
+        (now detached from the tree), if any.
+    """
+    o_entry = tree.find(filename)
+
+    if o_entry or Path(filename).parts[0].lower() == "ini tweaks":
+        entry = tree.addFile(filename, replace_if_exists=True)
+    else:
+        entry = tree.addFile(
+            os.path.join("INI Tweaks", filename), replace_if_exists=True
+        )
+
+    return entry, o_entry
+
+
+def assemble_tree(
+    otree: mobase.IFileTree,
+    base: mobase.IFileTree,
+    subpackages: Iterable[str],
+    renames: Mapping[str, str],
+    plugins: Mapping[str, bool],
+    diagnostics: Optional[InstallDiagnostics] = None,
+) -> mobase.IFileTree:
+    """
+    Create the tree to install from the selected sub-packages.
+
+    Args:
+        otree: The original archive tree, used to create the new tree.
+        base: The folder of the archive containing the sub-packages.
+        subpackages: The names of the sub-packages to install.
+        renames: Mapping from original plugin names to new names.
+        plugins: Mapping from plugin names to a boolean indicating if the plugin
+            is selected. Plugins that are not selected are moved to optional.
+        diagnostics: The diagnostics to report warnings to, if any.
+
+    Returns:
+        The tree to install.
+    """
+
+    # Create the tree with all the sub-packages:
+    tree = otree.createOrphanTree()
+
+    for subpackage in subpackages:
+        entry = base.find(subpackage)
+
+        # Should never happens since we fetch the subpackage for the archive:
+        if not entry or not isinstance(entry, mobase.IFileTree):
+            report_warning(
+                f"SubPackage {subpackage} not found in the archive.", diagnostics
+            )
+            continue
+
+        tree.merge(entry)
+
+    # Handle renames:
+    for original, new in renames.items():
+        # Entry should be at the root:
+        entry = tree.find(original)
+
+        if not entry:
+            report_warning(f"Plugin {original} not found, cannot rename.", diagnostics)
+            continue
+
+        tree.move(entry, new)
+
+    # Move not selected plugins to optional:
+    for plugin, enabled in plugins.items():
+        if not enabled:
+            entry = tree.find(plugin)
+            if not entry:
+                continue  # silently fail since the plugin should be disabled
+            tree.addDirectory("optional").insert(entry)
+
+    return tree
@@ -0,0 +1,210 @@
+# -*- encoding: utf-8 -*-
+
+import json
+import os
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional
+
+# Version of the format of the archive cache:
+ARCHIVE_CACHE_VERSION = 1
+
+
+class ArchiveAnalysis(NamedTuple):
+
+    # Path of the folder containing wizard.txt in the archive ("" for the root):
+    base: str
+
+    # Files of each sub-package (paths in the archive), in the order of the
+    # sub-packages in the archive:
+    subpackages: Dict[str, List[str]]
+
+    # Plugins of each sub-package:
+    plugins: Dict[str, List[str]]
+
+
+def archive_key(archive: str, game: str) -> Optional[str]:
+    """
+    Compute the cache key of the given archive.
+
+    Args:
+        archive: Path to the archive.
+        game: Name of the managed game, since the classification of sub-packages
+            depends on the game.
+
+    Returns:
+        A key identifying the archive by its path, size and modification time, or
+        None if the archive cannot be accessed.
+    """
+    try:
+        stat = os.stat(archive)
+    except OSError:
+        return None
+    path = os.path.normcase(os.path.abspath(archive))
+    return f"{game}|{path}|{stat.st_size}|{stat.st_mtime_ns}"
+
+
+class ArchiveAnalysisCache:
+    """
+    On-disk cache of the analysis of archives (wizard base, sub-packages, files and
+    plugins), so that reinstalling a known archive does not require walking the whole
+    tree again.
+
+    The cache is loaded lazily and entries are evicted in least-recently-used order
+    when the cache holds too many entries or its serialized size is too large.
+    """
+
+    # Default maximum number of entries and serialized size of the cache:
+    MAX_ENTRIES = 100
+    MAX_BYTES = 16 * 1024 * 1024
+
+    # Path to the cache file:
+    _path: Path
+
+    _max_entries: int
+    _max_bytes: int
+
+    # Entries (serialized analysis) and their serialized size, from the least to the
+    # most recently used:
+    _entries: "Optional[OrderedDict[str, Dict[str, Any]]]"
+    _sizes: Dict[str, int]
+
+    # True if the entries have been modified since the cache was loaded or saved.
+    # Retrieving an entry only changes the order of the entries, which is saved with
+    # the next modification:
+    _dirty: bool
+
+    def __init__(
+        self,
+        path: Path,
+        max_entries: int = MAX_ENTRIES,
+        max_bytes: int = MAX_BYTES,
+    ):
+        """
+        Args:
+            path: Path to the file containing the cache.
+            max_entries: Maximum number of archives in the cache.
+            max_bytes: Maximum (serialized) size of the cache, in bytes.
+        """
+        self._path = path
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._entries = None
+        self._sizes = {}
+        self._dirty = False
+
+    def _load(self) -> "OrderedDict[str, Dict[str, Any]]":
+        if self._entries is not None:
+            return self._entries
+
+        self._entries = OrderedDict()
+        try:
+            with open(self._path, "r", encoding="utf-8") as fp:
+                data = json.load(fp)
+        except (OSError, ValueError):
+            return self._entries
+
+        if not isinstance(data, dict) or data.get("version") != ARCHIVE_CACHE_VERSION:
+            return self._entries
+
+        for key, entry in data.get("entries", []):
+            self._entries[key] = entry
+            self._sizes[key] = len(json.dumps(entry, separators=(",", ":")))
+
+        return self._entries
+
+    def get(self, key: Optional[str]) -> Optional[ArchiveAnalysis]:
+        """
+        Retrieve the analysis of an archive.
+
+        Args:
+            key: The key of the archive, see archive_key().
+
+        Returns:
+            The cached analysis of the archive, or None if there is none.
+        """
+        if key is None:
+            return None
+
+        entries = self._load()
+        entry = entries.get(key)
+        if entry is None:
+            return None
+
+        try:
+            analysis = ArchiveAnalysis(
+                str(entry["base"]),
+                {str(name): list(files) for name, files in entry["subpackages"]},
+                {str(name): list(plugins) for name, plugins in entry["plugins"]},
+            )
+        except (KeyError, TypeError, ValueError):
+            self._remove(key)
+            return None
+
+        entries.move_to_end(key)
+        return analysis
+
+    def put(self, key: Optional[str], analysis: ArchiveAnalysis):
+        """
+        Store the analysis of an archive, evicting the least recently used entries
+        if required.
+
+        Args:
+            key: The key of the archive, see archive_key().
+            analysis: The analysis to store.
+        """
+        if key is None:
+            return
+
+        entries = self._load()
+        entry = {
+            "base": analysis.base,
+            "subpackages": list(analysis.subpackages.items()),
+            "plugins": list(analysis.plugins.items()),
+        }
+        size = len(json.dumps(entry, separators=(",", ":")))
+
+        # Do not store entries that would not fit in the cache anyway:
+        if size > self._max_bytes:
+            self._remove(key)
+            return
+
+        entries[key] = entry
+        entries.move_to_end(key)
+        self._sizes[key] = size
+        self._dirty = True
+
+        total = sum(self._sizes.values())
+        while len(entries) > self._max_entries or total > self._max_bytes:
+            oldest = next(iter(entries))
+            total -= self._sizes.get(oldest, 0)
+            self._remove(oldest)
+
+    def _remove(self, key: str):
+        if self._entries is not None and key in self._entries:
+            del self._entries[key]
+            self._dirty = True
+        self._sizes.pop(key, None)
+
+    def save(self):
+        """
+        Write the cache to the disk, if its entries were modified.
+        """
+        if self._entries is None or not self._dirty:
+            return
+
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Write to a temporary file first to avoid corrupting the cache:
+        tmp = self._path.with_suffix(self._path.suffix + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as fp:
+            json.dump(
+                {
+                    "version": ARCHIVE_CACHE_VERSION,
+                    "entries": list(self._entries.items()),
+                },
+                fp,
+                separators=(",", ":"),
+            )
+        os.replace(tmp, self._path)
+        self._dirty = False
@@ -0,0 +1,114 @@
+# -*- encoding: utf-8 -*-
+
+import logging
+import threading
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class InstallDiagnostics:
+    """
+    Warnings collected during an installation.
+
+    Scripts can trigger the same warning many times (e.g., inside a loop), so
+    messages are deduplicated and counted instead of being written one at a time,
+    and a summary is flushed once per installation. Messages can be reported from
+    multiple threads (the interpreter runs on a worker thread).
+    """
+
+    # Default maximum number of distinct messages kept, further messages are only
+    # counted:
+    MAX_MESSAGES = 100
+
+    _max_messages: int
+    _lock: threading.Lock
+
+    # Number of occurrences of each message, in order of first occurrence, and number
+    # of occurrences of the messages that were not kept:
+    _messages: Dict[str, int]
+    _dropped: int
+
+    def __init__(self, max_messages: int = MAX_MESSAGES):
+        """
+        Args:
+            max_messages: Maximum number of distinct messages kept.
+        """
+        self._max_messages = max_messages
+        self._lock = threading.Lock()
+        self._messages = {}
+        self._dropped = 0
+
+    def __len__(self) -> int:
+        """
+        Returns:
+            The number of reported warnings, including repeated ones.
+        """
+        return sum(self._messages.values()) + self._dropped
+
+    def warning(self, text: str):
+        """
+        Report a warning.
+
+        Args:
+            text: The message of the warning.
+        """
+        with self._lock:
+            if text in self._messages:
+                self._messages[text] += 1
+            elif len(self._messages) < self._max_messages:
+                self._messages[text] = 1
+            else:
+                self._dropped += 1
+
+    def messages(self) -> List[Tuple[str, int]]:
+        """
+        Returns:
+            The distinct messages with their number of occurrences, in order of first
+            occurrence.
+        """
+        with self._lock:
+            return list(self._messages.items())
+
+    def summary(self) -> List[str]:
+        """
+        Returns:
+            One line per distinct message, with its number of occurrences if the
+            message was repeated, followed by the number of omitted warnings if any.
+        """
+        with self._lock:
+            lines = [
+                text if count == 1 else f"{text} ({count} times)"
+                for text, count in self._messages.items()
+            ]
+            if self._dropped:
+                lines.append(f"... and {self._dropped} other warnings.")
+        return lines
+
+    def flush(self, title: str = "Warnings during the installation"):
+        """
+        Write the summary of the warnings to the log and clear them.
+
+        Args:
+            title: The first line of the logged message.
+        """
+        lines = self.summary()
+        with self._lock:
+            self._messages = {}
+            self._dropped = 0
+        if lines:
+            logger.warning("%s:\n%s", title, "\n".join(f"  - {x}" for x in lines))
+
+
+def report_warning(text: str, diagnostics: Optional[InstallDiagnostics] = None):
+    """
+    Report a warning to the given diagnostics, or log it directly if there are none.
+
+    Args:
+        text: The message of the warning.
+        diagnostics: The diagnostics of the current installation, if any.
+    """
+    if diagnostics is not None:
+        diagnostics.warning(text)
+    else:
+        logger.warning(text)
@@ -1,15 +1,34 @@
 # -*- encoding: utf-8 -*-
 
+import logging
+from collections import OrderedDict
 from pathlib import Path
-from typing import Any, Dict, List, Mapping, Optional, Set, Tuple
+from typing import Dict, List, Mapping, Optional, Sequence, Set, Tuple
 
 from antlr4 import ParserRuleContext
 from PyQt6 import QtWidgets
-from PyQt6.QtCore import Qt, pyqtSignal
-from PyQt6.QtGui import QFontDatabase, QKeySequence, QPixmap, QResizeEvent, QShortcut
+from PyQt6.QtCore import (
+    QAbstractListModel,
+    QEventLoop,
+    QModelIndex,
+    QObject,
+    Qt,
+    QThread,
+    QTimer,
+    pyqtSignal,
+)
+from PyQt6.QtGui import (
+    QFontDatabase,
+    QHideEvent,
+    QKeySequence,
+    QPixmap,
+    QResizeEvent,
+    QShortcut,
+    QShowEvent,
+    QTextCursor,
+)
 from PyQt6.QtWidgets import QApplication
 from wizard.contexts import (
-    WizardInterpreterContext,
     WizardRequireVersionsContext,
     WizardSelectContext,
     WizardSelectManyContext,
@@ -26,14 +45,27 @@ from wizard.value import Plugin
 
 import mobase
 
+from .assembly import plugins_selection, subpackages_selection
+from .diagnostics import InstallDiagnostics
+from .dispatch import MainThreadDispatcher
+from .images import ThumbnailCache, WizardImageStore
+from .options import OptionsIndex
+from .profiler import ScriptProfiler
+from .runner import (
+    WizardInterruptedError,
+    WizardRunnerContext,
+    exec_until,
+    make_plugins_index,
+)
+from .timing import InstallTimer
 from .ui.wizardinstallercomplete import Ui_WizardInstallerComplete
 from .ui.wizardinstallerdialog import Ui_WizardInstallerDialog
 from .ui.wizardinstallererror import Ui_WizardInstallerError
 from .ui.wizardinstallerpage import Ui_WizardInstallerPage
 from .ui.wizardinstallerrequires import Ui_WizardInstallerRequires
-from .utils import make_ini_tweaks
+from .utils import IniTweaksCache, ini_tweaks_files
 
-WizardRunnerContext = WizardInterpreterContext[WizardRunnerState, Any]
+logger = logging.getLogger(__name__)
 
 
 def check_version(
@@ -143,6 +175,129 @@ class WizardInstallerRequiresVersionPage(QtWidgets.QWidget):
         self.ui.labelWryeBashIcon.setPixmap(noIcon)
 
 
+class WizardOptionListModel(QAbstractListModel):
+    """
+    List model over the options of a select statement.
+
+    The model holds the options directly and keeps the check state of the options
+    (for SelectMany statements) in a compact array.
+    """
+
+    _options: List[SelectOption]
+    _checkable: bool
+
+    # Check state of the options, one byte per option:
+    _checked: bytearray
+
+    def __init__(
+        self,
+        options: Sequence[SelectOption],
+        checkable: bool,
+        parent: Optional[QObject] = None,
+    ):
+        """
+        Args:
+            options: The options of the select statement.
+            checkable: True if options can be checked (SelectMany statements).
+            parent: The parent object.
+        """
+        super().__init__(parent)
+        self._options = list(options)
+        self._checkable = checkable
+        self._checked = bytearray(len(self._options))
+
+    def setOptions(self, options: Sequence[SelectOption]):
+        """
+        Update the options of the model. The number of options must not change.
+
+        Only rows whose option changed are notified to the views.
+
+        Args:
+            options: The new options.
+        """
+        assert len(options) == len(self._options)
+
+        first: Optional[int] = None
+        for row, option in enumerate(options):
+            current = self._options[row]
+            changed = current is not option and (
+                current.name != option.name
+                or current.description != option.description
+                or current.image != option.image
+            )
+            self._options[row] = option
+
+            # Notify contiguous ranges of changed rows:
+            if changed and first is None:
+                first = row
+            elif not changed and first is not None:
+                self.dataChanged.emit(self.index(first), self.index(row - 1))
+                first = None
+
+        if first is not None:
+            self.dataChanged.emit(self.index(first), self.index(len(options) - 1))
+
+    def option(self, row: int) -> SelectOption:
+        return self._options[row]
+
+    def isChecked(self, row: int) -> bool:
+        return bool(self._checked[row])
+
+    def setChecked(self, row: int, checked: bool):
+        if bool(self._checked[row]) != checked:
+            self._checked[row] = checked
+            index = self.index(row)
+            self.dataChanged.emit(index, index, [Qt.ItemDataRole.CheckStateRole])
+
+    def checkedOptions(self) -> List[SelectOption]:
+        return [
+            option for option, checked in zip(self._options, self._checked) if checked
+        ]
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        if parent.isValid():
+            return 0
+        return len(self._options)
+
+    def flags(self, index: QModelIndex) -> Qt.ItemFlag:
+        flags = super().flags(index)
+        if self._checkable and index.isValid():
+            flags |= Qt.ItemFlag.ItemIsUserCheckable
+        return flags
+
+    def data(self, index: QModelIndex, role: int = Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+
+        if role == Qt.ItemDataRole.DisplayRole:
+            return self._options[index.row()].name
+        elif role == Qt.ItemDataRole.UserRole:
+            return self._options[index.row()]
+        elif role == Qt.ItemDataRole.CheckStateRole and self._checkable:
+            if self._checked[index.row()]:
+                return Qt.CheckState.Checked
+            return Qt.CheckState.Unchecked
+
+        return None
+
+    def setData(
+        self, index: QModelIndex, value, role: int = Qt.ItemDataRole.EditRole
+    ) -> bool:
+        if (
+            not index.isValid()
+            or not self._checkable
+            or role != Qt.ItemDataRole.CheckStateRole
+        ):
+            return False
+
+        # The view can give either a CheckState or an integer:
+        self.setChecked(
+            index.row(),
+            value in (Qt.CheckState.Checked, Qt.CheckState.Checked.value),
+        )
+        return True
+
+
 class WizardInstallerSelectPage(QtWidgets.QWidget):
 
     # Signal emitted when an item is double-clicked, only for SelectOne
@@ -150,67 +305,68 @@ class WizardInstallerSelectPage(QtWidgets.QWidget):
     itemDoubleClicked = pyqtSignal()
 
     _context: WizardSelectContext
-    _images: Mapping[Path, Path]
+    _images: WizardImageStore
     _currentImage: QPixmap
+    _model: WizardOptionListModel
+
+    # Current filter (normalized):
+    _filter: str
 
     def __init__(
         self,
         context: WizardSelectContext,
-        images: Mapping[Path, Path],
-        options: Optional[List[str]],
+        images: WizardImageStore,
+        options: Optional[Set[str]],
         parent: QtWidgets.QWidget,
     ):
         """
         Args:
             context: The context for this page.
-            images: A mapping from path (in the archive) to extracted path.
-            options: Potential list of options to select. Might not exactly match.
+            images: The store providing the images of the options.
+            options: Potential set of names of options to select.
             parent: The parent widget.
         """
         super().__init__(parent)
 
         self._images = images
+        self._currentImage = QPixmap()
+        self._filter = ""
 
         # Set the ui file:
         self.ui = Ui_WizardInstallerPage()
         self.ui.setupUi(self)
 
-        self.ui.optionList.currentItemChanged.connect(self.onCurrentItemChanged)
-
-        # Create list item widgets:
-        for option in context.options:
-            item = QtWidgets.QListWidgetItem()
-            self.ui.optionList.addItem(item)
-
-        self.update_context(context)
+        self._model = WizardOptionListModel(
+            context.options, isinstance(context, WizardSelectManyContext), self
+        )
+        self.ui.optionList.setModel(self._model)
+        self.ui.optionList.selectionModel().currentChanged.connect(  # type: ignore
+            self.onCurrentChanged
+        )
+        self.ui.optionFilterEdit.textChanged.connect(self.onFilterChanged)
+        self._images.imageAvailable.connect(self.onImageAvailable)
 
-        # Extract previous select options:
-        previous_options = []
+        # Extract previous select options (SelectOption are not hashable, but the
+        # defaults are the same objects as the options):
         if options:
-            previous_options = [
-                option for option in context.options if option.name in options
-            ]
+            previous = [option.name in options for option in context.options]
         else:
+            defaults: List[SelectOption] = []
             if isinstance(context, WizardSelectManyContext):
-                previous_options = context.defaults
+                defaults = context.defaults
             elif isinstance(context, WizardSelectOneContext):
-                previous_options = [context.default]
+                defaults = [context.default]
+            ids = {id(option) for option in defaults}
+            previous = [id(option) in ids for option in context.options]
 
         # Set the default values:
-        for i, option in enumerate(context.options):
-            item = self.ui.optionList.item(i)
+        for row, selected in enumerate(previous):
             if isinstance(context, WizardSelectManyContext):
-                item.setFlags(item.flags() | Qt.ItemFlag.ItemIsUserCheckable)
-                if option in previous_options:
-                    item.setCheckState(Qt.CheckState.Checked)
-                else:
-                    item.setCheckState(Qt.CheckState.Unchecked)
-            elif (
-                isinstance(context, WizardSelectOneContext)
-                and option in previous_options
-            ):
-                item.setSelected(True)
-                self.ui.optionList.setCurrentItem(item)
+                self._model.setChecked(row, selected)
+            elif isinstance(context, WizardSelectOneContext) and selected:
+                self.ui.optionList.setCurrentIndex(self._model.index(row))
+
+        self.update_context(context)
 
         if isinstance(context, WizardSelectOneContext):
             self.ui.optionList.doubleClicked.connect(self.itemDoubleClicked.emit)
@@ -219,36 +375,81 @@ class WizardInstallerSelectPage(QtWidgets.QWidget):
 
         self._context = context
 
-        options = self._context.options
-        assert len(options) == self.ui.optionList.count()
-
         self.ui.selectDescriptionLabel.setText(context.description)
         self.ui.selectDescriptionLabel.setMargin(4)
 
-        # Update the content of the items:
-        for i, option in enumerate(options):
-            item = self.ui.optionList.item(i)
-            item.setText(option.name)
-            item.setData(Qt.ItemDataRole.UserRole, option)
+        # Update the content of the model:
+        self._model.setOptions(context.options)
 
         # No item selected, select the first one:
-        if not self.ui.optionList.currentItem():
-            self.ui.optionList.setCurrentRow(0)
+        if not self.ui.optionList.currentIndex().isValid():
+            self.ui.optionList.setCurrentIndex(self._model.index(0))
 
-    def onCurrentItemChanged(
-        self, current: QtWidgets.QListWidgetItem, previous: QtWidgets.QListWidgetItem
-    ):
-        option: SelectOption = current.data(Qt.ItemDataRole.UserRole)
+    def onCurrentChanged(self, current: QModelIndex, previous: QModelIndex):
+        if not current.isValid():
+            return
+        option = self._model.option(current.row())
         self.ui.descriptionTextEdit.setText(option.description)
-        image = option.image
-        if image and Path(image) in self._images:
-            target = self._images[Path(image)]
-            self._currentImage = QPixmap(target.as_posix())
-        else:
-            self._currentImage = QPixmap()
+        self.loadImage()
+
+    def onFilterChanged(self, text: str):
+        text = " ".join(text.casefold().split())
+
+        # When the filter is refined, only visible rows can change:
+        refine = text.startswith(self._filter)
+        self._filter = text
+
+        for row in range(self._model.rowCount()):
+            if refine and self.ui.optionList.isRowHidden(row):
+                continue
+            self.ui.optionList.setRowHidden(
+                row, text not in self._model.option(row).name.casefold()
+            )
+
+    def onImageAvailable(self, path: Path):
+        # Images are extracted while the dialog is shown, so the image of the current
+        # option may not have been available when the option was selected:
+        index = self.ui.optionList.currentIndex()
+        if not self.isVisible() or not index.isValid():
+            return
+        image = self._model.option(index.row()).image
+        if image and Path(image) == path:
+            self.loadImage()
+
+    def loadImage(self):
+        """
+        Load the image of the current option.
+        """
+        self._currentImage = QPixmap()
+
+        index = self.ui.optionList.currentIndex()
+        if index.isValid():
+            image = self._model.option(index.row()).image
+            if image:
+                self._currentImage = self._images.pixmap(
+                    Path(image), self.ui.imageLabel.size()
+                )
 
         self.ui.imageLabel.setPixmap(self.getResizedImage())
 
+    def releaseImage(self):
+        """
+        Release the image of the current option, see loadImage().
+        """
+        self._currentImage = QPixmap()
+        self.ui.imageLabel.clear()
+
+    def imageMemory(self) -> int:
+        """
+        Returns:
+            The (approximate) number of bytes used by the decoded images of this page.
+        """
+        size = 0
+        for pixmap in (self._currentImage, self.ui.imageLabel.pixmap()):
+            if pixmap is not None and not pixmap.isNull():
+                size += pixmap.width() * pixmap.height() * pixmap.depth() // 8
+        return size
+
     def getResizedImage(self) -> QPixmap:
         if self._currentImage.isNull():
             return self._currentImage
@@ -260,20 +461,33 @@ class WizardInstallerSelectPage(QtWidgets.QWidget):
 
     def resizeEvent(self, event: QResizeEvent) -> None:
         super().resizeEvent(event)
-        self.ui.imageLabel.setPixmap(self.getResizedImage())
+
+        # Load a larger version of the image if the current one is a thumbnail that
+        # is too small:
+        size = self.ui.imageLabel.size()
+        current = max(self._currentImage.width(), self._currentImage.height())
+        if (
+            current in ThumbnailCache.SIZES
+            and max(size.width(), size.height()) > current
+        ):
+            self.loadImage()
+        else:
+            self.ui.imageLabel.setPixmap(self.getResizedImage())
+
+    def showEvent(self, event: Optional[QShowEvent]) -> None:
+        super().showEvent(event)
+        if self._currentImage.isNull():
+            self.loadImage()
+
+    def hideEvent(self, event: Optional[QHideEvent]) -> None:
+        # Decoded images are only kept for visible pages:
+        super().hideEvent(event)
+        self.releaseImage()
 
     def selectedOptions(self) -> List[SelectOption]:
-        options = []
         if isinstance(self._context, WizardSelectOneContext):
-            options.append(
-                self.ui.optionList.currentItem().data(Qt.ItemDataRole.UserRole)
-            )
-        else:
-            for i in range(self.ui.optionList.count()):
-                item = self.ui.optionList.item(i)
-                if item.checkState() == Qt.CheckState.Checked:
-                    options.append(item.data(Qt.ItemDataRole.UserRole))
-        return options
+            return [self._model.option(self.ui.optionList.currentIndex().row())]
+        return self._model.checkedOptions()
 
     def selected(self) -> WizardSelectContext:
         if isinstance(self._context, WizardSelectOneContext):
@@ -284,14 +498,102 @@ class WizardInstallerSelectPage(QtWidgets.QWidget):
             return self._context  # type: ignore
 
 
+class WizardCheckedListModel(QAbstractListModel):
+    """
+    Read-only list model of names with a check state.
+    """
+
+    _names: List[str]
+
+    # Check state of the names, one byte per name:
+    _checked: bytearray
+
+    def __init__(
+        self, items: Sequence[Tuple[str, bool]], parent: Optional[QObject] = None
+    ):
+        """
+        Args:
+            items: The names and check states of the items.
+            parent: The parent object.
+        """
+        super().__init__(parent)
+        self._names = [name for name, _ in items]
+        self._checked = bytearray(checked for _, checked in items)
+
+    def items(self) -> List[Tuple[str, bool]]:
+        """
+        Returns:
+            The names and check states of the items.
+        """
+        return [
+            (name, bool(checked)) for name, checked in zip(self._names, self._checked)
+        ]
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        if parent.isValid():
+            return 0
+        return len(self._names)
+
+    def data(self, index: QModelIndex, role: int = Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+
+        if role == Qt.ItemDataRole.DisplayRole:
+            return self._names[index.row()]
+        elif role == Qt.ItemDataRole.CheckStateRole:
+            if self._checked[index.row()]:
+                return Qt.CheckState.Checked
+            return Qt.CheckState.Unchecked
+
+        return None
+
+
 class WizardInstallerCompletePage(QtWidgets.QWidget):
+
+    # Number of lines added at once to the INI tweaks preview:
+    TWEAKS_PREVIEW_CHUNK_SIZE = 500
+
+    _tweaksCache: IniTweaksCache
+
+    # Models for the list of sub-packages and plugins:
+    _subpackagesModel: "WizardCheckedListModel"
+    _pluginsModel: "WizardCheckedListModel"
+
+    # Lines of the INI tweaks preview and index of the next line to add:
+    _tweaksLines: List[str]
+    _tweaksIndex: int
+    _tweaksTimer: QTimer
+
     def __init__(
         self,
         context: WizardTerminationContext[WizardRunnerState],
+        pluginsIndex: Mapping[str, List[Plugin]],
+        tweaksCache: IniTweaksCache,
+        profiler: Optional[ScriptProfiler],
+        diagnostics: Optional[InstallDiagnostics],
         parent: QtWidgets.QWidget,
     ):
+        """
+        Args:
+            context: The termination context.
+            pluginsIndex: Mapping from sub-package names to the plugins they contain,
+                see make_plugins_index().
+            tweaksCache: The cache to use to render INI tweaks.
+            profiler: The profiler of the script, if the script is profiled.
+            diagnostics: The warnings of the installation, shown after the notes.
+            parent: The parent widget.
+        """
         super().__init__(parent)
 
+        self._tweaksCache = tweaksCache
+        self._tweaksLines = []
+        self._tweaksIndex = 0
+
+        # Large INI Tweaks are added in multiple steps to the preview:
+        self._tweaksTimer = QTimer(self)
+        self._tweaksTimer.setInterval(0)
+        self._tweaksTimer.timeout.connect(self._appendTweaksPreview)
+
         # Set the ui file:
         self.ui = Ui_WizardInstallerComplete()
         self.ui.setupUi(self)
@@ -301,50 +603,24 @@ class WizardInstallerCompletePage(QtWidgets.QWidget):
         self.context = context
         self.state = context.state
 
-        # Retrieve the keyword visitor:
-        kvisitor: WizardRunnerKeywordVisitor = context.factory.kvisitor  # type: ignore
-
-        # The list of plugins in selected sub-packages:
-        plugins: Set[Plugin] = set()
-
         # SubPackages:
-        for sp in kvisitor.subpackages:
-            item = QtWidgets.QListWidgetItem()
-            item.setText(sp.name)
-            if sp.name in self.state.subpackages:
-                item.setCheckState(Qt.CheckState.Checked)
-            else:
-                item.setCheckState(Qt.CheckState.Unchecked)
-            item.setFlags(item.flags() & ~Qt.ItemFlag.ItemIsUserCheckable)
-            plugins.update(kvisitor.plugins_for(sp))
-            self.ui.subpackagesList.addItem(item)
-
-        # Switch the renamed plugins:
-        for plugin in list(plugins):
-            if plugin in self.state.renames:
-                plugins.remove(plugin)
-                plugins.add(Plugin(self.state.renames[plugin]))
-
-        # Plugins:
-        for plugin in sorted(plugins):
-            item = QtWidgets.QListWidgetItem()
-            item.setText(plugin.name)
-            if plugin in self.state.plugins:
-                item.setCheckState(Qt.CheckState.Checked)
-            else:
-                item.setCheckState(Qt.CheckState.Unchecked)
-            item.setFlags(item.flags() & ~Qt.ItemFlag.ItemIsUserCheckable)
-            self.ui.pluginsList.addItem(item)
+        self._subpackagesModel = WizardCheckedListModel(
+            subpackages_selection(self.state, pluginsIndex), self
+        )
+        self.ui.subpackagesList.setModel(self._subpackagesModel)
+
+        # Plugins, with renamed plugins switched:
+        self._pluginsModel = WizardCheckedListModel(
+            plugins_selection(self.state, pluginsIndex), self
+        )
+        self.ui.pluginsList.setModel(self._pluginsModel)
 
         # INI Tweaks:
         self.ui.tweaksWidget.setVisible(bool(self.state.tweaks))
         self.ui.tweaksList.currentItemChanged.connect(self.onCurrentTweakItemChanged)
         if self.state.tweaks:
             # Group the tweaks per file:
-            tweaks = {
-                file: self.state.tweaks.tweaks(file)
-                for file in self.state.tweaks.files()
-            }
+            tweaks = ini_tweaks_files(self.state.tweaks, diagnostics)
 
             for file, ftweaks in tweaks.items():
                 item = QtWidgets.QListWidgetItem()
@@ -357,21 +633,61 @@ class WizardInstallerCompletePage(QtWidgets.QWidget):
             )
             self.ui.tweaksList.setCurrentRow(0)
 
-        # Notes:
+        # Notes, followed by the warnings:
         md = ""
         for note in self.state.notes:
             md += f"- {note}\n"
+        warnings = diagnostics.summary() if diagnostics is not None else []
+        if warnings:
+            md += "\n**Warnings:**\n\n"
+            for warning in warnings:
+                md += f"- {warning}\n"
         self.ui.notesTextEdit.document().setIndentWidth(10)
         self.ui.notesTextEdit.setMarkdown(md)
 
+        # Profile:
+        self.ui.profileWidget.setVisible(profiler is not None)
+        if profiler is not None:
+            self.ui.profileTextEdit.setFont(
+                QFontDatabase.systemFont(QFontDatabase.SystemFont.FixedFont)
+            )
+            self.ui.profileTextEdit.setPlainText(profiler.report())
+
     def onCurrentTweakItemChanged(
         self, current: QtWidgets.QListWidgetItem, previous: QtWidgets.QListWidgetItem
     ):
         # Clear text area and create the tweaks:
+        self._tweaksTimer.stop()
         self.ui.tweaksTextEdit.clear()
+
+        self._tweaksLines = []
+        self._tweaksIndex = 0
+
+        if current is None:
+            return
+
+        self._tweaksLines = self._tweaksCache.render(
+            current.data(Qt.ItemDataRole.UserRole)
+        ).split("\n")
+
+        # Add the first chunk directly and the remaining ones later:
+        self._appendTweaksPreview()
+
+    def _appendTweaksPreview(self):
+        end = self._tweaksIndex + self.TWEAKS_PREVIEW_CHUNK_SIZE
         self.ui.tweaksTextEdit.appendPlainText(
-            make_ini_tweaks(current.data(Qt.ItemDataRole.UserRole))
+            "\n".join(self._tweaksLines[self._tweaksIndex : end])
         )
+        self._tweaksIndex = end
+
+        if self._tweaksIndex >= len(self._tweaksLines):
+            self._tweaksTimer.stop()
+
+            # Move back to the top since appendPlainText() scrolls down:
+            self.ui.tweaksTextEdit.moveCursor(QTextCursor.MoveOperation.Start)
+            self.ui.tweaksTextEdit.ensureCursorVisible()
+        elif not self._tweaksTimer.isActive():
+            self._tweaksTimer.start()
 
     def subpackages(self) -> List[str]:
         """
@@ -379,12 +695,7 @@ class WizardInstallerCompletePage(QtWidgets.QWidget):
             The list of subpackages selected in the UI (either automatically by the
             interpreter or by the user).
         """
-        sp: List[str] = []
-        for i in range(self.ui.subpackagesList.count()):
-            item = self.ui.subpackagesList.item(i)
-            if item.checkState() == Qt.CheckState.Checked:
-                sp.append(item.text())
-        return sp
+        return [name for name, checked in self._subpackagesModel.items() if checked]
 
     def plugins(self) -> Dict[str, bool]:
         """
@@ -392,11 +703,7 @@ class WizardInstallerCompletePage(QtWidgets.QWidget):
             The list of plugins selected in the UI (either automatically by the
             interpreter or by the user).
         """
-        sp: Dict[str, bool] = {}
-        for i in range(self.ui.pluginsList.count()):
-            item = self.ui.pluginsList.item(i)
-            sp[item.text()] = item.checkState() == Qt.CheckState.Checked
-        return sp
+        return dict(self._pluginsModel.items())
 
     def tweaks(self) -> Mapping[str, List[WizardINISetting]]:
         """
@@ -437,7 +744,8 @@ class WizardInstallerCancelPage(QtWidgets.QWidget):
 class WizardInstallerErrorPage(QtWidgets.QWidget):
     def __init__(
         self,
-        error: WizardError,
+        error: Exception,
+        diagnostics: Optional[InstallDiagnostics],
         parent: QtWidgets.QWidget,
     ):
         super().__init__(parent)
@@ -446,21 +754,229 @@ class WizardInstallerErrorPage(QtWidgets.QWidget):
         self.ui = Ui_WizardInstallerError()
         self.ui.setupUi(self)
 
-        self.ui.titleLabel.setText(
-            "An error occurred during the installation of the script, "
-            "this is probably due to an incorrect script file (wizard.txt) in the "
-            "archive."
-        )
+        if isinstance(error, WizardInterruptedError):
+            self.ui.titleLabel.setText(
+                "The execution of the script was interrupted. You can go back and "
+                "try again, or increase the limits in the settings of the plugin."
+            )
+        elif not isinstance(error, WizardError):
+            self.ui.titleLabel.setText(
+                "An unexpected error occurred during the installation of the script, "
+                "this is probably due to a bug in the installer."
+            )
+        else:
+            self.ui.titleLabel.setText(
+                "An error occurred during the installation of the script, "
+                "this is probably due to an incorrect script file (wizard.txt) in the "
+                "archive."
+            )
         self.ui.iconLabel.setPixmap(
             self.style()
             .standardIcon(QtWidgets.QStyle.StandardPixmap.SP_MessageBoxCritical)
             .pixmap(24, 24)
         )
-        self.ui.messageEdit.setText(str(error))
+
+        # The warnings often explain the error, so they are shown after it:
+        message = str(error)
+        if not isinstance(error, WizardError):
+            message = f"{type(error).__name__}: {message}"
+        warnings = diagnostics.summary() if diagnostics is not None else []
+        if warnings:
+            message += "\n\nWarnings:\n" + "\n".join(f"- {w}" for w in warnings)
+        self.ui.messageEdit.setPlainText(message)
+
+
+class WizardInstallerPages:
+    """
+    Manage the pages of the dialog.
+
+    Select pages are cached (by context) so that they can be reused when the same
+    select statement is reached again, but only a limited number of pages that are
+    not currently in the stack are kept. Other pages are deleted when they are
+    removed from the stack.
+    """
+
+    # Maximum number of cached select pages that are not in the stack:
+    MAX_CACHED_PAGES = 32
+
+    _stack: QtWidgets.QStackedWidget
+
+    # Cached select pages, by context, from least to most recently used:
+    _pages: "OrderedDict[ParserRuleContext, WizardInstallerSelectPage]"
+
+    def __init__(self, stack: QtWidgets.QStackedWidget):
+        self._stack = stack
+        self._pages = OrderedDict()
+
+    def find(self, context: ParserRuleContext) -> Optional[WizardInstallerSelectPage]:
+        """
+        Args:
+            context: The ANTLR4 context of a select statement.
+
+        Returns:
+            The cached page for the given select statement, if any.
+        """
+        page = self._pages.get(context)
+        if page is not None:
+            self._pages.move_to_end(context)
+        return page
+
+    def cache(self, context: ParserRuleContext, page: WizardInstallerSelectPage):
+        """
+        Cache the given select page.
+
+        Args:
+            context: The ANTLR4 context of the select statement.
+            page: The page for the select statement.
+        """
+        self._pages[context] = page
+
+    def push(self, page: QtWidgets.QWidget):
+        """
+        Add the given page at the top of the stack and make it the current page.
+
+        Args:
+            page: The page to add.
+        """
+        index = self._stack.addWidget(page)
+        self._stack.setCurrentIndex(index)
+        self._evict()
+        self._log()
+
+    def pop(self):
+        """
+        Remove the current page from the stack, deleting it if it is not cached.
+        """
+        index = self._stack.currentIndex()
+        if index <= 0:
+            return
+
+        page = self._stack.widget(index)
+        self._stack.removeWidget(page)
+        if page not in self._pages.values():
+            page.deleteLater()
+
+        self._evict()
+        self._log()
+
+    def _evict(self):
+
+        # Find the pages in the stack, these cannot be removed:
+        used = {id(self._stack.widget(i)) for i in range(self._stack.count())}
+
+        unused = [
+            context for context, page in self._pages.items() if id(page) not in used
+        ]
+        for context in unused[: max(0, len(unused) - self.MAX_CACHED_PAGES)]:
+            self._pages.pop(context).deleteLater()
+
+    def _log(self):
+        if not logger.isEnabledFor(logging.DEBUG):
+            return
+
+        pages = {id(self._stack.widget(i)) for i in range(self._stack.count())}
+        pages.update(id(page) for page in self._pages.values())
+
+        logger.debug(
+            "%d live pages (%d cached select pages), %d bytes of decoded images.",
+            len(pages),
+            len(self._pages),
+            sum(page.imageMemory() for page in self._pages.values()),
+        )
+
+
+class WizardInstallerExecThread(QThread):
+    """
+    Thread used to run the interpreter until the next page, see runner.exec_until.
+    """
+
+    # Signals emitted when the execution is done, either with the next context or
+    # with the error that occurred (any exception, not only WizardError):
+    contextReady = pyqtSignal(object)
+    errorOccurred = pyqtSignal(object)
+
+    _context: WizardRunnerContext
+    _organizer: mobase.IOrganizer
+    _dispatcher: MainThreadDispatcher
+    _exec_first: bool
+    _max_steps: int
+    _max_time: float
+    _timer: InstallTimer
+    _profiler: Optional[ScriptProfiler]
+
+    def __init__(
+        self,
+        context: WizardRunnerContext,
+        organizer: mobase.IOrganizer,
+        dispatcher: MainThreadDispatcher,
+        exec_first: bool,
+        max_steps: int,
+        max_time: float,
+        timer: InstallTimer,
+        profiler: Optional[ScriptProfiler],
+        parent: QtWidgets.QWidget,
+    ):
+        """
+        Args:
+            context: The context to start the execution from.
+            organizer: The organizer, used to check requirements.
+            dispatcher: The dispatcher used to call the organizer from the main
+                thread.
+            exec_first: True if the start context should be executed first.
+            max_steps: Maximum number of steps, or 0 for no limit.
+            max_time: Maximum time of execution in seconds, or 0 for no limit.
+            timer: The timer to record the execution time in.
+            profiler: The profiler to record the execution of the script with, if
+                any.
+            parent: The parent widget.
+        """
+        super().__init__(parent)
+        self._context = context
+        self._organizer = organizer
+        self._dispatcher = dispatcher
+        self._exec_first = exec_first
+        self._max_steps = max_steps
+        self._max_time = max_time
+        self._timer = timer
+        self._profiler = profiler
+
+    def _skip(self, context: WizardRunnerContext) -> bool:
+        # If all requirements are ok, skip the context:
+        return isinstance(context, WizardRequireVersionsContext) and all(
+            self._dispatcher.call(lambda: check_version(context, self._organizer))
+        )
+
+    def run(self):
+        self._timer.count("exec_until")
+        try:
+            with self._timer.span("exec"):
+                context = exec_until(
+                    self._context,
+                    (
+                        WizardSelectContext,
+                        WizardRequireVersionsContext,
+                    ),
+                    skip=self._skip,
+                    exec_first=self._exec_first,
+                    max_steps=self._max_steps,
+                    max_time=self._max_time,
+                    interrupted=self.isInterruptionRequested,
+                    profiler=self._profiler,
+                )
+        except Exception as ex:
+            # Unexpected exceptions (e.g., from the organizer) must also end on the
+            # error page, otherwise the dialog would be left without a next page:
+            self.errorOccurred.emit(ex)
+        else:
+            self.contextReady.emit(context)
 
 
 class WizardInstallerDialog(QtWidgets.QDialog):
 
+    # Signal emitted when a select page is reached, before the page is shown, with
+    # the description of the page and the names of its default options:
+    selectPageReached = pyqtSignal(str, list)
+
     # Flag to indicate if the user chose to do a manual installation:
     _manual: bool = False
 
@@ -469,14 +985,37 @@ class WizardInstallerDialog(QtWidgets.QDialog):
 
     # The interpreter:
     _interpreter: WizardInterpreter
-    _images: Mapping[Path, Path]
-    _options: Mapping[str, List[str]]
+    _images: WizardImageStore
+    _options: OptionsIndex
 
     # The Wizard MO2 interface:
     _start_context: WizardTopLevelContext
 
-    # Mapping from context to selected options:
-    _pages: Mapping[ParserRuleContext, WizardInstallerSelectPage]
+    # The pages of the dialog:
+    _pages: WizardInstallerPages
+
+    # Cache for the rendered INI tweaks:
+    _tweaksCache: IniTweaksCache
+
+    # Warnings of the installation:
+    _diagnostics: Optional[InstallDiagnostics]
+
+    # Index of the plugins in the sub-packages, given or built when first needed:
+    _pluginsIndex: Optional[Dict[str, List[Plugin]]]
+
+    # The thread running the interpreter, if any, and the execution budget:
+    _thread: Optional[WizardInstallerExecThread]
+    _max_steps: int
+    _max_time: float
+
+    # Dispatcher used by the thread to call the organizer, and True once the dialog
+    # is closed (results of the thread are then ignored):
+    _dispatcher: MainThreadDispatcher
+    _closed: bool
+
+    # Timer for the installation and profiler for the script:
+    _timer: InstallTimer
+    _profiler: Optional[ScriptProfiler]
 
     def __init__(
         self,
@@ -484,18 +1023,35 @@ class WizardInstallerDialog(QtWidgets.QDialog):
         interpreter: WizardInterpreter,
         context: WizardTopLevelContext[WizardRunnerState],
         name: mobase.GuessedString,
-        images: Mapping[Path, Path],
-        options: Mapping[str, List[str]],
+        images: WizardImageStore,
+        options: OptionsIndex,
         parent: QtWidgets.QWidget,
+        max_steps: int = 0,
+        max_time: float = 0,
+        timer: Optional[InstallTimer] = None,
+        profiler: Optional[ScriptProfiler] = None,
+        diagnostics: Optional[InstallDiagnostics] = None,
+        pluginsIndex: Optional[Dict[str, List[Plugin]]] = None,
     ):
         """
         Args:
             interpreter: The interpreter to use.
             context: The initial context of the script.
             name: The name of the mod.
-            images: A mapping from path (in the archive) to extracted path.
-            options: The previously selected options.
+            images: The store providing the images of the options.
+            options: The index of previously selected options.
             parent: The parent widget.
+            max_steps: Maximum number of steps when running the interpreter, or 0
+                for no limit.
+            max_time: Maximum time in seconds when running the interpreter, or 0 for
+                no limit.
+            timer: Timer to record the execution time of the interpreter in, if any.
+            profiler: Profiler to record the execution of the script with, if any.
+                This should be the profiler given to make_interpreter().
+            diagnostics: The diagnostics collecting the warnings of the installation,
+                if any. This should be the diagnostics given to make_interpreter().
+            pluginsIndex: The index of the plugins listed on the Complete page, see
+                make_plugins_index(), or None to index all the plugins of the archive.
         """
         super().__init__(parent)
 
@@ -504,12 +1060,23 @@ class WizardInstallerDialog(QtWidgets.QDialog):
         self._images = images
         self._options = options
         self._start_context = context
-        self._pages = {}
+        self._tweaksCache = IniTweaksCache(diagnostics)
+        self._diagnostics = diagnostics
+        self._pluginsIndex = pluginsIndex
+        self._thread = None
+        self._dispatcher = MainThreadDispatcher(self)
+        self._closed = False
+        self._max_steps = max_steps
+        self._max_time = max_time
+        self._timer = timer or InstallTimer()
+        self._profiler = profiler
 
         # Set the ui file:
         self.ui = Ui_WizardInstallerDialog()
         self.ui.setupUi(self)
 
+        self._pages = WizardInstallerPages(self.ui.stackedWidget)
+
         self.setWindowFlag(Qt.WindowType.WindowContextHelpButtonHint, False)
         self.setWindowFlag(Qt.WindowType.WindowMaximizeButtonHint, True)
 
@@ -535,6 +1102,16 @@ class WizardInstallerDialog(QtWidgets.QDialog):
 
         self.ui.prevBtn.clicked.connect(self.previousClicked)
         self.ui.nextBtn.clicked.connect(self.nextClicked)
+        self.ui.stopBtn.clicked.connect(self.stopClicked)
+
+        self.ui.profileBtn.setVisible(profiler is not None)
+        self.ui.profileBtn.clicked.connect(self.profileClicked)
+
+        # The busy indicator is only shown if the execution takes some time:
+        self._busyTimer = QTimer(self)
+        self._busyTimer.setSingleShot(True)
+        self._busyTimer.setInterval(250)
+        self._busyTimer.timeout.connect(self._show_busy_indicator)
 
         backShortcut = QShortcut(QKeySequence(Qt.Key.Key_Backspace), self)
         backShortcut.activated.connect(self.previousClicked)  # type: ignore
@@ -590,6 +1167,13 @@ class WizardInstallerDialog(QtWidgets.QDialog):
         assert isinstance(widget, WizardInstallerCompletePage)
         return widget.tweaks()
 
+    def tweaksCache(self) -> IniTweaksCache:
+        """
+        Returns:
+            The cache containing the INI tweaks rendered during this session.
+        """
+        return self._tweaksCache
+
     def selectedOptions(self) -> Mapping[str, List[str]]:
         """
         Returns:
@@ -608,39 +1192,109 @@ class WizardInstallerDialog(QtWidgets.QDialog):
         return self._manual
 
     def previousClicked(self):
-        index = self.ui.stackedWidget.currentIndex()
-        if index > 0:
-            self.ui.stackedWidget.removeWidget(self.ui.stackedWidget.widget(index))
+        if self._thread is not None:
+            return
+
+        self._pages.pop()
 
         self._update_prev_button()
         self._update_next_button()
         self._update_focus()
 
     def nextClicked(self):
+        if self._thread is not None:
+            return
+
         widget = self.ui.stackedWidget.currentWidget()
 
         try:
             if isinstance(widget, WizardInstallerSelectPage):
-                context = widget.selected().exec()
+                self._exec_until(widget.selected(), True)
             elif isinstance(widget, WizardInstallerRequiresVersionPage):
-                context = widget.context.exec()
+                self._exec_until(widget.context, True)
             else:
                 self.accept()
-                return
+        except WizardError as ex:
+            self._add_page(WizardInstallerErrorPage(ex, self._diagnostics, self))
+
+    def profileClicked(self):
+        if self._profiler is None:
+            return
+
+        dialog = QtWidgets.QDialog(self)
+        dialog.setWindowTitle(self.tr("Script profile"))
+        dialog.resize(800, 400)
+
+        edit = QtWidgets.QPlainTextEdit(dialog)
+        edit.setReadOnly(True)
+        edit.setLineWrapMode(QtWidgets.QPlainTextEdit.LineWrapMode.NoWrap)
+        edit.setFont(QFontDatabase.systemFont(QFontDatabase.SystemFont.FixedFont))
+        edit.setPlainText(self._profiler.report())
+
+        layout = QtWidgets.QVBoxLayout(dialog)
+        layout.addWidget(edit)
+
+        dialog.exec()
+        dialog.deleteLater()
 
-            context = self._exec_until(context)
+    def stopClicked(self):
+        if self._thread is not None:
+            self._thread.requestInterruption()
 
-            if context.context in self._pages:
-                page = self._pages[context.context]
-                page.update_context(context)
+    def _on_context_ready(self, context: WizardRunnerContext):
+        if self._closed:
+            return
+
+        # Signaled before creating the page so that the images requested by the page
+        # come first:
+        if isinstance(context, WizardSelectContext):
+            defaults: List[SelectOption] = []
+            if isinstance(context, WizardSelectManyContext):
+                defaults = context.defaults
+            elif isinstance(context, WizardSelectOneContext):
+                defaults = [context.default]
+            self.selectPageReached.emit(
+                context.description,
+                [option.name for option in defaults if option is not None],
+            )
+
+        page: Optional[QtWidgets.QWidget]
+        try:
+            page = self._pages.find(context.context)
+            if page is not None:
+                page.update_context(context)  # type: ignore
             else:
                 page = self._make_page(context)
-
         except WizardError as ex:
-            page = WizardInstallerErrorPage(ex, self)
+            page = WizardInstallerErrorPage(ex, self._diagnostics, self)
+
+        self._add_page(page)
+
+    def _on_error(self, error: Exception):
+        if self._closed:
+            return
+        self._add_page(WizardInstallerErrorPage(error, self._diagnostics, self))
+
+    def _on_thread_finished(self):
+        if self._thread is not None:
+            self._thread.deleteLater()
+        self._thread = None
+
+        self._busyTimer.stop()
+        self.ui.busyBar.setVisible(False)
+        self.ui.stopBtn.setVisible(False)
+        self.ui.stackedWidget.setEnabled(True)
+
+        self._update_prev_button()
+        self._update_next_button()
+        self._update_focus()
 
-        index = self.ui.stackedWidget.addWidget(page)
-        self.ui.stackedWidget.setCurrentIndex(index)
+    def _show_busy_indicator(self):
+        self.ui.busyBar.setVisible(True)
+        self.ui.stopBtn.setVisible(True)
+
+    def _add_page(self, page: QtWidgets.QWidget):
+        self._pages.push(page)
         self._update_prev_button()
         self._update_next_button()
         self._update_focus()
@@ -670,21 +1324,38 @@ class WizardInstallerDialog(QtWidgets.QDialog):
 
         self.ui.nextBtn.setText(name)
 
-    def _exec_until(self, context: WizardRunnerContext) -> WizardRunnerContext:
-        context = self._interpreter.exec_until(
+    def _exec_until(self, context: WizardRunnerContext, exec_first: bool):
+        """
+        Run the interpreter in a separate thread until the next page, starting from
+        the given context. The page is added when the execution is done.
+
+        Args:
+            context: The context to start from.
+            exec_first: True if the given context should be executed first (e.g., a
+                select context).
+        """
+        self._thread = WizardInstallerExecThread(
             context,
-            (
-                WizardSelectContext,
-                WizardRequireVersionsContext,
-            ),
+            self._organizer,
+            self._dispatcher,
+            exec_first,
+            self._max_steps,
+            self._max_time,
+            self._timer,
+            self._profiler,
+            self,
         )
+        self._thread.contextReady.connect(self._on_context_ready)
+        self._thread.errorOccurred.connect(self._on_error)
+        self._thread.finished.connect(self._on_thread_finished)
 
-        # If all requirements are ok, skip the context:
-        if isinstance(context, WizardRequireVersionsContext):
-            if all(check_version(context, self._organizer)):
-                return self._exec_until(context.exec())
+        # Prevent any interaction while the interpreter is running:
+        self.ui.prevBtn.setDisabled(True)
+        self.ui.nextBtn.setDisabled(True)
+        self.ui.stackedWidget.setEnabled(False)
+        self._busyTimer.start()
 
-        return context
+        self._thread.start()
 
     def _make_page(self, context: WizardRunnerContext) -> QtWidgets.QWidget:
         page: QtWidgets.QWidget
@@ -692,31 +1363,53 @@ class WizardInstallerDialog(QtWidgets.QDialog):
             page = WizardInstallerSelectPage(
                 context,
                 self._images,
-                self._options.get(context.description, None),
+                self._options.match(
+                    context.description, [option.name for option in context.options]
+                ),
                 self,
             )
             page.itemDoubleClicked.connect(self.nextClicked)
-            self._pages[context.context] = page  # type: ignore
+            self._pages.cache(context.context, page)
         elif isinstance(context, WizardRequireVersionsContext):
             page = WizardInstallerRequiresVersionPage(context, self._organizer, self)
         elif isinstance(context, WizardTerminationContext):
             if context.is_cancel():
                 page = WizardInstallerCancelPage(context, self)
             else:
-                page = WizardInstallerCompletePage(context, self)
+                if self._pluginsIndex is None:
+                    kvisitor: WizardRunnerKeywordVisitor = (
+                        context.factory.kvisitor  # type: ignore
+                    )
+                    self._pluginsIndex = make_plugins_index(kvisitor.subpackages)
+                page = WizardInstallerCompletePage(
+                    context,
+                    self._pluginsIndex,
+                    self._tweaksCache,
+                    self._profiler,
+                    self._diagnostics,
+                    self,
+                )
 
         return page
 
+    def done(self, result: int):
+        self._closed = True
+
+        # Stop the interpreter before closing the dialog. The thread may be waiting
+        # for a call on the main thread (see MainThreadDispatcher), so events are
+        # processed while waiting. The thread is kept in a local variable since
+        # processing events can run _on_thread_finished(), which resets it:
+        thread = self._thread
+        if thread is not None:
+            thread.requestInterruption()
+            while not thread.wait(10):
+                QApplication.processEvents(
+                    QEventLoop.ProcessEventsFlag.ExcludeUserInputEvents
+                )
+        super().done(result)
+
     def exec(self):
-        try:
-            context = self._exec_until(self._start_context)
-            page = self._make_page(context)
-        except WizardError as ex:
-            page = WizardInstallerErrorPage(ex, self)
-        self.ui.stackedWidget.addWidget(page)
-        self._update_prev_button()
-        self._update_next_button()
-        self._update_focus()
+        self._exec_until(self._start_context, False)
         return super().exec()
 
     def tr(self, str):
@@ -0,0 +1,74 @@
+# -*- encoding: utf-8 -*-
+
+from typing import Any, Callable, Optional
+
+from PyQt6.QtCore import QObject, Qt, QThread, pyqtSignal
+
+
+class _Call:
+
+    __slots__ = ("_fn", "_result", "_error")
+
+    _fn: Callable[[], Any]
+    _result: Any
+    _error: Optional[BaseException]
+
+    def __init__(self, fn: Callable[[], Any]):
+        self._fn = fn
+        self._result = None
+        self._error = None
+
+    def run(self):
+        try:
+            self._result = self._fn()
+        except BaseException as ex:
+            self._error = ex
+
+    def result(self) -> Any:
+        if self._error is not None:
+            raise self._error
+        return self._result
+
+
+class MainThreadDispatcher(QObject):
+    """
+    Run functions on the thread of the dispatcher (usually the main thread), and
+    wait for their result.
+
+    The interpreter runs in a separate thread, but the MO2 API (organizer, plugin
+    list, game features) is not thread-safe and is also used from the main thread
+    (e.g., to extract files), so the calls of the interpreter are forwarded to the
+    main thread.
+
+    Since the calling thread blocks until the main thread runs the function, the
+    main thread must not wait for the calling thread without processing events.
+    """
+
+    _requested = pyqtSignal(object)
+
+    def __init__(self, parent: Optional[QObject] = None):
+        super().__init__(parent)
+        self._requested.connect(
+            self._run, Qt.ConnectionType.BlockingQueuedConnection  # type: ignore
+        )
+
+    def call(self, fn: Callable[[], Any]) -> Any:
+        """
+        Call the given function on the thread of the dispatcher.
+
+        Args:
+            fn: The function to call.
+
+        Returns:
+            The value returned by the function. Exceptions raised by the function
+            are raised again in the calling thread.
+        """
+        if QThread.currentThread() == self.thread():
+            return fn()
+
+        call = _Call(fn)
+        self._requested.emit(call)
+        return call.result()
+
+    def _run(self, call: _Call):
+        call.run()
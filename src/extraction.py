@@ -0,0 +1,339 @@
+# -*- encoding: utf-8 -*-
+
+import hashlib
+import os
+import time
+from collections import OrderedDict, defaultdict
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+
+import mobase
+
+from .timing import InstallTimer
+
+
+class ScratchSpace:
+    """
+    Accounting of the temporary files extracted during an installation.
+
+    Files used only by the dialog (e.g., images) can be released as soon as the
+    dialog is closed, and optional files should not be extracted once the budget
+    is exhausted.
+    """
+
+    # Maximum number of bytes extracted, or 0 for no limit:
+    _limit: int
+
+    # Size of the tracked files, and files to remove on release():
+    _files: Dict[Path, int]
+    _releasable: List[Path]
+
+    def __init__(self, limit: int = 0):
+        """
+        Args:
+            limit: Maximum number of bytes to extract, or 0 for no limit.
+        """
+        self._limit = limit
+        self._files = {}
+        self._releasable = []
+
+    @property
+    def used(self) -> int:
+        """
+        The number of bytes currently used by the tracked files.
+        """
+        return sum(self._files.values())
+
+    def exhausted(self) -> bool:
+        """
+        Returns:
+            True if the budget is exhausted.
+        """
+        return self._limit > 0 and self.used >= self._limit
+
+    def add(self, path: Path, releasable: bool = False):
+        """
+        Track an extracted file.
+
+        Args:
+            path: The extracted file.
+            releasable: True if the file should be removed by release().
+        """
+        if path in self._files:
+            return
+        try:
+            self._files[path] = path.stat().st_size
+        except OSError:
+            return
+        if releasable:
+            self._releasable.append(path)
+
+    def release(self) -> int:
+        """
+        Remove the releasable files.
+
+        Returns:
+            The number of bytes released.
+        """
+        released = 0
+        for path in self._releasable:
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            released += self._files.pop(path, 0)
+        self._releasable = []
+        return released
+
+
+def file_digest(path: Path, chunk_size: int = 1024 * 1024) -> str:
+    """
+    Compute the digest of the content of the given file.
+
+    Args:
+        path: Path to the file.
+        chunk_size: Size of the chunks to read the file by.
+
+    Returns:
+        The digest of the file, as an hexadecimal string.
+    """
+    digest = hashlib.sha1()
+    with open(path, "rb") as fp:
+        for chunk in iter(lambda: fp.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class WizardExtractionQueue(QObject):
+    """
+    Queue extracting entries of an archive by chunks while the event loop runs, so
+    that the dialog can be shown before all the files are extracted.
+
+    The installation manager can only be used from the main thread, so chunks are
+    extracted from a zero-interval timer instead of a separate thread.
+
+    Each call to the installation manager blocks the event loop (and the script
+    interpreter, which waits on the main thread), so entries are extracted by small
+    chunks, and each timer event only extracts chunks until a few milliseconds have
+    elapsed before returning to the event loop.
+
+    Archives often contain identical files (e.g., the same preview image in multiple
+    sub-packages). Since the size of entries is not known before extraction, files
+    are deduplicated once extracted: files with the same size and content are mapped
+    to the first extracted copy and the other copies are removed. Optional files are
+    removed when the dialog is closed, so required files are only deduplicated
+    against other required files.
+    """
+
+    # Signal emitted when files have been extracted, with a mapping from path (in
+    # the archive) to extracted path:
+    filesExtracted = pyqtSignal(dict)
+
+    # Default number of entries extracted by each chunk, and time (in seconds) after
+    # which no new chunk is extracted until the next timer event:
+    CHUNK_SIZE = 16
+    TIME_SLICE = 0.005
+
+    # Entries remaining to extract, by path in the archive:
+    _pending: "OrderedDict[Path, mobase.FileTreeEntry]"
+
+    # Extracted files, from path in the archive to extracted path:
+    _extracted: Dict[Path, Path]
+
+    # Unique extracted files by optionality and size, and digests of the ones that
+    # were compared:
+    _sizes: Dict[Tuple[bool, int], List[Path]]
+    _digests: Dict[Path, str]
+
+    # Function used to extract entries:
+    _extract: Callable[[List[mobase.FileTreeEntry]], Sequence[str]]
+
+    # Scratch space tracking the extracted files, and function indicating if an entry
+    # is optional, i.e., only used by the dialog:
+    _scratch: ScratchSpace
+    _optional: Callable[[Path], bool]
+
+    _chunk_size: int
+    _time_slice: float
+    _failed: bool
+    _timer: InstallTimer
+    _qtimer: QTimer
+
+    def __init__(
+        self,
+        entries: Sequence[mobase.FileTreeEntry],
+        extract: Callable[[List[mobase.FileTreeEntry]], Sequence[str]],
+        chunk_size: int = CHUNK_SIZE,
+        time_slice: float = TIME_SLICE,
+        timer: Optional[InstallTimer] = None,
+        scratch: Optional[ScratchSpace] = None,
+        optional: Callable[[Path], bool] = lambda path: False,
+        parent: Optional[QObject] = None,
+    ):
+        """
+        Args:
+            entries: The entries to extract.
+            extract: Function extracting the given entries and returning the list of
+                extracted paths, see IInstallationManager.extractFiles().
+            chunk_size: Number of entries extracted by each chunk.
+            time_slice: Time (in seconds) after which a timer event stops extracting
+                chunks. At least one chunk is extracted by each timer event.
+            timer: Timer to record the extraction in, if any.
+            scratch: Scratch space to track the extracted files in, if any.
+            optional: Function indicating if the entry at the given path is optional.
+                Optional entries are released when the dialog is closed, and are not
+                extracted once the scratch space is exhausted or by finish().
+            parent: The parent object.
+        """
+        super().__init__(parent)
+
+        self._pending = OrderedDict((Path(entry.path()), entry) for entry in entries)
+        self._extracted = {}
+        self._sizes = defaultdict(list)
+        self._digests = {}
+        self._extract = extract
+        self._scratch = scratch or ScratchSpace()
+        self._optional = optional
+        self._chunk_size = max(1, chunk_size)
+        self._time_slice = time_slice
+        self._failed = False
+        self._timer = timer or InstallTimer()
+
+        self._qtimer = QTimer(self)
+        self._qtimer.setInterval(0)
+        self._qtimer.timeout.connect(self._extractChunk)
+
+    def start(self):
+        """
+        Start extracting the entries when the event loop runs.
+        """
+        if self._pending:
+            self._qtimer.start()
+
+    def prioritize(self, path: Path):
+        """
+        Extract the entry at the given path before the other ones.
+
+        Args:
+            path: The path of the entry in the archive.
+        """
+        if path in self._pending:
+            self._pending.move_to_end(path, last=False)
+
+    def failed(self) -> bool:
+        """
+        Returns:
+            True if the extraction of some entries failed.
+        """
+        return self._failed
+
+    def _dropOptional(self, counter: str):
+        optional = [path for path in self._pending if self._optional(path)]
+        for path in optional:
+            del self._pending[path]
+        self._timer.count(counter, len(optional))
+
+    def _extractEntries(self, count: Optional[int]):
+        if self._scratch.exhausted():
+            self._dropOptional("refused_files")
+
+        paths = list(self._pending)[:count]
+        if not paths:
+            return
+        entries = [self._pending.pop(path) for path in paths]
+
+        self._timer.count("extractFiles")
+        targets = self._extract(entries)
+        if len(targets) != len(entries):
+            self._failed = True
+            self._pending.clear()
+            return
+
+        extracted = {
+            path: self._deduplicate(Path(target), self._optional(path))
+            for path, target in zip(paths, targets)
+        }
+        for path, target in extracted.items():
+            self._scratch.add(target, self._optional(path))
+        self._extracted.update(extracted)
+        self.filesExtracted.emit(extracted)
+
+    def _digest(self, path: Path) -> str:
+        if path not in self._digests:
+            self._digests[path] = file_digest(path)
+        return self._digests[path]
+
+    def _deduplicate(self, target: Path, optional: bool) -> Path:
+        """
+        Find an extracted file with the same content as the given one.
+
+        Args:
+            target: The extracted file.
+            optional: True if the file is optional. Required files are never mapped
+                to optional ones, since these are removed when the dialog is closed.
+
+        Returns:
+            The first extracted file with the same content (and optionality) as the
+            given one, in which case the given file is removed, or the given file.
+        """
+        try:
+            size = target.stat().st_size
+        except OSError:
+            return target
+
+        # Files are only hashed if another file has the same size:
+        candidates = self._sizes[optional, size]
+        if candidates:
+            try:
+                digest = self._digest(target)
+                for candidate in candidates:
+                    if self._digest(candidate) == digest:
+                        os.remove(target)
+                        self._timer.count("deduplicated_files")
+                        self._timer.count("deduplicated_bytes", size)
+                        return candidate
+            except OSError:
+                return target
+
+        candidates.append(target)
+        return target
+
+    def _extractChunk(self):
+        if not self._pending:
+            self._qtimer.stop()
+            return
+
+        # Extract chunks until the time slice is elapsed, and let the event loop run
+        # before extracting the next ones:
+        start = time.perf_counter()
+        with self._timer.span("extract_background"):
+            while self._pending and not self._failed:
+                self._extractEntries(self._chunk_size)
+                if time.perf_counter() - start >= self._time_slice:
+                    break
+
+        if not self._pending:
+            self._qtimer.stop()
+
+    def stop(self):
+        """
+        Stop extracting the entries, e.g., if the installation was canceled.
+        """
+        self._qtimer.stop()
+
+    def finish(self) -> Dict[Path, Path]:
+        """
+        Extract all the remaining entries that are not optional.
+
+        Returns:
+            A mapping from path (in the archive) to extracted path, for all the
+            extracted entries.
+        """
+        self.stop()
+        self._dropOptional("skipped_files")
+        if self._pending:
+            with self._timer.span("extract"):
+                self._extractEntries(None)
+        return self._extracted
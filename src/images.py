@@ -0,0 +1,246 @@
+# -*- encoding: utf-8 -*-
+
+import hashlib
+import os
+from pathlib import Path
+from typing import Callable, Dict, List, Mapping, Optional, Tuple
+
+from PyQt6.QtCore import QObject, QSize, Qt, pyqtSignal
+from PyQt6.QtGui import QImage, QPixmap
+
+
+class ThumbnailCache:
+    """
+    On-disk cache of pre-scaled option images, keyed by archive and image path.
+
+    Each image is stored at each of the sizes in SIZES (for the largest dimension).
+    The modification time of thumbnails is updated when they are used, and the least
+    recently used ones are removed by evict() when the cache is too large.
+    """
+
+    # Sizes of the thumbnails (largest dimension, in pixels):
+    SIZES: Tuple[int, ...] = (256, 768)
+
+    # Default maximum size of the cache, in bytes:
+    MAX_BYTES = 64 * 1024 * 1024
+
+    # Folder containing the thumbnails:
+    _folder: Path
+
+    _max_bytes: int
+
+    def __init__(self, folder: Path, max_bytes: int = MAX_BYTES):
+        """
+        Args:
+            folder: Folder containing the thumbnails.
+            max_bytes: Maximum size of the cache, in bytes.
+        """
+        self._folder = folder
+        self._max_bytes = max_bytes
+
+    def _path(self, key: str, image: Path, size: int) -> Path:
+        name = f"{key}|{image.as_posix().casefold()}"
+        digest = hashlib.sha1(name.encode("utf-8")).hexdigest()
+        return self._folder / f"{digest}-{size}.png"
+
+    def has(self, key: str, image: Path) -> bool:
+        """
+        Check if all the thumbnails of an image are available.
+
+        Args:
+            key: The key of the archive.
+            image: The path of the image in the archive.
+
+        Returns:
+            True if the thumbnails of the image exist for all the sizes.
+        """
+        return all(self._path(key, image, size).exists() for size in self.SIZES)
+
+    def thumbnails(self, key: str, image: Path) -> Dict[int, Path]:
+        """
+        Retrieve the thumbnails of an image, marking them as recently used.
+
+        Args:
+            key: The key of the archive.
+            image: The path of the image in the archive.
+
+        Returns:
+            A mapping from size to the path of the thumbnail, for each available
+            thumbnail of the image.
+        """
+        thumbnails: Dict[int, Path] = {}
+        for size in self.SIZES:
+            path = self._path(key, image, size)
+            try:
+                os.utime(path)
+            except OSError:
+                continue
+            thumbnails[size] = path
+        return thumbnails
+
+    def store(self, key: str, image: Path, content: QImage) -> Dict[int, Path]:
+        """
+        Create the thumbnails of an image.
+
+        Args:
+            key: The key of the archive.
+            image: The path of the image in the archive.
+            content: The full-resolution image.
+
+        Returns:
+            A mapping from size to the path of the thumbnail, for each created
+            thumbnail.
+        """
+        thumbnails: Dict[int, Path] = {}
+        if content.isNull():
+            return thumbnails
+
+        self._folder.mkdir(parents=True, exist_ok=True)
+        for size in self.SIZES:
+            scaled = content
+            if max(content.width(), content.height()) > size:
+                scaled = content.scaled(
+                    size,
+                    size,
+                    Qt.AspectRatioMode.KeepAspectRatio,
+                    Qt.TransformationMode.SmoothTransformation,
+                )
+            path = self._path(key, image, size)
+            if scaled.save(path.as_posix(), "PNG"):
+                thumbnails[size] = path
+        return thumbnails
+
+    def evict(self):
+        """
+        Remove the least recently used thumbnails until the cache is small enough.
+        """
+        entries: List[Tuple[float, int, str]] = []
+        try:
+            with os.scandir(self._folder) as it:
+                for entry in it:
+                    if entry.is_file():
+                        stat = entry.stat()
+                        entries.append((stat.st_mtime, stat.st_size, entry.path))
+        except OSError:
+            return
+
+        total = sum(size for _, size, _ in entries)
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self._max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+
+
+class WizardImageStore(QObject):
+    """
+    Provider of the images of an archive for the select pages.
+
+    Images are loaded from the thumbnail cache when possible. The full-resolution
+    image is only used when no thumbnail is large enough, in which case it is
+    extracted on demand if it was not extracted with the archive, and the
+    thumbnails are created from it.
+    """
+
+    # Signal emitted when the full-resolution image for a path becomes available:
+    imageAvailable = pyqtSignal(object)
+
+    # Extracted full-resolution images, from path in the archive to extracted path:
+    _images: Dict[Path, Path]
+
+    # Cache of thumbnails and key of the archive, if any:
+    _thumbnails: Optional[ThumbnailCache]
+    _key: Optional[str]
+
+    # Function to extract an image on demand, if any:
+    _extract: Optional[Callable[[Path], Optional[Path]]]
+
+    def __init__(
+        self,
+        images: Mapping[Path, Path],
+        thumbnails: Optional[ThumbnailCache] = None,
+        key: Optional[str] = None,
+        extract: Optional[Callable[[Path], Optional[Path]]] = None,
+        parent: Optional[QObject] = None,
+    ):
+        """
+        Args:
+            images: A mapping from path (in the archive) to extracted path.
+            thumbnails: The cache of thumbnails to use, if any.
+            key: The key of the archive in the cache of thumbnails.
+            extract: Function extracting the image at the given path in the archive
+                and returning the extracted path (or None), used for images that
+                were not extracted.
+            parent: The parent object.
+        """
+        super().__init__(parent)
+        self._images = dict(images)
+        self._thumbnails = thumbnails if key is not None else None
+        self._key = key
+        self._extract = extract
+
+    def addImages(self, images: Mapping[Path, Path]):
+        """
+        Add extracted images to this store.
+
+        Args:
+            images: A mapping from path (in the archive) to extracted path.
+        """
+        self._images.update(images)
+        for path in images:
+            self.imageAvailable.emit(path)
+
+    def _full(self, path: Path) -> Optional[Path]:
+        if path not in self._images and self._extract is not None:
+            target = self._extract(path)
+            if target is not None:
+                self._images[path] = target
+        return self._images.get(path)
+
+    def pixmap(self, path: Path, size: QSize) -> QPixmap:
+        """
+        Load the image at the given path, for display at the given size.
+
+        Args:
+            path: The path of the image in the archive.
+            size: The size the image will be displayed at.
+
+        Returns:
+            The smallest thumbnail at least as large as the given size, or the
+            full-resolution image, or a null pixmap if the image is not available.
+        """
+        target = max(size.width(), size.height())
+
+        thumbnails: Dict[int, Path] = {}
+        if self._thumbnails is not None and self._key is not None:
+            thumbnails = self._thumbnails.thumbnails(self._key, path)
+
+        largest = QPixmap()
+        if thumbnails:
+            for tsize in sorted(thumbnails):
+                if tsize >= target:
+                    return QPixmap(thumbnails[tsize].as_posix())
+
+            # A thumbnail smaller than its size is the full-resolution image:
+            tsize = max(thumbnails)
+            largest = QPixmap(thumbnails[tsize].as_posix())
+            if max(largest.width(), largest.height()) < tsize:
+                return largest
+
+        full = self._full(path)
+        if full is None:
+            return largest
+
+        image = QImage(full.as_posix())
+        if (
+            self._thumbnails is not None
+            and self._key is not None
+            and len(thumbnails) < len(self._thumbnails.SIZES)
+        ):
+            self._thumbnails.store(self._key, path, image)
+
+        return QPixmap.fromImage(image)
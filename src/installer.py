@@ -1,27 +1,48 @@
 # -*- encoding: utf-8 -*-
 
 import os
-import re
-import sys
-from collections import defaultdict
 from pathlib import Path
-from typing import Dict, List, Optional, Union
+from typing import Dict, List, Optional, Tuple, Union
 
 from PyQt6 import QtWidgets
+from PyQt6.QtCore import Qt
 
 # MO2 ships with PyQt6, so you can use it in your plugins:
 from PyQt6.QtWidgets import QApplication
 from wizard.runner import WizardRunnerState
+from wizard.tweaks import WizardINISetting
 
 import mobase
 
+from .analysis import ScriptAnalysis
+from .assembly import add_ini_tweaks_file, assemble_tree
+from .cache import ArchiveAnalysis, ArchiveAnalysisCache, archive_key
+from .diagnostics import InstallDiagnostics
 from .dialog import WizardInstallerDialog
-from .runner import make_interpreter
-from .utils import make_ini_tweaks, merge_ini_tweaks
+from .dispatch import MainThreadDispatcher
+from .extraction import ScratchSpace, WizardExtractionQueue
+from .images import ThumbnailCache, WizardImageStore
+from .options import (
+    OPTIONS_SETTING,
+    OptionsIndex,
+    dump_options,
+    hash_script,
+    load_options,
+)
+from .profiler import ScriptProfiler
+from .runner import (
+    WIZARD_MAX_DEPTH,
+    SubPackageClassifier,
+    find_wizard_bases,
+    make_analysis,
+    make_interpreter,
+    make_plugins_index,
+)
+from .timing import InstallTimer
+from .utils import IniTweaksCache, write_ini_tweaks
 
 
 class WizardInstaller(mobase.IPluginInstallerSimple):
-
     """
     This is the actual plugin. MO2 has two types of installer plugin, this one is
     "simple", i.e., it will work directly on the file-tree contained in the archive.
@@ -29,16 +50,39 @@ class WizardInstaller(mobase.IPluginInstallerSimple):
     it is valid (for this installer) and then modify it if required before extraction.
     """
 
-    # Regex used to parse settings:
-    RE_DESCRIPTION = re.compile(r"select([0-9]+)-description")
-    RE_OPTION = re.compile(r"select([0-9]+)-option([0-9]+)")
-
     _organizer: mobase.IOrganizer
 
     # List of selected options:
     _installerOptions: Dict[str, List[str]]
     _installerUsed: bool
 
+    # Hash of the script the options were selected for, and True if the options
+    # were saved using the legacy format:
+    _installerScriptHash: Optional[str]
+    _installerLegacyOptions: bool
+
+    # Timings and counters of the current installation, and name of the archive:
+    _timer: InstallTimer
+    _archive: str
+
+    # Warnings of the current installation, flushed to the log once it ends:
+    _diagnostics: InstallDiagnostics
+
+    # Cache of analyzed archives, and key and cached analysis of the current archive
+    # (looked up on first use, see _lookupArchive()):
+    _archiveCache: ArchiveAnalysisCache
+    _archiveLookedUp: bool
+    _archiveKey: Optional[str]
+    _archiveAnalysis: Optional[ArchiveAnalysis]
+
+    # Cache of the thumbnails of option images:
+    _thumbnails: ThumbnailCache
+
+    # Classification of the folders of the current archive as sub-packages, and path
+    # of the folder containing wizard.txt found when checking the archive:
+    _classifier: Optional[SubPackageClassifier]
+    _wizardBase: Optional[str]
+
     def __init__(self):
         super().__init__()
 
@@ -47,6 +91,20 @@ class WizardInstaller(mobase.IPluginInstallerSimple):
 
     def init(self, organizer: mobase.IOrganizer):
         self._organizer = organizer
+        self._timer = InstallTimer()
+        self._archive = ""
+        self._diagnostics = InstallDiagnostics()
+        self._archiveCache = ArchiveAnalysisCache(
+            Path(organizer.pluginDataPath()) / "installer_wizard" / "archives.json"
+        )
+        self._archiveLookedUp = False
+        self._archiveKey = None
+        self._archiveAnalysis = None
+        self._classifier = None
+        self._wizardBase = None
+        self._thumbnails = ThumbnailCache(
+            Path(organizer.pluginDataPath()) / "installer_wizard" / "thumbnails"
+        )
         return True
 
     def name(self):
@@ -82,6 +140,37 @@ class WizardInstaller(mobase.IPluginInstallerSimple):
             ),
             # Above FOMOD:
             mobase.PluginSetting("priority", "priority of this installer", 120),
+            mobase.PluginSetting(
+                "max_steps",
+                "maximum number of steps when running a script (0 for no limit)",
+                10_000_000,
+            ),
+            mobase.PluginSetting(
+                "max_time",
+                "maximum time in seconds when running a script (0 for no limit)",
+                0,
+            ),
+            mobase.PluginSetting(
+                "max_extract_size",
+                "maximum size in MB of the images extracted for the dialog "
+                "(0 for no limit)",
+                1024,
+            ),
+            mobase.PluginSetting(
+                "max_wizard_depth",
+                "maximum depth of the folder containing wizard.txt in archives",
+                WIZARD_MAX_DEPTH,
+            ),
+            mobase.PluginSetting(
+                "profile",
+                "record timings of installations in the plugin data folder",
+                False,
+            ),
+            mobase.PluginSetting(
+                "profile_script",
+                "record and show the time spent on each line of wizard scripts",
+                False,
+            ),
         ]
 
     # Method for IPluginInstallerSimple:
@@ -97,42 +186,78 @@ class WizardInstaller(mobase.IPluginInstallerSimple):
     ):
         self._installerUsed = False
         self._installerOptions = {}
+        self._installerScriptHash = None
+        self._installerLegacyOptions = False
+
+        self._archive = archive
+        self._diagnostics = InstallDiagnostics()
+        self._timer = InstallTimer(
+            bool(self._organizer.pluginSetting(self.name(), "profile"))
+        )
+
+        self._archiveLookedUp = False
+        self._archiveKey = None
+        self._archiveAnalysis = None
+
+        # Sub-packages are classified once per archive:
+        checker = self._organizer.managedGame().feature(
+            mobase.ModDataChecker  # type: ignore
+        )
+        self._classifier = SubPackageClassifier(checker, self._timer)
+        self._wizardBase = None
 
         if mod:
-            settings = mod.pluginSettings(self.name())
-
-            # First extract the description:
-            descriptions: Dict[int, str] = {}
-            options: Dict[int, Dict[int, str]] = defaultdict(dict)
-            for setting, value in settings.items():
-                mdesc = WizardInstaller.RE_DESCRIPTION.match(setting)
-                if mdesc:
-                    select = int(mdesc.group(1))
-                    descriptions[select] = str(value)
-
-                mopt = WizardInstaller.RE_OPTION.match(setting)
-                if mopt:
-                    select = int(mopt.group(1))
-                    index = int(mopt.group(2))
-                    options[select][index] = str(value)
-
-            for kdesc, desc in descriptions.items():
-                self._installerOptions[desc] = []
-                if kdesc in options:
-                    for index in sorted(options[kdesc].keys()):
-                        self._installerOptions[desc].append(options[kdesc][index])
+            (
+                self._installerOptions,
+                self._installerScriptHash,
+                self._installerLegacyOptions,
+            ) = load_options(mod.pluginSettings(self.name()))
 
     def onInstallationEnd(
         self, result: mobase.InstallResult, mod: Optional[mobase.IModInterface]
     ):
+        self._timer.count("warnings", len(self._diagnostics))
+        if self._timer.enabled:
+            self._timer.dump(
+                self._profilePath(),
+                archive=os.path.basename(self._archive),
+                result=getattr(result, "name", str(result)),
+            )
+
+        try:
+            self._archiveCache.save()
+        except OSError as ex:
+            self._diagnostics.warning(f"Failed to save the archive cache: {ex}.")
+
+        self._diagnostics.flush(
+            f"Warnings during the installation of {os.path.basename(self._archive)}"
+        )
+
+        self._thumbnails.evict()
+
         if result != mobase.InstallResult.SUCCESS or not self._installerUsed or not mod:
             return
 
-        mod.clearPluginSettings(self.name())
-        for i, desc in enumerate(self._installerOptions):
-            mod.setPluginSetting(self.name(), f"select{i}-description", desc)
-            for iopt, opt in enumerate(self._installerOptions[desc]):
-                mod.setPluginSetting(self.name(), f"select{i}-option{iopt}", opt)
+        # Remove the settings from the legacy format:
+        if self._installerLegacyOptions:
+            mod.clearPluginSettings(self.name())
+
+        mod.setPluginSetting(
+            self.name(),
+            OPTIONS_SETTING,
+            dump_options(self._installerOptions, self._installerScriptHash),
+        )
+
+    def _profilePath(self) -> Path:
+        """
+        Returns:
+            The path to the file containing the timings of installations.
+        """
+        return (
+            Path(self._organizer.pluginDataPath())
+            / "installer_wizard"
+            / "profile.jsonl"
+        )
 
     def _hasFomodInstaller(self) -> bool:
         # Do not consider the NCC installer.
@@ -141,6 +266,22 @@ class WizardInstaller(mobase.IPluginInstallerSimple):
     def _hasOmodInstaller(self) -> bool:
         return self._organizer.isPluginEnabled("Omod Installer")
 
+    def _lookupArchive(self):
+        """
+        Compute the key of the current archive and retrieve its cached analysis, if
+        not done yet.
+
+        This is only done when the archive is checked or installed by this installer
+        instead of for every archive in onInstallationStart().
+        """
+        if self._archiveLookedUp:
+            return
+        self._archiveLookedUp = True
+        self._archiveKey = archive_key(
+            self._archive, self._organizer.managedGame().gameName()
+        )
+        self._archiveAnalysis = self._archiveCache.get(self._archiveKey)
+
     def _getWizardArchiveBase(
         self, tree: mobase.IFileTree, data_name: str, checker: mobase.ModDataChecker
     ) -> Optional[mobase.IFileTree]:
@@ -156,15 +297,31 @@ class WizardInstaller(mobase.IPluginInstallerSimple):
             The tree corresponding to the folder containing wizard.txt, or None.
         """
 
-        entry = tree.find("wizard.txt", mobase.FileTreeEntry.FILE)
-
-        if entry:
-            return tree
-
-        if len(tree) == 1 and isinstance(tree[0], mobase.IFileTree):
-            return self._getWizardArchiveBase(tree[0], data_name, checker)
+        # Use the base from the cached analysis of the archive, or the one found when
+        # checking the archive, if any:
+        if tree.parent() is None:
+            self._lookupArchive()
+            analysis = self._archiveAnalysis
+            for path in (analysis.base if analysis else None, self._wizardBase):
+                if path is None:
+                    continue
+                base = tree.find(path) if path else tree
+                if isinstance(base, mobase.IFileTree) and base.find(
+                    "wizard.txt", mobase.FileTreeEntry.FILE
+                ):
+                    return base
+
+        max_depth = self._organizer.pluginSetting(self.name(), "max_wizard_depth")
+        bases = find_wizard_bases(
+            tree, int(max_depth), self._classifier  # type: ignore
+        )
+        self._timer.count("wizard_candidates", len(bases))
+        if not bases:
+            return None
 
-        return None
+        if tree.parent() is None:
+            self._wizardBase = bases[0].tree.path("/")
+        return bases[0].tree
 
     def _getEntriesToExtract(
         self,
@@ -192,6 +349,53 @@ class WizardInstaller(mobase.IPluginInstallerSimple):
 
         return entries
 
+    def _orderEntriesToExtract(
+        self, entries: List[mobase.FileTreeEntry], analysis: ScriptAnalysis
+    ) -> List[mobase.FileTreeEntry]:
+        """
+        Remove the entries that cannot be used by the script and order the other
+        ones by their first use.
+
+        Args:
+            entries: The entries to extract, see _getEntriesToExtract().
+            analysis: The analysis of the script.
+
+        Returns:
+            The images used by the script (in order of first use), followed by the
+            INI files that can be needed to create INI tweaks.
+        """
+        images: Dict[Path, mobase.FileTreeEntry] = {}
+        inis: List[mobase.FileTreeEntry] = []
+        for entry in entries:
+            path = Path(entry.path())
+            if entry.suffix().lower() != "ini":
+                images[path] = entry
+            elif analysis.isIniNeeded(path):
+                inis.append(entry)
+
+        needed = analysis.neededImages(images)
+        if needed is None:
+            ordered = list(images.values())
+        else:
+            ordered = [images[path] for path in needed]
+
+        self._timer.count("unused_entries", len(entries) - len(ordered) - len(inis))
+        return ordered + inis
+
+    def _extractImage(self, entry: mobase.FileTreeEntry) -> Optional[Path]:
+        """
+        Extract an image that was not extracted with the script, see install().
+
+        Args:
+            entry: The entry of the image.
+
+        Returns:
+            The path to the extracted image, or None if the extraction failed.
+        """
+        self._timer.count("extractFile")
+        path = self._manager().extractFile(entry, silent=True)
+        return Path(path) if path else None
+
     def isArchiveSupported(self, tree: mobase.IFileTree) -> bool:
         """
         Check if the given file-tree (from the archive) can be installed by this
@@ -213,13 +417,16 @@ class WizardInstaller(mobase.IPluginInstallerSimple):
         )
 
         # Retrieve the base:
-        base = self._getWizardArchiveBase(tree, data_name, checker)
+        with self._timer.span("detection"):
+            base = self._getWizardArchiveBase(tree, data_name, checker)
 
         if not base:
             return False
 
-        # Check FOMOD:
-        fomod = base.exists("fomod/ModuleConfig.xml")
+        # Check FOMOD, on the root of the archive since the base can be nested:
+        fomod = tree.exists("fomod/ModuleConfig.xml") or base.exists(
+            "fomod/ModuleConfig.xml"
+        )
         if (
             fomod
             and self._hasFomodInstaller()
@@ -273,110 +480,233 @@ class WizardInstaller(mobase.IPluginInstallerSimple):
         if wizard is None:
             return mobase.InstallResult.NOT_ATTEMPTED
 
-        to_extract = self._getEntriesToExtract(otree)
-
-        # Extract the script:
-        paths = self._manager().extractFiles([wizard] + to_extract, silent=False)
-        if len(paths) != len(to_extract) + 1:
+        timer = self._timer
+        self._lookupArchive()
+
+        with timer.span("find_entries"):
+            to_extract = self._getEntriesToExtract(otree)
+
+        # Images whose thumbnails are cached are only extracted when required:
+        deferred: Dict[Path, mobase.FileTreeEntry] = {}
+        if self._archiveKey is not None:
+            for entry in to_extract:
+                path = Path(entry.path())
+                if entry.suffix().lower() != "ini" and self._thumbnails.has(
+                    self._archiveKey, path
+                ):
+                    deferred[path] = entry
+            if deferred:
+                to_extract = [e for e in to_extract if Path(e.path()) not in deferred]
+                timer.count("deferred_images", len(deferred))
+
+        # Extract the script alone, the other files are extracted while the dialog
+        # is shown:
+        with timer.span("extract"):
+            paths = self._manager().extractFiles([wizard], silent=False)
+        timer.count("extractFiles")
+        if len(paths) != 1:
             return mobase.InstallResult.FAILED
 
-        interpreter = make_interpreter(base, self._organizer)
-
         script = paths[0]
 
+        # Images are only used by the dialog, so they are not extracted beyond the
+        # budget and are removed once the dialog is closed:
+        max_extract_size = self._organizer.pluginSetting(
+            self.name(), "max_extract_size"
+        )
+        scratch = ScratchSpace(int(max_extract_size) * 1024 * 1024)  # type: ignore
+        scratch.add(Path(script))
+
+        # Line-level profiling of the script:
+        profiler: Optional[ScriptProfiler] = None
+        if self._organizer.pluginSetting(self.name(), "profile_script"):
+            with open(script, "r", encoding="utf-8", errors="replace") as fp:
+                profiler = ScriptProfiler(fp.read().splitlines())
+
+        # The interpreter runs in a separate thread while the installation manager
+        # is used to extract files, so its calls to the organizer are forwarded to
+        # the main thread:
+        dispatcher = MainThreadDispatcher()
+
+        with timer.span("interpreter"):
+            interpreter = make_interpreter(
+                base,
+                self._organizer,
+                timer,
+                profiler,
+                self._archiveAnalysis,
+                self._classifier,
+                self._diagnostics,
+                dispatcher.call,
+            )
+
+        # Fuzzy matching of previous options is only useful if the script changed:
+        script_hash = hash_script(Path(script))
+        options = OptionsIndex(
+            self._installerOptions, fuzzy=script_hash != self._installerScriptHash
+        )
+        self._installerScriptHash = script_hash
+
+        # Execution budget of the interpreter:
+        max_steps = self._organizer.pluginSetting(self.name(), "max_steps")
+        max_time = self._organizer.pluginSetting(self.name(), "max_time")
+
+        with timer.span("parse"):
+            context = interpreter.make_top_level_context(
+                Path(script), WizardRunnerState()
+            )
+
+        # Cache the analysis of the archive for future installations:
+        if self._archiveAnalysis is None:
+            self._archiveAnalysis = make_analysis(
+                base, context.factory.kvisitor.subpackages  # type: ignore
+            )
+            self._archiveCache.put(self._archiveKey, self._archiveAnalysis)
+
+        # Only extract the files the script can use, starting with the images of the
+        # first pages, and only list the plugins that can be installed on the
+        # Complete page:
+        with timer.span("analysis"):
+            analysis = ScriptAnalysis(context.context)
+            to_extract = self._orderEntriesToExtract(to_extract, analysis)
+            plugins_index = make_plugins_index(
+                context.factory.kvisitor.subpackages,  # type: ignore
+                analysis.candidateSubPackages(),
+            )
+
+        # The entries are moved when the tree is assembled, so we keep the original
+        # paths to find the extracted files:
+        to_extract_paths = [Path(entry.path()) for entry in to_extract]
+        extraction = WizardExtractionQueue(
+            to_extract,
+            lambda entries: self._manager().extractFiles(entries, silent=True),
+            timer=timer,
+            scratch=scratch,
+            optional=lambda path: path.suffix.lower() != ".ini",
+        )
+
+        # Images that are not extracted yet are extracted first when requested:
+        def extractImage(path: Path) -> Optional[Path]:
+            if path in deferred:
+                if scratch.exhausted():
+                    timer.count("refused_files")
+                    return None
+                target = self._extractImage(deferred[path])
+                if target is not None:
+                    scratch.add(target, releasable=True)
+                return target
+            extraction.prioritize(path)
+            return None
+
+        # When a page is reached, the files that can be used after it are extracted
+        # first, starting with the ones of its default options:
+        def prefetch(description: str, selected: List[str]):
+            files = analysis.pageFiles(description, selected, to_extract_paths)
+            for path in reversed(files):
+                extraction.prioritize(path)
+            timer.count("prefetched_files", len(files))
+
+        images = WizardImageStore({}, self._thumbnails, self._archiveKey, extractImage)
+        extraction.filesExtracted.connect(
+            lambda files: images.addImages(
+                {
+                    path: target
+                    for path, target in files.items()
+                    if path.suffix.lower() != ".ini"
+                }
+            )
+        )
+
         dialog = WizardInstallerDialog(
             self._organizer,
             interpreter,
-            interpreter.make_top_level_context(Path(script), WizardRunnerState()),
+            context,
             name,
-            {
-                Path(entry.path()): Path(path)
-                for entry, path in zip(to_extract, paths[1:])
-                if not path.endswith(".ini")
-            },
-            self._installerOptions,
+            images,
+            options,
             self._parentWidget(),
+            max_steps=int(max_steps),  # type: ignore
+            max_time=float(max_time),  # type: ignore
+            timer=timer,
+            profiler=profiler,
+            diagnostics=self._diagnostics,
+            pluginsIndex=plugins_index,
         )
+        dialog.selectPageReached.connect(prefetch)
 
         dialog.scriptButtonClicked.connect(lambda: os.startfile(script))  # type: ignore
 
         # Note: Unlike the official installer, we do not have a "silent" setting,
         # but it is really simple to add it.
-        if dialog.exec() == QtWidgets.QDialog.DialogCode.Accepted:
+        with timer.span("dialog"):
+            extraction.start()
+            accepted = dialog.exec() == QtWidgets.QDialog.DialogCode.Accepted
+            extraction.stop()
+
+        timer.count("scratch_bytes", scratch.used)
+        timer.count("scratch_released_bytes", scratch.release())
+
+        if accepted:
+
+            # Extract the files that were not extracted while the dialog was shown:
+            extracted = extraction.finish()
+            if extraction.failed():
+                return mobase.InstallResult.FAILED
+
+            if timer.enabled:
+                timer.count("extracted_files", len(extracted) + 1)
+                timer.count(
+                    "extracted_bytes",
+                    sum(
+                        os.path.getsize(path)
+                        for path in [Path(script), *extracted.values()]
+                        if path.exists()
+                    ),
+                )
 
             # We update the name with the user specified one:
             name.update(dialog.name(), mobase.GuessQuality.USER)
 
-            # Create the tree with all the sub-packages:
-            tree = otree.createOrphanTree()
-
-            for subpackage in dialog.subpackages():
-                entry = base.find(subpackage)
-
-                # Should never happens since we fetch the subpackage for the archive:
-                if not entry or not isinstance(entry, mobase.IFileTree):
-                    print(
-                        f"SubPackage {subpackage} not found in the archive.",
-                        file=sys.stderr,
-                    )
-                    continue
-
-                tree.merge(entry)
-
-            # Handle renames:
-            for original, new in dialog.renames().items():
-                # Entry should be at the root:
-                entry = tree.find(original)
-
-                if not entry:
-                    print(f"Plugin {original} not found, cannot rename.")
-                    continue
-
-                tree.move(entry, new)
-
-            # Move not selected plugins to optional:
-            for plugin, enabled in dialog.plugins().items():
-                if not enabled:
-                    entry = tree.find(plugin)
-                    if not entry:
-                        continue  # silently fail since the plugin should be disabled
-                    tree.addDirectory("optional").insert(entry)
+            with timer.span("assembly"):
+                tree = assemble_tree(
+                    otree,
+                    base,
+                    dialog.subpackages(),
+                    dialog.renames(),
+                    dialog.plugins(),
+                    self._diagnostics,
+                )
 
             # TODO: INI Tweaks:
             alltweaks = dialog.tweaks()
 
+            # The files are created here since the installation manager should only
+            # be used from the main thread, the actual rendering is done in
+            # _writeIniTweaks():
+            targets: List[Tuple[Path, List[WizardINISetting], Optional[Path]]] = []
             for filename, tweaks in alltweaks.items():
 
-                # Find the original file (if any):
-                o_entry = tree.find(filename)
-                o_filename: Optional[str] = None
-                if o_entry:
+                # Keep the new file at the place of the original one (if any):
+                entry, o_entry = add_ini_tweaks_file(tree, filename)
+                o_filename: Optional[Path] = None
+                if o_entry and o_entry in to_extract:
                     # Find the filepath from the list of extracted files:
                     index = to_extract.index(o_entry)
-
-                    # +1 because the first one is the script.
-                    o_filename = paths[index + 1]
-
-                # If the file existed before, we keep the new one at the same
-                # place:
-                if o_entry or Path(filename).parts[0].lower() == "ini tweaks":
-                    entry = tree.addFile(filename, replace_if_exists=True)
-
-                # Otherwise we create it in INI Tweaks
-                else:
-                    entry = tree.addFile(
-                        os.path.join("INI Tweaks", filename), replace_if_exists=True
-                    )
+                    o_filename = extracted.get(to_extract_paths[index])
 
                 filepath = self._manager().createFile(entry)
 
-                if not o_filename:
-                    data = make_ini_tweaks(tweaks)
-                else:
-                    data = merge_ini_tweaks(tweaks, Path(o_filename))
+                targets.append(
+                    (
+                        Path(filepath),
+                        tweaks,
+                        o_filename,
+                    )
+                )
 
-                with open(filepath, "w") as fp:
-                    fp.write(data)
+            if targets:
+                with timer.span("tweaks"):
+                    self._writeIniTweaks(targets, dialog.tweaksCache())
 
             # Mark stuff for saving:
             self._installerUsed = True
@@ -395,6 +725,38 @@ class WizardInstaller(mobase.IPluginInstallerSimple):
         else:
             return mobase.InstallResult.CANCELED
 
+    def _writeIniTweaks(
+        self,
+        targets: List[Tuple[Path, List[WizardINISetting], Optional[Path]]],
+        cache: IniTweaksCache,
+    ):
+        """
+        Render and write the given INI Tweaks, while showing a progress dialog.
+
+        Args:
+            targets: List of (target, tweaks, original) tuples, see write_ini_tweaks.
+            cache: The cache containing tweaks rendered for the dialog.
+        """
+        progress = QtWidgets.QProgressDialog(
+            self.tr("Creating INI Tweaks..."),
+            "",
+            0,
+            len(targets),
+            self._parentWidget(),
+        )
+        progress.setWindowModality(Qt.WindowModality.WindowModal)
+        progress.setCancelButton(None)
+        progress.setMinimumDuration(500)
+
+        def update(count: int, total: int):
+            progress.setValue(count)
+            QApplication.processEvents()
+
+        try:
+            write_ini_tweaks(targets, progress=update, cache=cache)
+        finally:
+            progress.close()
+
     def tr(self, str) -> str:
         # We need this to translate string in Python. Check the common documentation
         # for more details:
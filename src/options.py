@@ -0,0 +1,246 @@
+# -*- encoding: utf-8 -*-
+
+import difflib
+import hashlib
+import json
+import re
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Set, Tuple
+
+# Name of the plugin setting containing the saved options:
+OPTIONS_SETTING = "options"
+
+# Version of the format of the saved options:
+OPTIONS_VERSION = 1
+
+# Regex used to parse settings from the legacy format, where each description and
+# each option was stored in its own setting:
+RE_LEGACY_DESCRIPTION = re.compile(r"select([0-9]+)-description")
+RE_LEGACY_OPTION = re.compile(r"select([0-9]+)-option([0-9]+)")
+
+
+def hash_script(script: Path) -> str:
+    """
+    Compute the hash of the given script.
+
+    Args:
+        script: Path to the script.
+
+    Returns:
+        The hash of the script, as an hexadecimal string.
+    """
+    with open(script, "rb") as fp:
+        return hashlib.sha256(fp.read()).hexdigest()
+
+
+def dump_options(
+    options: Mapping[str, List[str]], script_hash: Optional[str] = None
+) -> str:
+    """
+    Serialize the given options.
+
+    Args:
+        options: The selected options, mapping page descriptions to the list of
+            selected option names.
+        script_hash: The hash of the script the options were selected for, if any.
+
+    Returns:
+        The serialized options, to be stored in a single plugin setting.
+    """
+    return json.dumps(
+        {
+            "version": OPTIONS_VERSION,
+            "script": script_hash,
+            "options": options,
+        },
+        separators=(",", ":"),
+    )
+
+
+def _load_legacy_options(settings: Mapping[str, Any]) -> Dict[str, List[str]]:
+
+    # First extract the description:
+    descriptions: Dict[int, str] = {}
+    options: Dict[int, Dict[int, str]] = defaultdict(dict)
+    for setting, value in settings.items():
+        mdesc = RE_LEGACY_DESCRIPTION.fullmatch(setting)
+        if mdesc:
+            descriptions[int(mdesc.group(1))] = str(value)
+            continue
+
+        mopt = RE_LEGACY_OPTION.fullmatch(setting)
+        if mopt:
+            options[int(mopt.group(1))][int(mopt.group(2))] = str(value)
+
+    result: Dict[str, List[str]] = {}
+    for kdesc in sorted(descriptions):
+        result[descriptions[kdesc]] = [
+            options[kdesc][index] for index in sorted(options[kdesc])
+        ]
+
+    return result
+
+
+def load_options(
+    settings: Mapping[str, Any],
+) -> Tuple[Dict[str, List[str]], Optional[str], bool]:
+    """
+    Load options from the given plugin settings.
+
+    Args:
+        settings: The plugin settings of a mod.
+
+    Returns:
+        A 3-tuple containing the options (mapping page descriptions to the list of
+        selected option names), the hash of the script the options were selected for
+        (if known), and a boolean indicating if the options were stored using the
+        legacy format.
+    """
+
+    if OPTIONS_SETTING not in settings:
+        options = _load_legacy_options(settings)
+        return options, None, bool(options)
+
+    try:
+        data = json.loads(str(settings[OPTIONS_SETTING]))
+    except ValueError:
+        return {}, None, False
+
+    if not isinstance(data, dict) or data.get("version") != OPTIONS_VERSION:
+        return {}, None, False
+
+    options = {
+        str(desc): [str(option) for option in names]
+        for desc, names in data.get("options", {}).items()
+    }
+    return options, data.get("script"), False
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.casefold().split())
+
+
+class OptionsIndex:
+    """
+    Index over previously selected options, used to restore the selection of select
+    pages.
+
+    Pages are matched by description first (exactly, then ignoring case and
+    whitespaces), and then using the names of the selected options, which allows
+    restoring the selection of pages whose description was reworded. When fuzzy
+    matching is enabled, selected options that do not exist anymore are matched
+    against options with a close name (e.g., after a script update renamed an entry).
+    """
+
+    # Minimum similarity ratios for fuzzy matching of option names and matching of
+    # reworded descriptions:
+    FUZZY_CUTOFF = 0.8
+    DESCRIPTION_CUTOFF = 0.5
+
+    _options: Mapping[str, List[str]]
+    _fuzzy: bool
+
+    # Descriptions, indexed by normalized descriptions:
+    _descriptions: Dict[str, str]
+
+    # Descriptions of pages containing a selected option, indexed by normalized
+    # option name:
+    _pages: Dict[str, List[str]]
+
+    def __init__(self, options: Mapping[str, List[str]], fuzzy: bool = True):
+        """
+        Args:
+            options: The previously selected options, mapping page descriptions to the
+                list of selected option names.
+            fuzzy: If True, fuzzy matching is used for option names that are not
+                found. Should be False if the script did not change.
+        """
+        self._options = options
+        self._fuzzy = fuzzy
+
+        self._descriptions = {}
+        self._pages = defaultdict(list)
+        for description, names in options.items():
+            self._descriptions.setdefault(_normalize(description), description)
+            for name in names:
+                self._pages[_normalize(name)].append(description)
+
+    def _find_description(
+        self, description: str, names: Sequence[str]
+    ) -> Optional[str]:
+
+        if description in self._options:
+            return description
+
+        normalized = _normalize(description)
+        if normalized in self._descriptions:
+            return self._descriptions[normalized]
+
+        # Find the saved page sharing the most selected options with the page:
+        counts: Dict[str, int] = defaultdict(int)
+        for name in names:
+            for candidate in self._pages.get(_normalize(name), ()):
+                counts[candidate] += 1
+
+        if not counts:
+            return None
+
+        # Only consider pages for which all selected options exist and whose
+        # description is close enough, since many pages share common options (e.g.
+        # "Yes" / "No"):
+        best: Optional[str] = None
+        best_key: Tuple[int, float] = (0, 0.0)
+        for candidate, count in counts.items():
+            if count < len(self._options[candidate]):
+                continue
+            ratio = difflib.SequenceMatcher(
+                None, normalized, _normalize(candidate)
+            ).ratio()
+            if ratio >= self.DESCRIPTION_CUTOFF and (count, ratio) > best_key:
+                best, best_key = candidate, (count, ratio)
+
+        return best
+
+    def match(self, description: str, names: Sequence[str]) -> Optional[Set[str]]:
+        """
+        Find the previously selected options for the given page.
+
+        Args:
+            description: The description of the page.
+            names: The names of the options of the page.
+
+        Returns:
+            The set of names (from the given names) of the options that were
+            previously selected, or None if no previous selection was found for the
+            given page.
+        """
+        saved = self._find_description(description, names)
+        if saved is None:
+            return None
+
+        # Index the options of the page:
+        exact = set(names)
+        normalized = {_normalize(name): name for name in names}
+
+        selected: Set[str] = set()
+        missing: List[str] = []
+        for name in self._options[saved]:
+            if name in exact:
+                selected.add(name)
+            elif _normalize(name) in normalized:
+                selected.add(normalized[_normalize(name)])
+            else:
+                missing.append(name)
+
+        if missing and self._fuzzy:
+            remaining = [name for name in names if name not in selected]
+            for name in missing:
+                matches = difflib.get_close_matches(
+                    name, remaining, n=1, cutoff=self.FUZZY_CUTOFF
+                )
+                if matches:
+                    selected.add(matches[0])
+                    remaining.remove(matches[0])
+
+        return selected
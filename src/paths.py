@@ -0,0 +1,141 @@
+# -*- encoding: utf-8 -*-
+
+import sys
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+
+class PathNode:
+    """
+    Node of a PathTrie, i.e., a file or a folder.
+    """
+
+    __slots__ = ("name", "parent", "children")
+
+    # Name of the file or folder (interned):
+    name: str
+
+    # Parent of the node, None for the root:
+    parent: Optional["PathNode"]
+
+    # Children of the node, None if the node has no children:
+    children: Optional[List["PathNode"]]
+
+    def __init__(self, name: str, parent: Optional["PathNode"]):
+        self.name = name
+        self.parent = parent
+        self.children = None
+
+    def path(self, sep: str) -> str:
+        """
+        Args:
+            sep: The separator to use.
+
+        Returns:
+            The path of this node, relative to the root of the trie.
+        """
+        parts: List[str] = []
+        node: Optional[PathNode] = self
+        while node is not None and node.parent is not None:
+            parts.append(node.name)
+            node = node.parent
+        return sep.join(reversed(parts))
+
+    def isUnder(self, folder: "PathNode") -> bool:
+        """
+        Args:
+            folder: The node of a folder.
+
+        Returns:
+            True if this node is a (direct or indirect) child of the given folder.
+        """
+        node = self.parent
+        while node is not None:
+            if node is folder:
+                return True
+            node = node.parent
+        return False
+
+
+class PathTrie:
+    """
+    Trie of relative paths, where folders are shared by all the paths they contain
+    and names are interned.
+
+    Sub-packages of the same archive often share most of their folders (e.g.,
+    textures/actors/character), so a single trie is used for all the sub-packages of
+    an archive, each sub-package keeping the list of its nodes.
+
+    Children are stored in plain lists. An index is used to find existing nodes while
+    the trie is built, which is dropped by seal() once all the paths are added.
+    """
+
+    _root: PathNode
+
+    # Index of the nodes by parent and name, while the trie is built:
+    _index: Optional[Dict[Tuple[int, str], PathNode]]
+
+    def __init__(self):
+        self._root = PathNode("", None)
+        self._index = {}
+
+    @property
+    def root(self) -> PathNode:
+        return self._root
+
+    def add(self, parts: Iterable[str], parent: Optional[PathNode] = None) -> PathNode:
+        """
+        Add a path to the trie.
+
+        Args:
+            parts: The parts of the path.
+            parent: The node the path is relative to, or None for the root.
+
+        Returns:
+            The node of the path.
+        """
+        node = parent or self._root
+        for part in parts:
+            child = self._child(node, part)
+            if child is None:
+                child = PathNode(sys.intern(part), node)
+                if node.children is None:
+                    node.children = []
+                node.children.append(child)
+                if self._index is not None:
+                    self._index[id(node), child.name] = child
+            node = child
+        return node
+
+    def _child(self, node: PathNode, name: str) -> Optional[PathNode]:
+        if self._index is not None:
+            return self._index.get((id(node), name))
+        for child in node.children or ():
+            if child.name == name:
+                return child
+        return None
+
+    def find(self, parts: Sequence[str]) -> Optional[PathNode]:
+        """
+        Find a path in the trie.
+
+        Args:
+            parts: The parts of the path.
+
+        Returns:
+            The node of the path, or None if the path is not in the trie.
+        """
+        node: Optional[PathNode] = self._root
+        for part in parts:
+            if not part:
+                continue
+            node = self._child(node, part)  # type: ignore
+            if node is None:
+                return None
+        return node
+
+    def seal(self):
+        """
+        Drop the index used to build the trie. Paths can still be added afterwards
+        but adding paths becomes slower.
+        """
+        self._index = None
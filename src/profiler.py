@@ -0,0 +1,183 @@
+# -*- encoding: utf-8 -*-
+
+import contextlib
+import time
+from collections import defaultdict
+from typing import Any, ContextManager, Dict, List, NamedTuple, Optional, Sequence
+
+# Shared context manager returned when no profiler is used:
+NULL_CALLBACK: ContextManager[None] = contextlib.nullcontext()
+
+
+class LineStats(NamedTuple):
+
+    # Line in the script (1-based):
+    line: int
+
+    # Number of executions of statements on this line:
+    hits: int
+
+    # Cumulative time spent executing statements on this line, including time spent
+    # in manager callbacks:
+    time: float
+
+    # Number of manager callbacks and time spent in callbacks for this line:
+    callbacks: int
+    callbacks_time: float
+
+
+class _Callback:
+
+    __slots__ = ("_profiler", "_line", "_start")
+
+    _profiler: "ScriptProfiler"
+    _line: int
+    _start: float
+
+    def __init__(self, profiler: "ScriptProfiler"):
+        self._profiler = profiler
+        self._line = profiler._line
+        self._start = 0.0
+
+    def __enter__(self) -> None:
+        self._start = time.perf_counter()
+
+    def __exit__(self, *args) -> None:
+        self._profiler._add_callback(self._line, time.perf_counter() - self._start)
+
+
+class ScriptProfiler:
+    """
+    Line-level profiler for wizard scripts.
+
+    The profiler records, for each line of the script, the number of statements
+    executed and the time spent executing them. Time spent in manager callbacks
+    (e.g., DataFileExists or GetPluginStatus) is also recorded separately for the
+    line that triggered them.
+    """
+
+    # The source of the script, if known:
+    _source: Sequence[str]
+
+    # Line currently being executed:
+    _line: int
+
+    _hits: Dict[int, int]
+    _times: Dict[int, float]
+    _callbacks: Dict[int, int]
+    _callbacks_times: Dict[int, float]
+
+    def __init__(self, source: Sequence[str] = ()):
+        """
+        Args:
+            source: The lines of the script, used to show the source of hot lines
+                in reports.
+        """
+        self._source = source
+        self._line = 0
+        self._hits = defaultdict(int)
+        self._times = defaultdict(float)
+        self._callbacks = defaultdict(int)
+        self._callbacks_times = defaultdict(float)
+
+    def step(self, context: Any) -> Any:
+        """
+        Execute the given interpreter context, recording the execution for its line.
+
+        Args:
+            context: The context to execute.
+
+        Returns:
+            The next context, see WizardInterpreterContext.exec().
+        """
+        start_token = getattr(context.context, "start", None)
+        line = start_token.line if start_token is not None else 0
+
+        self._line = line
+        start = time.perf_counter()
+        try:
+            return context.exec()
+        finally:
+            self._hits[line] += 1
+            self._times[line] += time.perf_counter() - start
+
+    def callback(self) -> ContextManager[None]:
+        """
+        Create a context manager recording the time spent in a manager callback.
+
+        Returns:
+            A context manager recording the time spent within it for the line
+            currently being executed.
+        """
+        return _Callback(self)
+
+    def _add_callback(self, line: int, duration: float):
+        self._callbacks[line] += 1
+        self._callbacks_times[line] += duration
+
+    def lines(self) -> List[LineStats]:
+        """
+        Returns:
+            The statistics for each executed line, from the most to the least
+            time-consuming.
+        """
+        # Copy the statistics first since the script may be running in another
+        # thread:
+        hits, times = dict(self._hits), dict(self._times)
+        callbacks, callbacks_times = dict(self._callbacks), dict(self._callbacks_times)
+
+        stats = [
+            LineStats(
+                line,
+                count,
+                times.get(line, 0.0),
+                callbacks.get(line, 0),
+                callbacks_times.get(line, 0.0),
+            )
+            for line, count in hits.items()
+        ]
+        stats.sort(key=lambda stat: stat.time, reverse=True)
+        return stats
+
+    def report(self, limit: Optional[int] = 20) -> str:
+        """
+        Create a textual report of the hot lines of the script.
+
+        Args:
+            limit: Maximum number of lines to include in the report, or None to
+                include all the executed lines.
+
+        Returns:
+            The report, as a table with one row per line.
+        """
+        stats = self.lines()
+        total = sum(stat.time for stat in stats)
+
+        rows = [
+            "{:>6} {:>10} {:>12} {:>7} {:>10} {:>12}  {}".format(
+                "Line", "Hits", "Time (ms)", "%", "Callbacks", "Cb. (ms)", "Source"
+            )
+        ]
+        for stat in stats[:limit]:
+            source = ""
+            if 0 < stat.line <= len(self._source):
+                source = self._source[stat.line - 1].strip()
+            rows.append(
+                "{:>6} {:>10} {:>12.3f} {:>7.1f} {:>10} {:>12.3f}  {}".format(
+                    stat.line,
+                    stat.hits,
+                    stat.time * 1000,
+                    100 * stat.time / total if total else 0,
+                    stat.callbacks,
+                    stat.callbacks_time * 1000,
+                    source,
+                )
+            )
+
+        rows.append("")
+        rows.append(
+            f"{sum(stat.hits for stat in stats)} statements executed "
+            f"in {total * 1000:.3f} ms."
+        )
+
+        return "\n".join(rows)
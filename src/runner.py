@@ -1,53 +1,348 @@
 # -*- encoding: utf-8 -*-
 
-import sys
+import os
+import time
 from pathlib import Path
-from typing import Iterable, List, Optional
-
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    ContextManager,
+    Dict,
+    FrozenSet,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Type,
+)
+
+from wizard.contexts import (
+    WizardInterpreterContext,
+    WizardRequireVersionsContext,
+    WizardSelectContext,
+    WizardSelectManyContext,
+    WizardSelectOneContext,
+    WizardTerminationContext,
+)
+from wizard.errors import WizardError
 from wizard.interpreter import WizardInterpreter
 from wizard.manager import ManagerModInterface
+from wizard.runner import WizardRunnerState
 from wizard.severity import SeverityContext
 from wizard.utils import make_runner_context_factory
-from wizard.value import SubPackage, SubPackages
+from wizard.value import Plugin, SubPackage, SubPackages
 
 import mobase
 
+if TYPE_CHECKING:
+    from PyQt6.QtCore import QDir
+
+from .cache import ArchiveAnalysis
+from .diagnostics import InstallDiagnostics, report_warning
+from .options import OptionsIndex
+from .paths import PathNode, PathTrie
+from .profiler import NULL_CALLBACK, ScriptProfiler
+from .timing import InstallTimer
+
+WizardRunnerContext = WizardInterpreterContext[WizardRunnerState, Any]
+
+# Function calling the given function on the main thread, see MainThreadDispatcher:
+Dispatch = Callable[[Callable[[], Any]], Any]
+
+
+def _direct_call(fn: Callable[[], Any]) -> Any:
+    return fn()
+
 
 class MO2SubPackage(SubPackage):
 
     _tree: mobase.IFileTree
-    _files: List[str]
 
-    def __init__(self, tree: mobase.IFileTree):
+    # Trie containing the paths of the files, relative to the sub-package (shared by
+    # the sub-packages of an archive), and the nodes of the files of the sub-package,
+    # in the order of the archive:
+    _paths: PathTrie
+    _nodes: List[PathNode]
+
+    # Path of the sub-package in the archive, with a trailing separator, and the
+    # separator used in the paths of the files:
+    _prefix: str
+    _sep: str
+
+    # Plugins of the sub-package, if known from a cached analysis:
+    _plugins: Optional[List[Plugin]]
+
+    def __init__(
+        self,
+        tree: mobase.IFileTree,
+        timer: Optional[InstallTimer] = None,
+        files: Optional[List[str]] = None,
+        plugins: Optional[List[str]] = None,
+        paths: Optional[PathTrie] = None,
+    ):
+        """
+        Args:
+            tree: The tree of the sub-package.
+            timer: Timer used to count the walked entries.
+            files: The files of the sub-package, if known, in which case the tree is
+                not walked.
+            plugins: The plugins of the sub-package, if known.
+            paths: The trie to store the paths of the files in, shared with the other
+                sub-packages of the archive, if any.
+        """
         super().__init__(tree.name())
         self._tree = tree
+        self._plugins = None if plugins is None else [Plugin(p) for p in plugins]
+        self._paths = paths if paths is not None else PathTrie()
+        self._nodes = []
+        self._prefix = ""
+        self._sep = os.sep
+
+        if files is not None and self._addFiles(files):
+            return
 
         # We cannot perform lazy iteration on the tree in a Python way so we
-        # have to list the files:
+        # have to list the files (consecutive entries usually share their folder):
+        folder: Optional[str] = None
+        parent: Optional[PathNode] = None
+
+        def fn(path: str, entry: mobase.FileTreeEntry) -> mobase.IFileTree.WalkReturn:
+            nonlocal folder, parent
+            if not self._nodes:
+                # The first entry is a direct child of the sub-package:
+                fullpath = entry.path()
+                self._prefix = fullpath[: len(fullpath) - len(entry.name())]
+                self._sep = self._prefix[-1:] or os.sep
+            if path != folder:
+                folder = path
+                parent = self._paths.add(path.split("/")[:-1])
+            self._nodes.append(self._paths.add((entry.name(),), parent))
+            return mobase.IFileTree.CONTINUE
 
-        self._files = []
+        self._tree.walk(fn, "/")
 
-        def fn(folder, entry) -> mobase.IFileTree.WalkReturn:
-            self._files.append(entry.path())
-            return mobase.IFileTree.CONTINUE
+        if timer is not None:
+            timer.count("walk")
+            timer.count("walk_entries", len(self._nodes))
+
+    def _addFiles(self, files: List[str]) -> bool:
+        """
+        Add the given files to this sub-package.
 
-        self._tree.walk(fn)
+        Args:
+            files: The paths of the files in the archive.
+
+        Returns:
+            True if the files were added, False if some files are not in the
+            sub-package.
+        """
+        prefix = self._tree.path()
+        if files:
+            self._prefix = files[0][: len(prefix) + 1]
+            self._sep = self._prefix[-1:]
+        if any(not file.startswith(self._prefix) for file in files):
+            return False
+
+        self._nodes = [
+            self._paths.add(file[len(self._prefix) :].split(self._sep))
+            for file in files
+        ]
+        return True
+
+    def _path(self, node: PathNode) -> str:
+        return self._prefix + node.path(self._sep)
 
     @property
     def files(self) -> Iterable[str]:
-        return self._files
+        return (self._path(node) for node in self._nodes)
+
+    def findFiles(
+        self, folder: str = "", suffixes: Sequence[str] = ()
+    ) -> Iterator[str]:
+        """
+        Find files of this sub-package by folder and suffix.
+
+        Args:
+            folder: The folder (relative to the sub-package) to find files in, or an
+                empty string for all the files.
+            suffixes: The suffixes of the files to find (case-sensitive, e.g., ".esp"),
+                or an empty sequence for all the files.
+
+        Returns:
+            The paths (in the archive) of the matching files, in order.
+        """
+        root: Optional[PathNode] = None
+        if folder:
+            root = self._paths.find(folder.replace("\\", "/").split("/"))
+            if root is None:
+                return iter(())
+
+        sfx = tuple(suffixes)
+        return (
+            self._path(node)
+            for node in self._nodes
+            if (not sfx or node.name.endswith(sfx))
+            and (root is None or node.isUnder(root))
+        )
+
+    def plugins(self) -> Iterable[Plugin]:
+        if self._plugins is not None:
+            return iter(self._plugins)
+
+        # Same as SubPackage.plugins(), without building the paths:
+        return (Plugin(node.name) for node in self._nodes if self.is_plugin(node.name))
 
 
 class MO2SeverityContext(SeverityContext):
 
     _organizer: mobase.IOrganizer
+    _diagnostics: Optional[InstallDiagnostics]
 
-    def __init__(self, organizer: mobase.IOrganizer):
+    def __init__(
+        self,
+        organizer: mobase.IOrganizer,
+        diagnostics: Optional[InstallDiagnostics] = None,
+    ):
         super().__init__()
         self._organizer = organizer
+        self._diagnostics = diagnostics
 
     def warning(self, text: str):
-        print(text, file=sys.stderr)
+        report_warning(text, self._diagnostics)
+
+
+class SubPackageClassifier:
+    """
+    Classification of the folders of an archive as sub-packages, see
+    isSubPackage().
+
+    Results are memoized by path, so a folder is only classified once per archive
+    even if multiple managers are created for it (e.g., when ranking wizard bases),
+    and cheap checks on the names of the folder and of its children are done before
+    calling into the mod data checker, which may scan the whole folder.
+
+    The names of children that usually make a folder a data folder are only used as
+    a fast path once the mod data checker of the game accepted a folder with the same
+    names (or a subset of them), and names found in a folder rejected by the checker
+    are ignored, so the classification does not depend on the game the names were
+    chosen for.
+    """
+
+    # Folders and extensions of files that make a folder look like a data folder for
+    # Gamebryo games, used as a fast path once confirmed by the mod data checker:
+    DATA_FOLDERS = frozenset(
+        ("interface", "meshes", "music", "scripts", "sound", "strings", "textures")
+    )
+    DATA_EXTENSIONS = (".esp", ".esm", ".esl", ".bsa", ".ba2")
+
+    # Folders that make a folder a sub-package, even if it is not a data folder:
+    INI_FOLDERS = frozenset(("ini tweaks", "ini"))
+
+    _checker: Optional[mobase.ModDataChecker]
+    _timer: InstallTimer
+
+    # Classification of the folders, by path:
+    _results: Dict[str, bool]
+
+    # Sets of names of folders and extensions of files from DATA_FOLDERS and
+    # DATA_EXTENSIONS found in folders accepted by the mod data checker, and names
+    # found in folders rejected by the checker:
+    _accepted: List[FrozenSet[str]]
+    _rejected: Set[str]
+
+    def __init__(
+        self,
+        checker: Optional[mobase.ModDataChecker],
+        timer: Optional[InstallTimer] = None,
+    ):
+        """
+        Args:
+            checker: The mod data checker of the game, if any.
+            timer: Timer to count the checker calls in, if any.
+        """
+        self._checker = checker
+        self._timer = timer or InstallTimer()
+        self._results = {}
+        self._accepted = []
+        self._rejected = set()
+
+    def isSubPackage(self, tree: mobase.IFileTree) -> bool:
+        """
+        Check if the given folder is a sub-package, i.e., if it is a data folder
+        (according to the mod data checker of the game), contains INI tweaks, or is
+        a documentation folder (e.g., "90 Docs").
+
+        Args:
+            tree: The folder to check.
+
+        Returns:
+            True if the folder is a sub-package.
+        """
+        key = tree.path("/")
+        result = self._results.get(key)
+        if result is not None:
+            self._timer.count("classification_hits")
+            return result
+
+        result = self._classify(tree)
+        self._results[key] = result
+        return result
+
+    def _classify(self, tree: mobase.IFileTree) -> bool:
+        # Folders with format "XXX Docs" where "XXX" is a number:
+        parts = tree.name().split()
+        if (
+            len(parts) >= 2
+            and parts[0].isdigit()
+            and parts[1].lower().startswith("doc")
+        ):
+            self._timer.count("checker_avoided")
+            return True
+
+        if self._checker is None:
+            return any(
+                isinstance(entry, mobase.IFileTree)
+                and entry.name().lower() in self.INI_FOLDERS
+                for entry in tree
+            )
+
+        # A single pass over the children, the checker is only required if no INI
+        # folder is found and the names are not the ones of an accepted folder:
+        candidates: Set[str] = set()
+        for entry in tree:
+            name = entry.name().lower()
+            if isinstance(entry, mobase.IFileTree):
+                if name in self.INI_FOLDERS:
+                    self._timer.count("checker_avoided")
+                    return True
+                if name not in self.DATA_FOLDERS:
+                    continue
+            elif name.endswith(self.DATA_EXTENSIONS):
+                name = os.path.splitext(name)[1]
+            else:
+                continue
+
+            if name not in self._rejected:
+                candidates.add(name)
+
+        if any(accepted <= candidates for accepted in self._accepted):
+            self._timer.count("checker_avoided")
+            return True
+
+        self._timer.count("checker_calls")
+        valid = self._checker.dataLooksValid(tree) == mobase.ModDataChecker.VALID
+
+        # If no name was found, the folder was accepted for other reasons:
+        if not valid:
+            self._rejected.update(candidates)
+        elif candidates:
+            self._accepted.append(frozenset(candidates))
+        return valid
 
 
 class MO2ManagerModInterface(ManagerModInterface):
@@ -55,46 +350,101 @@ class MO2ManagerModInterface(ManagerModInterface):
     _organizer: mobase.IOrganizer
     _game: mobase.IPluginGame
     _subpackages: SubPackages
-
-    def __init__(self, tree: mobase.IFileTree, organizer: mobase.IOrganizer):
+    _timer: InstallTimer
+    _profiler: Optional[ScriptProfiler]
+
+    # The callbacks are called from the thread running the interpreter, so the
+    # versions and data directory are retrieved beforehand, and the other calls to
+    # the organizer are forwarded to the main thread:
+    _dispatch: Dispatch
+    _gameVersion: str
+    _extenderVersion: Optional[str]
+    _dataDirectory: "QDir"
+
+    def __init__(
+        self,
+        tree: mobase.IFileTree,
+        organizer: mobase.IOrganizer,
+        timer: Optional[InstallTimer] = None,
+        profiler: Optional[ScriptProfiler] = None,
+        analysis: Optional[ArchiveAnalysis] = None,
+        classifier: Optional[SubPackageClassifier] = None,
+        dispatch: Optional[Dispatch] = None,
+    ):
 
         self._organizer = organizer
         self._game = organizer.managedGame()
+        self._timer = timer or InstallTimer()
+        self._profiler = profiler
 
-        checker: mobase.ModDataChecker = self._game.feature(
-            mobase.ModDataChecker  # type: ignore
-        )
+        self._dispatch = dispatch or _direct_call
+        self._gameVersion = self._game.gameVersion()
+        se = self._game.feature(mobase.ScriptExtender)  # type: ignore
+        self._extenderVersion = se.getExtenderVersion() if se else None
+        self._dataDirectory = self._game.dataDirectory()
+
+        if analysis is not None and self._loadSubpackages(tree, analysis):
+            self._timer.count("cached_subpackages", len(self._subpackages))
+            return
 
-        # Read the subpackages:
+        if classifier is None:
+            classifier = SubPackageClassifier(
+                self._game.feature(mobase.ModDataChecker), self._timer  # type: ignore
+            )
+
+        # Read the subpackages, sharing the paths of their files:
+        paths = PathTrie()
         self._subpackages = SubPackages()
         for entry in tree:
-            if isinstance(entry, mobase.IFileTree):
-                if checker:
-                    if checker.dataLooksValid(entry) == mobase.ModDataChecker.VALID:
-                        self._subpackages.append(MO2SubPackage(entry))
-                        continue
-
-                # Add entry with INI tweaks:
-                if entry.exists("INI Tweaks") or entry.exists("INI"):
-                    self._subpackages.append(MO2SubPackage(entry))
-                    continue
+            if isinstance(entry, mobase.IFileTree) and classifier.isSubPackage(entry):
+                self._subpackages.append(MO2SubPackage(entry, self._timer, paths=paths))
+        paths.seal()
+
+    def _loadSubpackages(
+        self, tree: mobase.IFileTree, analysis: ArchiveAnalysis
+    ) -> bool:
+        """
+        Create the sub-packages from a cached analysis of the archive.
 
-                # We add folder with format "XXX Docs" where "XXX" is a number.
-                parts = entry.name().split()
-                if (
-                    len(parts) >= 2
-                    and parts[0].isdigit()
-                    and parts[1].lower().startswith("doc")
-                ):
-                    self._subpackages.append(MO2SubPackage(entry))
+        Args:
+            tree: The base tree of the archive.
+            analysis: The cached analysis.
+
+        Returns:
+            True if the sub-packages were created, False if the analysis does not
+            match the tree.
+        """
+        paths = PathTrie()
+        self._subpackages = SubPackages()
+        for name, files in analysis.subpackages.items():
+            entry = tree.find(name, mobase.FileTreeEntry.DIRECTORY)
+            if not isinstance(entry, mobase.IFileTree):
+                return False
+            self._subpackages.append(
+                MO2SubPackage(
+                    entry, self._timer, files, analysis.plugins.get(name, None), paths
+                )
+            )
+        paths.seal()
+        return True
 
     @property
     def subpackages(self) -> SubPackages:
         return self._subpackages
 
+    def _callback(self) -> ContextManager[None]:
+        # Record the time spent in the callback if the script is profiled:
+        if self._profiler is None:
+            return NULL_CALLBACK
+        return self._profiler.callback()
+
     def compareGameVersion(self, version: str) -> int:
+        with self._callback():
+            return self._compareGameVersion(version)
+
+    def _compareGameVersion(self, version: str) -> int:
         v1 = mobase.VersionInfo(version)
-        v2 = mobase.VersionInfo(self._game.gameVersion())
+        v2 = mobase.VersionInfo(self._gameVersion)
         if v1 < v2:
             return 1
         elif v1 > v2:
@@ -103,11 +453,14 @@ class MO2ManagerModInterface(ManagerModInterface):
             return 0
 
     def compareSEVersion(self, version: str) -> int:
-        se = self._game.feature(mobase.ScriptExtender)  # type: ignore
-        if not se:
+        with self._callback():
+            return self._compareSEVersion(version)
+
+    def _compareSEVersion(self, version: str) -> int:
+        if self._extenderVersion is None:
             return 1
         v1 = mobase.VersionInfo(version)
-        v2 = mobase.VersionInfo(se.getExtenderVersion())
+        v2 = mobase.VersionInfo(self._extenderVersion)
         if v1 < v2:
             return 1
         elif v1 > v2:
@@ -138,7 +491,7 @@ class MO2ManagerModInterface(ManagerModInterface):
         # then in data again, e.g. ../data/xxx.esp.
         path: Optional[Path]
         if filepath.startswith(".."):
-            path = Path(self._game.dataDirectory().absoluteFilePath(filepath))
+            path = Path(self._dataDirectory.absoluteFilePath(filepath))
             if not path.exists():
                 path = None
         else:
@@ -147,7 +500,11 @@ class MO2ManagerModInterface(ManagerModInterface):
             if parent == ".":
                 parent = ""
 
-            files = self._organizer.findFiles(parent, "*" + path.name)
+            self._timer.count("findFiles")
+            pattern = "*" + path.name
+            files = self._dispatch(
+                lambda: self._organizer.findFiles(parent, pattern)  # type: ignore
+            )
             if files:
                 path = Path(files[0])
             else:
@@ -156,13 +513,19 @@ class MO2ManagerModInterface(ManagerModInterface):
         return path
 
     def dataFileExists(self, *filepaths: str) -> bool:
-        return all(self._resolve(path) for path in filepaths)
+        with self._callback():
+            return all(self._resolve(path) for path in filepaths)
 
     def getPluginLoadOrder(self, filename: str, fallback: int = -1) -> int:
-        return self._organizer.pluginList().loadOrder(filename)
+        with self._callback():
+            order: int = self._dispatch(
+                lambda: self._organizer.pluginList().loadOrder(filename)
+            )
+        return order
 
     def getPluginStatus(self, filename) -> int:
-        state = self._organizer.pluginList().state(filename)
+        with self._callback():
+            state = self._dispatch(lambda: self._organizer.pluginList().state(filename))
 
         if state == mobase.PluginState.ACTIVE:
             return 2
@@ -171,27 +534,348 @@ class MO2ManagerModInterface(ManagerModInterface):
         return -1
 
     def getFilename(self, filepath: str) -> str:
-        path = self._resolve(filepath)
+        with self._callback():
+            path = self._resolve(filepath)
         if path:
             if path.is_file():
                 return path.name
         return ""
 
     def getFolder(self, filepath: str) -> str:
-        path = self._resolve(filepath)
+        with self._callback():
+            path = self._resolve(filepath)
         if path:
             if path.is_dir():
                 return path.name
         return ""
 
 
+# Default maximum depth of the folder containing wizard.txt in an archive:
+WIZARD_MAX_DEPTH = 3
+
+
+class WizardBase(NamedTuple):
+
+    # Folder containing the script, and the script:
+    tree: mobase.IFileTree
+    script: mobase.FileTreeEntry
+
+    # Depth of the folder in the archive (0 for the root):
+    depth: int
+
+    # Number of folders of the base that are sub-packages:
+    score: int
+
+
+def _is_wrapped(tree: mobase.IFileTree, folder: mobase.IFileTree) -> bool:
+    """
+    Check if the given folder is only wrapped in folders without other entries.
+
+    Args:
+        tree: The root of the archive.
+        folder: A folder of the archive.
+
+    Returns:
+        True if each folder between the given tree and the given folder (excluded)
+        only contains a single entry.
+    """
+    parent = folder.parent()
+    while parent is not None:
+        if len(parent) != 1:
+            return False
+        if parent.path("/") == tree.path("/"):
+            return True
+        parent = parent.parent()
+    return False
+
+
+def find_wizard_bases(
+    tree: mobase.IFileTree,
+    max_depth: int = WIZARD_MAX_DEPTH,
+    classifier: Optional[SubPackageClassifier] = None,
+) -> List[WizardBase]:
+    """
+    Find the folders containing a wizard.txt file (case-insensitive), walking the
+    tree only once and up to the given depth.
+
+    Folders below the given tree are only candidates if they contain sub-packages or
+    if they are wrapped in folders without other entries (e.g., "Mod/Mod v1.0/"),
+    so that a stray wizard.txt (e.g., in a documentation folder) is not enough to
+    claim an archive.
+
+    The candidates are ranked by how much they look like a BAIN package: folders
+    with sub-packages first, then shallower folders first, then folders with more
+    sub-packages first.
+
+    Args:
+        tree: Tree to look the wizard in.
+        max_depth: Maximum depth of the folder containing wizard.txt, 0 to only look
+            at the given tree.
+        classifier: Classifier used to count the sub-packages of the candidates, or
+            None to only rank them by depth.
+
+    Returns:
+        The candidates, best first.
+    """
+    scripts: List[Tuple[int, mobase.FileTreeEntry]] = []
+
+    def fn(path: str, entry: mobase.FileTreeEntry) -> mobase.IFileTree.WalkReturn:
+        depth = path.count("/")
+        if isinstance(entry, mobase.IFileTree):
+            if depth >= max_depth:
+                return mobase.IFileTree.SKIP
+        elif entry.name().casefold() == "wizard.txt":
+            scripts.append((depth, entry))
+        return mobase.IFileTree.CONTINUE
+
+    tree.walk(fn, "/")
+
+    bases: List[WizardBase] = []
+    for depth, script in scripts:
+        base = script.parent()
+        if base is None:
+            continue
+        score = 0
+        if classifier is not None:
+            score = sum(
+                1
+                for entry in base
+                if isinstance(entry, mobase.IFileTree)
+                and classifier.isSubPackage(entry)
+            )
+        if depth > 0 and score == 0 and not _is_wrapped(tree, base):
+            continue
+        bases.append(WizardBase(base, script, depth, score))
+
+    # The sort is stable, so ties are kept in the order of the walk:
+    bases.sort(key=lambda base: (base.score == 0, base.depth, -base.score))
+    return bases
+
+
+def find_wizard_base(
+    tree: mobase.IFileTree,
+    max_depth: int = WIZARD_MAX_DEPTH,
+    classifier: Optional[SubPackageClassifier] = None,
+) -> Optional[mobase.IFileTree]:
+    """
+    Find the best folder containing wizard.txt, see find_wizard_bases().
+
+    Args:
+        tree: Tree to look the wizard in.
+        max_depth: Maximum depth of the folder containing wizard.txt.
+        classifier: Classifier used to rank the candidates, if any.
+
+    Returns:
+        The tree corresponding to the folder containing wizard.txt, or None.
+    """
+    bases = find_wizard_bases(tree, max_depth, classifier)
+    return bases[0].tree if bases else None
+
+
 def make_interpreter(
-    base: mobase.IFileTree, organizer: mobase.IOrganizer
+    base: mobase.IFileTree,
+    organizer: mobase.IOrganizer,
+    timer: Optional[InstallTimer] = None,
+    profiler: Optional[ScriptProfiler] = None,
+    analysis: Optional[ArchiveAnalysis] = None,
+    classifier: Optional[SubPackageClassifier] = None,
+    diagnostics: Optional[InstallDiagnostics] = None,
+    dispatch: Optional[Dispatch] = None,
 ) -> WizardInterpreter:
 
-    manager = MO2ManagerModInterface(base, organizer)
-    severity = MO2SeverityContext(organizer)
+    manager = MO2ManagerModInterface(
+        base, organizer, timer, profiler, analysis, classifier, dispatch
+    )
+    severity = MO2SeverityContext(organizer, diagnostics)
 
     factory = make_runner_context_factory(manager.subpackages, manager, severity)
 
     return WizardInterpreter(factory)
+
+
+def make_analysis(
+    base: mobase.IFileTree, subpackages: Iterable[SubPackage]
+) -> ArchiveAnalysis:
+    """
+    Create the analysis of an archive, to be cached.
+
+    Args:
+        base: The folder containing the wizard.
+        subpackages: The sub-packages of the archive.
+
+    Returns:
+        The analysis of the archive.
+    """
+    return ArchiveAnalysis(
+        base.path("/"),
+        {sp.name: list(sp.files) for sp in subpackages},
+        {sp.name: [plugin.name for plugin in sp.plugins()] for sp in subpackages},
+    )
+
+
+def make_plugins_index(
+    subpackages: Iterable[SubPackage], candidates: Optional[Set[str]] = None
+) -> Dict[str, List[Plugin]]:
+    """
+    Index the plugins of the given sub-packages.
+
+    Args:
+        subpackages: The sub-packages to index.
+        candidates: The names (case-folded) of the sub-packages the script can
+            select, see ScriptAnalysis.candidateSubPackages(), or None if any
+            sub-package can be selected. The plugins of other sub-packages are not
+            indexed since they cannot be installed.
+
+    Returns:
+        A mapping from sub-package names to the list of plugins in the sub-package,
+        in the order of the given sub-packages.
+    """
+    return {
+        sp.name: (
+            list(sp.plugins())
+            if candidates is None or sp.name.casefold() in candidates
+            else []
+        )
+        for sp in subpackages
+    }
+
+
+class WizardInterruptedError(WizardError):
+    """
+    Error raised when the execution of a script is interrupted, either because it
+    was requested or because the execution exceeded its budget.
+    """
+
+    pass
+
+
+def exec_until(
+    context: WizardRunnerContext,
+    targets: Sequence[Type[WizardInterpreterContext]],
+    skip: Callable[[WizardRunnerContext], bool] = lambda context: False,
+    exec_first: bool = False,
+    max_steps: int = 0,
+    max_time: float = 0,
+    interrupted: Callable[[], bool] = lambda: False,
+    profiler: Optional[ScriptProfiler] = None,
+) -> WizardRunnerContext:
+    """
+    Execute the contexts until a context of the given type is found, or a termination
+    context is found.
+
+    This is similar to WizardInterpreter.exec_until() but can be interrupted.
+
+    Args:
+        context: The start context.
+        targets: Target context types.
+        skip: Function called for each target context found. If it returns True,
+            the context is executed instead of being returned.
+        exec_first: If True, the start context is executed even if it is one of
+            the targets.
+        max_steps: Maximum number of contexts to execute, or 0 for no limit.
+        max_time: Maximum execution time, in seconds, or 0 for no limit.
+        interrupted: Function called before each step, if it returns True, the
+            execution is stopped.
+        profiler: Profiler to record the execution of each step with, if any.
+
+    Returns:
+        The next context (one of the targets or a termination contexts).
+
+    Raises:
+        WizardInterruptedError: If the execution was interrupted or exceeded one of
+            its budget.
+    """
+    stargets = tuple(targets) + (WizardTerminationContext,)
+
+    start = time.monotonic()
+    steps = 0
+
+    while exec_first or not isinstance(context, stargets) or skip(context):
+        exec_first = False
+
+        if interrupted():
+            raise WizardInterruptedError(
+                context.context, "The execution of the script was stopped."
+            )
+
+        steps += 1
+        if max_steps and steps > max_steps:
+            raise WizardInterruptedError(
+                context.context,
+                f"The execution of the script exceeded {max_steps} steps.",
+            )
+
+        if max_time and time.monotonic() - start > max_time:
+            raise WizardInterruptedError(
+                context.context,
+                f"The execution of the script exceeded {max_time} seconds.",
+            )
+
+        if profiler is None:
+            context = context.exec()
+        else:
+            context = profiler.step(context)
+
+    return context
+
+
+def run_headless(
+    context: WizardRunnerContext,
+    options: Optional[OptionsIndex] = None,
+    max_steps: int = 0,
+    max_time: float = 0,
+) -> WizardTerminationContext[WizardRunnerState]:
+    """
+    Execute a script until its end without user interaction.
+
+    Each select page is answered as the dialog would pre-select it: with the
+    previously selected options if some are found in the given index, or with the
+    default options of the page otherwise. Version requirements are ignored.
+
+    Args:
+        context: The start context.
+        options: The index of previously selected options, if any.
+        max_steps: Maximum number of contexts to execute between two pages, or 0
+            for no limit.
+        max_time: Maximum execution time between two pages, in seconds, or 0 for
+            no limit.
+
+    Returns:
+        The termination context.
+
+    Raises:
+        WizardInterruptedError: If the execution exceeded one of its budget.
+    """
+    targets = (WizardSelectContext, WizardRequireVersionsContext)
+
+    context = exec_until(context, targets, max_steps=max_steps, max_time=max_time)
+    while not isinstance(context, WizardTerminationContext):
+        if isinstance(context, WizardSelectContext):
+            selected = None
+            if options is not None:
+                selected = options.match(
+                    context.description, [option.name for option in context.options]
+                )
+
+            # Same as the select pages of the dialog, an empty match uses the
+            # defaults and the last matching option is kept for SelectOne:
+            if isinstance(context, WizardSelectOneContext):
+                choice = context.default
+                if selected:
+                    choice = [o for o in context.options if o.name in selected][-1]
+                context = context.select(choice)
+            elif isinstance(context, WizardSelectManyContext):
+                choices = context.defaults
+                if selected:
+                    choices = [o for o in context.options if o.name in selected]
+                context = context.select(choices)
+
+        context = exec_until(
+            context,
+            targets,
+            exec_first=True,
+            max_steps=max_steps,
+            max_time=max_time,
+        )
+
+    return context
@@ -0,0 +1,143 @@
+# -*- encoding: utf-8 -*-
+
+import contextlib
+import json
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, ContextManager, Dict, Optional
+
+# Shared context manager returned by disabled timers:
+_NULL_SPAN: ContextManager[None] = contextlib.nullcontext()
+
+
+class _Span:
+
+    __slots__ = ("_timer", "_name", "_start")
+
+    _timer: "InstallTimer"
+    _name: str
+    _start: float
+
+    def __init__(self, timer: "InstallTimer", name: str):
+        self._timer = timer
+        self._name = name
+        self._start = 0.0
+
+    def __enter__(self) -> None:
+        self._start = time.perf_counter()
+
+    def __exit__(self, *args) -> None:
+        self._timer._add_span(self._name, time.perf_counter() - self._start)
+
+
+class InstallTimer:
+    """
+    Timings and counters recorded during an installation.
+
+    Timings are recorded using spans (context managers) and are accumulated per name,
+    e.g., spans for each execution of the interpreter are summed. When the timer is
+    disabled, spans and counters do nothing.
+
+    Timers can be shared with the thread running the interpreter, so updates are
+    protected by a lock.
+    """
+
+    _enabled: bool
+    _lock: threading.Lock
+
+    # Cumulative time (in seconds) and number of spans, per name:
+    _spans: Dict[str, float]
+    _calls: Dict[str, int]
+
+    # Counters, per name:
+    _counters: Dict[str, int]
+
+    def __init__(self, enabled: bool = False):
+        """
+        Args:
+            enabled: True to record timings and counters.
+        """
+        self._enabled = enabled
+        self._lock = threading.Lock()
+        self._spans = defaultdict(float)
+        self._calls = defaultdict(int)
+        self._counters = defaultdict(int)
+
+    @property
+    def enabled(self) -> bool:
+        return self._enabled
+
+    def span(self, name: str) -> ContextManager[None]:
+        """
+        Create a span recording the time spent in a with-block.
+
+        Args:
+            name: The name of the span.
+
+        Returns:
+            A context manager recording the time spent within it.
+        """
+        if not self._enabled:
+            return _NULL_SPAN
+        return _Span(self, name)
+
+    def count(self, name: str, value: int = 1):
+        """
+        Increment a counter.
+
+        Args:
+            name: The name of the counter.
+            value: The value to add to the counter.
+        """
+        if self._enabled:
+            with self._lock:
+                self._counters[name] += value
+
+    def _add_span(self, name: str, duration: float):
+        with self._lock:
+            self._spans[name] += duration
+            self._calls[name] += 1
+
+    def report(self) -> Dict[str, Any]:
+        """
+        Returns:
+            The recorded timings and counters, as a JSON-serializable dictionary.
+        """
+        with self._lock:
+            return {
+                "spans": {
+                    name: {"time": round(duration, 6), "calls": self._calls[name]}
+                    for name, duration in self._spans.items()
+                },
+                "counters": dict(self._counters),
+            }
+
+    def dump(self, path: Path, **extra: Any) -> Optional[Dict[str, Any]]:
+        """
+        Append the recorded timings and counters to the given file, as a single JSON
+        line. Nothing is written if the timer is disabled.
+
+        Args:
+            path: The file to append the record to. Parent folders are created if
+                needed.
+            **extra: Additional values to include in the record.
+
+        Returns:
+            The record written to the file, or None if the timer is disabled.
+        """
+        if not self._enabled:
+            return None
+
+        record = {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            **extra,
+            **self.report(),
+        }
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "a", encoding="utf-8") as fp:
+            fp.write(json.dumps(record) + "\n")
+
+        return record
@@ -1,172 +1,562 @@
 # -*- encoding: utf-8 -*-
 
+import io
 import re
-from pathlib import Path
-from typing import Dict, List, Mapping
-
-from wizard.tweaks import WizardINISetting, WizardINISettingEdit
+from operator import attrgetter
+from pathlib import Path, PureWindowsPath
+from typing import (
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    TextIO,
+    Tuple,
+)
+
+from wizard.tweaks import WizardINISetting, WizardINISettingEdit, WizardINITweaks
+
+from .diagnostics import InstallDiagnostics, report_warning
+
+# Sections (lower case) corresponding to OBSE script tweaks:
+OBSCRIPT_SECTIONS = frozenset(("set", "setgs", "setnumericgamesetting"))
+
+# This is from Wrye Bash (and the merge function is inspired from Wrye Bash):
+RE_OBSCRIPT_COMMENT = re.compile(";.*", re.U)
+RE_OBSCRIPT_DELETED = re.compile(r";-(\w.*?)$", re.U)
+RE_OBSCRIPT_SETTINGS = (
+    (re.compile(r"\s*set\s+(.+?)\s+to\s+(.*)", re.I | re.U), "set", "set {} to {}"),
+    (re.compile(r"\s*setGS\s+(.+?)\s+(.*)", re.I | re.U), "setgs", "setGS {} {}"),
+    (
+        re.compile(r"\s*SetNumericGameSetting\s+(.+?)\s+(.*)", re.I | re.U),
+        "setnumericgamesetting",
+        "SetNumericGameSetting {} {}",
+    ),
+)
+
+
+def split_ini_tweaks(
+    tweaks: Iterable[WizardINISetting],
+) -> Tuple[List[WizardINISetting], Dict[str, List[WizardINISetting]]]:
+    """
+    Split the given tweaks between OBSE script tweaks and standard INI tweaks, in a
+    single pass.
+
+    Args:
+        tweaks: The tweaks to split.
+
+    Returns:
+        A 2-tuple containing the list of OBSE script tweaks, and the standard INI
+        tweaks grouped by section.
+    """
+    obscript: List[WizardINISetting] = []
+    sections: Dict[str, List[WizardINISetting]] = {}
+    for tweak in tweaks:
+        if tweak.section.lower() in OBSCRIPT_SECTIONS:
+            obscript.append(tweak)
+        elif tweak.section in sections:
+            sections[tweak.section].append(tweak)
+        else:
+            sections[tweak.section] = [tweak]
+    return obscript, sections
 
 
-def make_obscript_ini_tweaks(tweaks: List[WizardINISetting]) -> str:
+def group_ini_tweaks(
+    tweaks: Iterable[WizardINISetting],
+) -> Dict[str, List[WizardINISetting]]:
+    """
+    Group the given tweaks by section, without separating OBSE script tweaks.
 
-    lines = []
+    Args:
+        tweaks: The tweaks to group.
 
+    Returns:
+        The tweaks grouped by section.
+    """
+    sections: Dict[str, List[WizardINISetting]] = {}
     for tweak in tweaks:
-        if not isinstance(tweak, WizardINISettingEdit):
-            continue
-        line = f"{tweak.section} {tweak.setting} to {tweak.value}"
-        if tweak.comment:
-            line += f" ; {tweak.comment}"
-
-        lines.append(line)
-
-    return "\n".join(["; Generated by Mod Organizer 2 via Wizard"] + sorted(lines))
+        sections.setdefault(tweak.section, []).append(tweak)
+    return sections
+
+
+def mixed_ini_tweaks_filename(filename: str) -> str:
+    """
+    Compute the name of the file receiving the standard INI tweaks of a file that
+    also contains OBSE script tweaks.
+
+    Args:
+        filename: The file the tweaks are for, as written in the script.
+
+    Returns:
+        The name of the file for the standard INI tweaks, next to the original one.
+    """
+    path = PureWindowsPath(filename)
+    return str(path.with_name(f"{path.stem} - INI Settings{path.suffix}"))
+
+
+def warn_mixed_ini_tweaks(
+    filename: str,
+    settings_filename: str,
+    diagnostics: Optional[InstallDiagnostics] = None,
+) -> None:
+    """
+    Report that OBSE script tweaks are mixed with standard INI tweaks for the same
+    file. An OBSE script cannot contain INI sections, so the standard INI tweaks are
+    written to a separate file.
+
+    Args:
+        filename: The file the tweaks are for.
+        settings_filename: The file receiving the standard INI tweaks.
+        diagnostics: The diagnostics to report the warning to, if any.
+    """
+    report_warning(
+        f"INI Tweaks for {filename} mix OBSE script and INI settings, "
+        f"writing the INI settings to {settings_filename}.",
+        diagnostics,
+    )
 
 
-def make_standard_ini_tweaks(tweaks: List[WizardINISetting]) -> str:
+def ini_tweaks_files(
+    tweaks: WizardINITweaks, diagnostics: Optional[InstallDiagnostics] = None
+) -> Dict[str, List[WizardINISetting]]:
+    """
+    Group the given tweaks by the file they should be written to.
+
+    Tweaks for a file mixing OBSE script tweaks and standard INI tweaks are split:
+    the OBSE script tweaks are kept for the file (so that they can be merged into the
+    original script), and the standard INI tweaks are written to a separate file
+    (see mixed_ini_tweaks_filename()).
+
+    Args:
+        tweaks: The tweaks of the script.
+        diagnostics: The diagnostics to report warnings to, if any.
+
+    Returns:
+        A mapping from filenames to the list of tweaks for the file. The tweaks of a
+        file are either all OBSE script tweaks or all standard INI tweaks.
+    """
+    files: Dict[str, List[WizardINISetting]] = {}
+    for filename in tweaks.files():
+        ftweaks = tweaks.tweaks(filename)
+        obscript, sections = split_ini_tweaks(ftweaks)
+        if not obscript or not sections:
+            files[filename] = ftweaks
+            continue
 
-    # Group Tweaks per section:
-    sections: Mapping[str, List[WizardINISetting]] = {m.section: [] for m in tweaks}
-    for m in tweaks:
-        sections[m.section].append(m)
-
-    lines = []
-
-    for k in sorted(sections):
-        s_tweaks = sorted(sections[k], key=lambda m: m.setting)
-        lines.append(f"[{k}]")
-        for tw in s_tweaks:
-            if isinstance(tw, WizardINISettingEdit):
-                line = f"{tw.setting} = {tw.value}"
-                if tw.comment:
-                    line += f" # {tw.comment}"
+        settings_filename = mixed_ini_tweaks_filename(filename)
+        warn_mixed_ini_tweaks(filename, settings_filename, diagnostics)
+        files[filename] = obscript
+        files[settings_filename] = [tw for tws in sections.values() for tw in tws]
+
+    return files
+
+
+def dump_obscript_ini_tweaks(tweaks: Iterable[WizardINISetting], fp: TextIO):
+    """
+    Write the given OBSE script tweaks to the given file-like object.
+
+    Args:
+        tweaks: The tweaks to write. Disabled settings are ignored.
+        fp: The file-like object to write to.
+    """
+    fp.write("; Generated by Mod Organizer 2 via Wizard")
+
+    for line in sorted(
+        (
+            f"{tweak.section} {tweak.setting} to {tweak.value} ; {tweak.comment}"
+            if tweak.comment
+            else f"{tweak.section} {tweak.setting} to {tweak.value}"
+        )
+        for tweak in tweaks
+        if isinstance(tweak, WizardINISettingEdit)
+    ):
+        fp.write("\n")
+        fp.write(line)
+
+
+def dump_standard_ini_tweaks(
+    sections: Mapping[str, List[WizardINISetting]], fp: TextIO
+):
+    """
+    Write the given standard INI tweaks to the given file-like object.
+
+    Args:
+        sections: The tweaks to write, grouped by section (see split_ini_tweaks).
+        fp: The file-like object to write to.
+    """
+
+    first = True
+    for section in sorted(sections):
+        if not first:
+            fp.write("\n\n\n")
+        first = False
+
+        fp.write(f"[{section}]")
+        for tw in sorted(sections[section], key=attrgetter("setting")):
+            if not isinstance(tw, WizardINISettingEdit):
+                fp.write(f"\n# {tw.setting} - disabled")
+            elif tw.comment:
+                fp.write(f"\n{tw.setting} = {tw.value} # {tw.comment}")
             else:
-                line = f"# {tw.setting} - disabled"
-            lines.append(line)
-        lines.append("\n")
-
-    return "\n".join(lines[:-1])
-
-
-def merge_standard_ini_tweaks(tweaks: List[WizardINISetting], file: Path) -> str:
-    import sys
-
-    print(f"Cannot merge INI Tweaks for {file.name}.", file=sys.stderr)
-    return make_standard_ini_tweaks(tweaks)
+                fp.write(f"\n{tw.setting} = {tw.value}")
 
 
-def merge_obscript_ini_tweaks(tweaks: List[WizardINISetting], file: Path) -> str:
+def dump_merged_obscript_ini_tweaks(
+    tweaks: Iterable[WizardINISetting], file: Path, fp: TextIO
+):
+    """
+    Merge the given OBSE script tweaks into the given file and write the result to
+    the given file-like object.
 
-    # This is from Wrye Bash (and the function is inspired from Wrye Bash):
-    reComment = re.compile(";.*", re.U)
-    reDeleted = re.compile("" r";-(\w.*?)$", re.U)
-    reSet = re.compile("" r"\s*set\s+(.+?)\s+to\s+(.*)", re.I | re.U)
-    reSetGS = re.compile("" r"\s*setGS\s+(.+?)\s+(.*)", re.I | re.U)
-    reSetNGS = re.compile("" r"\s*SetNumericGameSetting\s+(.+?)\s+(.*)", re.I | re.U)
-
-    _regex_tuples = (
-        (reSet, "set", "set {} to {}"),
-        (reSetGS, "setgs", "setGS {} {}"),
-        (reSetNGS, "setnumericgamesetting", "SetNumericGameSetting {} {}"),
-    )
-
-    def _parse_obse_line(line):
-        for regex, sectionKey, format_string in _regex_tuples:
-            match = regex.match(line)
-            if match:
-                return match, sectionKey, format_string
-        return None, None, None
-
-    # Read the original file:
-    with open(file, "r") as fp:
-        olines = fp.readlines()
+    Args:
+        tweaks: The tweaks to merge.
+        file: The original OBSE script.
+        fp: The file-like object to write to.
+    """
 
     # Map setting name to value:
     settings: Dict[str, Dict[str, WizardINISettingEdit]] = {}
     deleted: Dict[str, Dict[str, WizardINISetting]] = {}
     for tweak in tweaks:
         if isinstance(tweak, WizardINISettingEdit):
-            if tweak.section not in settings:
-                settings[tweak.section.lower()] = {}
-            settings[tweak.section.lower()][tweak.setting] = tweak
-        else:
-            if tweak.section not in deleted:
-                deleted[tweak.section.lower()] = {}
-            deleted[tweak.section.lower()][tweak.setting] = tweak
-
-    # Create the lines:
-    lines = []
-    for line in olines:
-        line = line.rstrip()
-        maDeleted = reDeleted.match(line)
-        if maDeleted:
-            stripped = maDeleted.group(1)
+            settings.setdefault(tweak.section.lower(), {})[tweak.setting] = tweak
         else:
-            stripped = line
-        stripped = reComment.sub("", stripped).strip()
-
-        match, section_key, format_string = _parse_obse_line(stripped)
-
-        if match:
-            setting = match.group(1)
-            if section_key in settings and setting in settings[section_key]:
-                value = settings[section_key][setting].value
-                line = format_string.format(setting, value)
-                comment = ""
-                if settings[section_key][setting].comment:
-                    comment = settings[section_key][setting].comment  # type: ignore
-                    comment += " "
-                comment += f"(set by MO2 via Wizard, was {match.group(2)})"
-                line = f"{line}  ; {comment}"
-                del settings[section_key][setting]
-            elif (
-                not maDeleted
-                and section_key in deleted
-                and setting in deleted[section_key]
-            ):
-                line = f";-{line}"
-
-        lines.append(line)
+            deleted.setdefault(tweak.section.lower(), {})[tweak.setting] = tweak
+
+    # Lines are separated, not terminated, by new lines:
+    separator = ""
+
+    # Read the original file:
+    with open(file, "r") as ofp:
+        for line in ofp:
+            line = line.rstrip()
+            maDeleted = RE_OBSCRIPT_DELETED.match(line)
+            if maDeleted:
+                stripped = maDeleted.group(1)
+            else:
+                stripped = line
+            stripped = RE_OBSCRIPT_COMMENT.sub("", stripped).strip()
+
+            for regex, section_key, format_string in RE_OBSCRIPT_SETTINGS:
+                match = regex.match(stripped)
+                if match:
+                    break
+
+            if match:
+                setting = match.group(1)
+                section = settings.get(section_key)
+                if section is not None and setting in section:
+                    edit = section.pop(setting)
+                    line = format_string.format(setting, edit.value)
+                    comment = ""
+                    if edit.comment:
+                        comment = edit.comment + " "
+                    comment += f"(set by MO2 via Wizard, was {match.group(2)})"
+                    line = f"{line}  ; {comment}"
+                elif not maDeleted and setting in deleted.get(section_key, ()):
+                    line = f";-{line}"
+
+            fp.write(separator)
+            fp.write(line)
+            separator = "\n"
 
     for section in settings.values():
-        for setting in section.values():
-            if setting.section.lower() == "set":
-                line = f"{setting.section} {setting.setting} to {setting.value}"
+        for edit in section.values():
+            if edit.section.lower() == "set":
+                line = f"{edit.section} {edit.setting} to {edit.value}"
             else:
-                line = f"{setting.section} {setting.setting} {setting.value}"
+                line = f"{edit.section} {edit.setting} {edit.value}"
 
-            if setting.comment:
-                comment = setting.comment + " (set by MO2 via Wizard)"
+            if edit.comment:
+                comment = edit.comment + " (set by MO2 via Wizard)"
             else:
                 comment = "(set by MO2 via Wizard)"
-            line = f"{line}  ; {comment}"
 
-        lines.append(line)
+            fp.write(f"{separator}{line}  ; {comment}")
+            separator = "\n"
 
-    return "\n".join(lines)
 
+def dump_ini_tweaks(tweaks: Iterable[WizardINISetting], fp: TextIO):
+    """
+    Write the given tweaks to the given file-like object.
 
-def make_ini_tweaks(tweaks: List[WizardINISetting]) -> str:
+    Args:
+        tweaks: The tweaks to write, either all OBSE script tweaks or all standard
+            INI tweaks (see ini_tweaks_files()).
+        fp: The file-like object to write to.
 
-    is_set = [
-        tw.section.lower() in ("set", "setgs", "setnumericgamesetting") for tw in tweaks
-    ]
+    Raises:
+        ValueError: If the tweaks mix OBSE script tweaks and standard INI tweaks.
+    """
+    obscript, sections = split_ini_tweaks(tweaks)
 
-    # Assume there is no mix.
-    if all(is_set):
-        return make_obscript_ini_tweaks(tweaks)
+    if not sections:
+        dump_obscript_ini_tweaks(obscript, fp)
+    elif not obscript:
+        dump_standard_ini_tweaks(sections, fp)
     else:
-        return make_standard_ini_tweaks(tweaks)
+        raise ValueError(
+            f"INI Tweaks for {obscript[0].filename} mix OBSE script and INI settings."
+        )
+
+
+def dump_merged_ini_tweaks(
+    tweaks: Iterable[WizardINISetting],
+    file: Path,
+    fp: TextIO,
+    diagnostics: Optional[InstallDiagnostics] = None,
+):
+    """
+    Merge the given tweaks into the given file and write the result to the given
+    file-like object.
+
+    Standard INI tweaks cannot be merged, so if the tweaks are standard INI tweaks,
+    a warning is reported and the tweaks replace the content of the file.
+
+    Args:
+        tweaks: The tweaks to merge, either all OBSE script tweaks or all standard
+            INI tweaks (see ini_tweaks_files()).
+        file: The original file.
+        fp: The file-like object to write to.
+        diagnostics: The diagnostics to report warnings to, if any.
+
+    Raises:
+        ValueError: If the tweaks mix OBSE script tweaks and standard INI tweaks.
+    """
+    obscript, sections = split_ini_tweaks(tweaks)
+
+    if not sections:
+        dump_merged_obscript_ini_tweaks(obscript, file, fp)
+        return
+
+    if obscript:
+        raise ValueError(
+            f"INI Tweaks for {obscript[0].filename} mix OBSE script and INI settings."
+        )
+
+    report_warning(f"Cannot merge INI Tweaks for {file.name}.", diagnostics)
+    dump_standard_ini_tweaks(sections, fp)
+
+
+def make_obscript_ini_tweaks(tweaks: List[WizardINISetting]) -> str:
+    fp = io.StringIO()
+    dump_obscript_ini_tweaks(tweaks, fp)
+    return fp.getvalue()
 
 
-def merge_ini_tweaks(tweaks: List[WizardINISetting], file: Path) -> str:
+def make_standard_ini_tweaks(tweaks: List[WizardINISetting]) -> str:
+    fp = io.StringIO()
+    dump_standard_ini_tweaks(group_ini_tweaks(tweaks), fp)
+    return fp.getvalue()
 
-    is_set = [
-        tw.section.lower() in ("set", "setgs", "setnumericgamesetting") for tw in tweaks
-    ]
 
-    # Assume there is no mix.
-    if all(is_set):
-        return merge_obscript_ini_tweaks(tweaks, file)
+def merge_standard_ini_tweaks(
+    tweaks: List[WizardINISetting],
+    file: Path,
+    diagnostics: Optional[InstallDiagnostics] = None,
+) -> str:
+    report_warning(f"Cannot merge INI Tweaks for {file.name}.", diagnostics)
+    return make_standard_ini_tweaks(tweaks)
+
+
+def merge_obscript_ini_tweaks(tweaks: List[WizardINISetting], file: Path) -> str:
+    fp = io.StringIO()
+    dump_merged_obscript_ini_tweaks(tweaks, file, fp)
+    return fp.getvalue()
+
+
+def make_ini_tweaks(tweaks: List[WizardINISetting]) -> str:
+    fp = io.StringIO()
+    dump_ini_tweaks(tweaks, fp)
+    return fp.getvalue()
+
+
+def merge_ini_tweaks(
+    tweaks: List[WizardINISetting],
+    file: Path,
+    diagnostics: Optional[InstallDiagnostics] = None,
+) -> str:
+    fp = io.StringIO()
+    dump_merged_ini_tweaks(tweaks, file, fp, diagnostics)
+    return fp.getvalue()
+
+
+class IniTweaksCache:
+    """
+    Cache for rendered INI tweaks, keyed by file.
+
+    A cached value is only reused if the tweaks are exactly the same (same objects, in
+    the same order) as the ones used to render it, so the cache can be kept for a
+    whole installation session, even if the user goes back and changes options.
+    """
+
+    # Map (filename, OBSE script tweaks, original file) to the rendered tweaks and
+    # the rendered text:
+    _entries: Dict[Tuple[str, bool, Optional[Path]], Tuple[List[WizardINISetting], str]]
+
+    # Diagnostics to report the warnings of the rendering to:
+    _diagnostics: Optional[InstallDiagnostics]
+
+    def __init__(self, diagnostics: Optional[InstallDiagnostics] = None):
+        """
+        Args:
+            diagnostics: The diagnostics to report warnings to, if any.
+        """
+        self._entries = {}
+        self._diagnostics = diagnostics
+
+    def _key(
+        self, tweaks: List[WizardINISetting], file: Optional[Path]
+    ) -> Tuple[str, bool, Optional[Path]]:
+        # The OBSE script tweaks and standard INI tweaks of a file are rendered
+        # separately (see ini_tweaks_files()):
+        return (
+            tweaks[0].filename.lower(),
+            tweaks[0].section.lower() in OBSCRIPT_SECTIONS,
+            file,
+        )
+
+    def _lookup(
+        self, tweaks: List[WizardINISetting], file: Optional[Path]
+    ) -> Optional[str]:
+        entry = self._entries.get(self._key(tweaks, file))
+        if (
+            entry is not None
+            and len(entry[0]) == len(tweaks)
+            and all(a is b for a, b in zip(entry[0], tweaks))
+        ):
+            return entry[1]
+        return None
+
+    def render(
+        self, tweaks: List[WizardINISetting], file: Optional[Path] = None
+    ) -> str:
+        """
+        Render the given tweaks, or return the cached value if they were already
+        rendered.
+
+        Args:
+            tweaks: The tweaks to render, see dump_ini_tweaks_file().
+            file: The original file to merge the tweaks into, or None to create a new
+                INI file.
+
+        Returns:
+            The content of the INI file.
+        """
+        if not tweaks:
+            return render_ini_tweaks(tweaks, file, self._diagnostics)
+
+        data = self._lookup(tweaks, file)
+        if data is None:
+            data = render_ini_tweaks(tweaks, file, self._diagnostics)
+            self._entries[self._key(tweaks, file)] = (list(tweaks), data)
+        return data
+
+    def dump(
+        self, tweaks: List[WizardINISetting], file: Optional[Path], fp: TextIO
+    ) -> None:
+        """
+        Write the given tweaks to the given file-like object, using the cached value
+        if they were already rendered. Tweaks that were not rendered yet are written
+        directly and are not added to the cache.
+
+        Args:
+            tweaks: The tweaks to write, see dump_ini_tweaks_file().
+            file: The original file to merge the tweaks into, or None to create a new
+                INI file.
+            fp: The file-like object to write to.
+        """
+        data = self._lookup(tweaks, file) if tweaks else None
+        if data is None:
+            dump_ini_tweaks_file(tweaks, file, fp, self._diagnostics)
+        else:
+            fp.write(data)
+
+
+def dump_ini_tweaks_file(
+    tweaks: List[WizardINISetting],
+    file: Optional[Path],
+    fp: TextIO,
+    diagnostics: Optional[InstallDiagnostics] = None,
+) -> None:
+    """
+    Write the given tweaks to the given file-like object, merging them into the given
+    file if any.
+
+    Args:
+        tweaks: The tweaks to write, either all OBSE script tweaks or all standard
+            INI tweaks (see ini_tweaks_files()).
+        file: The original file to merge the tweaks into, or None to create a new
+            INI file.
+        fp: The file-like object to write to.
+        diagnostics: The diagnostics to report warnings to, if any.
+    """
+    if file is None:
+        dump_ini_tweaks(tweaks, fp)
     else:
-        return merge_standard_ini_tweaks(tweaks, file)
+        dump_merged_ini_tweaks(tweaks, file, fp, diagnostics)
+
+
+def render_ini_tweaks(
+    tweaks: List[WizardINISetting],
+    file: Optional[Path],
+    diagnostics: Optional[InstallDiagnostics] = None,
+) -> str:
+    """
+    Render the given tweaks, merging them into the given file if any.
+
+    Args:
+        tweaks: The tweaks to render, see dump_ini_tweaks_file().
+        file: The original file to merge the tweaks into, or None to create a new
+            INI file.
+        diagnostics: The diagnostics to report warnings to, if any.
+
+    Returns:
+        The content of the INI file.
+    """
+    fp = io.StringIO()
+    dump_ini_tweaks_file(tweaks, file, fp, diagnostics)
+    return fp.getvalue()
+
+
+def write_ini_tweaks(
+    targets: Sequence[Tuple[Path, List[WizardINISetting], Optional[Path]]],
+    progress: Optional[Callable[[int, int], None]] = None,
+    cache: Optional[IniTweaksCache] = None,
+    diagnostics: Optional[InstallDiagnostics] = None,
+):
+    """
+    Render and write INI tweaks files.
+
+    The files are rendered one at a time in the calling thread, directly into the
+    target files. Rendering is pure Python, so it would not run faster in multiple
+    threads, but progress is reported after each file so that the caller can process
+    events between files.
+
+    Args:
+        targets: List of (target, tweaks, original) tuples, where target is the path
+            of the file to write, tweaks the list of tweaks for this file (see
+            ini_tweaks_files()) and original the path to the original file to merge
+            the tweaks into (if any).
+        progress: Function called with the number of written files and the total
+            number of files each time a file has been written.
+        cache: Cache to reuse already rendered tweaks from, if any, in which case
+            warnings are reported to the diagnostics of the cache.
+        diagnostics: The diagnostics to report warnings to when no cache is given.
+    """
+
+    dump: Callable[[List[WizardINISetting], Optional[Path], TextIO], None] = (
+        cache.dump
+        if cache
+        else lambda tweaks, file, fp: dump_ini_tweaks_file(
+            tweaks, file, fp, diagnostics
+        )
+    )
+
+    for count, (target, tweaks, original) in enumerate(targets, start=1):
+        with open(target, "w") as fp:
+            dump(tweaks, original, fp)
+        if progress:
+            progress(count, len(targets))
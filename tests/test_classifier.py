@@ -0,0 +1,78 @@
+# -*- encoding: utf-8 -*-
+
+from benchmarks import fake_mobase
+
+fake_mobase.install()
+
+from src.runner import SubPackageClassifier  # noqa: E402
+
+
+class TexturesOnlyChecker(fake_mobase.ModDataChecker):
+    """
+    Checker of a game where only textures make a data folder, unlike the names used
+    by the fast path of the classifier.
+    """
+
+    def dataLooksValid(self, tree: fake_mobase.IFileTree) -> int:
+        for entry in tree:
+            if entry.isDir() and entry.name().lower() == "textures":
+                return fake_mobase.ModDataChecker.VALID
+        return fake_mobase.ModDataChecker.INVALID
+
+
+def make_folder(root: fake_mobase.IFileTree, name: str, *children: str):
+    folder = root.addDirectory(name)
+    for child in children:
+        if child.endswith("/"):
+            folder.addDirectory(child[:-1])
+        else:
+            folder.addFile(child)
+    return folder
+
+
+def test_checker_rejects_fast_path_names():
+    root = fake_mobase.IFileTree()
+    classifier = SubPackageClassifier(TexturesOnlyChecker())  # type: ignore
+
+    assert not classifier.isSubPackage(make_folder(root, "00 Meshes", "meshes/"))
+    assert not classifier.isSubPackage(make_folder(root, "01 Plugin", "a.esp"))
+    assert classifier.isSubPackage(make_folder(root, "02 Textures", "textures/"))
+
+
+def test_accepted_names_are_trusted_together():
+    root = fake_mobase.IFileTree()
+    classifier = SubPackageClassifier(TexturesOnlyChecker())  # type: ignore
+
+    # Accepted because of textures, but meshes may not be the reason:
+    assert classifier.isSubPackage(make_folder(root, "00 Both", "meshes/", "textures/"))
+    assert not classifier.isSubPackage(make_folder(root, "01 Meshes", "meshes/"))
+    assert classifier.isSubPackage(
+        make_folder(root, "02 All", "meshes/", "textures/", "c.esp")
+    )
+
+
+def test_fast_path_for_confirmed_names():
+    root = fake_mobase.IFileTree()
+    calls = []
+
+    class CountingChecker(fake_mobase.ModDataChecker):
+        def dataLooksValid(self, tree: fake_mobase.IFileTree) -> int:
+            calls.append(tree.name())
+            return super().dataLooksValid(tree)
+
+    classifier = SubPackageClassifier(CountingChecker())  # type: ignore
+
+    assert classifier.isSubPackage(make_folder(root, "00 Core", "textures/"))
+    assert classifier.isSubPackage(make_folder(root, "01 Option", "textures/"))
+    assert classifier.isSubPackage(make_folder(root, "02 Ini", "ini/"))
+    assert not classifier.isSubPackage(make_folder(root, "03 Other", "readme.txt"))
+    assert calls == ["00 Core", "03 Other"]
+
+
+def test_without_checker():
+    root = fake_mobase.IFileTree()
+    classifier = SubPackageClassifier(None)
+
+    assert not classifier.isSubPackage(make_folder(root, "00 Core", "a.esp"))
+    assert classifier.isSubPackage(make_folder(root, "01 Tweaks", "INI Tweaks/"))
+    assert classifier.isSubPackage(make_folder(root, "90 Docs", "readme.txt"))